@@ -0,0 +1,86 @@
+"""
+Compare the PDF backends (see src/scienzaexpress/preflights/backends/).
+
+Usage:
+
+    python scripts/benchmark_backends.py [--repeat N] book.pdf [other.pdf ...]
+
+For each PDF and each backend, time:
+
+- images: the listing of all the images (what @@pdf-preflight does)
+- text: the number of pages and the text of the first four and of the last
+  two pages (roughly what @@validate-pdf-metadata needs)
+
+and report whether the backends agree on the images with a low resolution.
+No Zope is needed; the poppler backend needs pdfimages, pdftotext and pdfinfo.
+"""
+
+from pathlib import Path
+from scienzaexpress.preflights.backends.inprocess import PypdfBackend
+from scienzaexpress.preflights.backends.poppler import PopplerBackend
+
+import argparse
+import time
+
+
+BACKENDS = {
+    "poppler": PopplerBackend(),
+    "pypdf": PypdfBackend(),
+}
+
+PPI_LOWTHRESHOLD = 300
+
+
+def best_of(repeat, func, *args):
+    """Return the best time of some runs, and the result of the last one."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def list_images(backend, path):
+    return list(backend.iter_images(path))
+
+
+def read_text(backend, path):
+    last_page = backend.page_count(path)
+    pages = {1, 2, 3, 4, last_page - 1, last_page}
+    return backend.extract_pages(path, {page for page in pages if 0 < page <= last_page})
+
+
+def bad_images(images):
+    return {(info.page, info.width, info.height) for info in images if min(info.x_ppi, info.y_ppi) < PPI_LOWTHRESHOLD}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=3, help="runs per measure (the best one counts)")
+    parser.add_argument("pdfs", nargs="+", type=Path)
+    args = parser.parse_args()
+
+    print(f"{'file':30} {'backend':8} {'images':>7} {'bad':>5} {'images s':>9} {'text s':>8}")
+    for path in args.pdfs:
+        bad_by_backend = {}
+        for name, backend in BACKENDS.items():
+            try:
+                images_time, images = best_of(args.repeat, list_images, backend, path)
+                text_time, _ = best_of(args.repeat, read_text, backend, path)
+            except FileNotFoundError as e:
+                print(f"{path.name[:30]:30} {name:8} not available: {e}")
+                continue
+            bad_by_backend[name] = bad_images(images)
+            print(
+                f"{path.name[:30]:30} {name:8} {len(images):7} {len(bad_by_backend[name]):5}"
+                f" {images_time:9.3f} {text_time:8.3f}",
+            )
+        if len(bad_by_backend) == len(BACKENDS):
+            reference, *others = bad_by_backend.values()
+            agree = all(other == reference for other in others)
+            print(f"{'':30} the backends {'agree' if agree else 'DO NOT agree'} on the bad images")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Time the ONIX builder on a catalogue export (see views/onix_generator.py).
+
+Usage:
+
+    python scripts/benchmark_onix.py [--repeat N] [--products N] [--baseline old_onix_generator.py]
+
+Each run builds and serializes a Product per title, as the ONIX feed does.
+To compare with another version of the builder, e.g. the one that built each
+element with etree.SubElement instead of copying templates:
+
+    git show 69ff7e1:src/scienzaexpress/preflights/views/onix_generator.py > /tmp/old.py
+    python scripts/benchmark_onix.py --baseline /tmp/old.py
+
+the two catalogues must be identical. No Zope is needed.
+"""
+
+from lxml import etree
+from pathlib import Path
+from scienzaexpress.preflights.views import onix_generator
+
+import argparse
+import datetime
+import importlib.util
+import time
+
+
+def book(module, i):
+    return module.BookMetadata(
+        isbn=f"979128006{i:04d}",
+        type="BB",
+        measures=[210, 148, 12],
+        collection_title="Nuova Lettera Matematica",
+        collection_issn="2724-0576",
+        title=f"Titolo {i}",
+        orig_title="",
+        subtitle="Un sottotitolo",
+        authors=["Ada Lovelace", "Charles Babbage"],
+        bios=["Matematica", "Matematico"],
+        illustrators=[],
+        translators=[],
+        curators=[],
+        ed_number="",
+        orig_lang="",
+        pages="128",
+        thema_keys=["PB", "PBW"],
+        abstract="Un libro di matematica.",
+        pub_city="Pisa",
+        pub_date=datetime.date(2025, 3, 1),
+        price_tax=15.0,
+    )
+
+
+def load(path):
+    spec = importlib.util.spec_from_file_location("baseline_onix_generator", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def export(module, books):
+    return [etree.tostring(module.generate_product(book_meta, is_for_ISBN=False)) for book_meta in books]
+
+
+def best_of(repeat, func, *args):
+    """Return the best time of some runs, and the result of the last one."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=3, help="runs per measure (the best one counts)")
+    parser.add_argument("--products", type=int, default=5000, help="titles in the catalogue")
+    parser.add_argument("--baseline", type=Path, help="another version of onix_generator.py")
+    args = parser.parse_args()
+
+    modules = {"current": onix_generator}
+    if args.baseline:
+        modules = {"baseline": load(args.baseline), **modules}
+
+    print(f"{'builder':10} {'s':>8} {'products/s':>11}")
+    timings, catalogues = {}, {}
+    for name, module in modules.items():
+        books = [book(module, i) for i in range(args.products)]
+        timings[name], catalogues[name] = best_of(args.repeat, export, module, books)
+        print(f"{name:10} {timings[name]:8.3f} {args.products / timings[name]:11.0f}")
+    if args.baseline:
+        print(f"speedup: {timings['baseline'] / timings['current']:.1f}x")
+        identical = catalogues["baseline"] == catalogues["current"]
+        print(f"the catalogues are {'identical' if identical else 'DIFFERENT'}")
+
+
+if __name__ == "__main__":
+    main()
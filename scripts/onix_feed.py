@@ -0,0 +1,54 @@
+"""
+Write the whole catalogue as a single ONIX message (see src/scienzaexpress/preflights/onix_feed.py).
+
+    zconsole run instance/etc/zope.conf ./scripts/onix_feed.py
+
+Environment variables:
+
+- SITE_ID: the id of the Plone site (default: Plone)
+- ADMIN: the id of the user (in the Zope root) that runs the export, so that
+  also the private Metadata are found (default: admin)
+- OUTPUT: the file to write (default: onix.xml)
+- DELTA: if set, write only the titles changed since the last delta export
+  (and move its watermark forward)
+- SINCE: with DELTA, write the titles changed since this date (YYYY-MM-DD)
+  instead; the watermark is not moved
+"""
+
+from AccessControl.SecurityManagement import newSecurityManager
+from scienzaexpress.preflights import onix_feed
+from zope.component.hooks import setSite
+
+import datetime
+import os
+import transaction
+
+
+SITE_ID = os.getenv("SITE_ID", "Plone")
+OUTPUT = os.getenv("OUTPUT", "onix.xml")
+DELTA = bool(os.getenv("DELTA"))
+SINCE = os.getenv("SINCE")
+ADMIN = os.getenv("ADMIN", "admin")
+
+app = globals()["app"]
+
+admin = app.acl_users.getUserById(ADMIN)
+admin = admin.__of__(app.acl_users)
+newSecurityManager(None, admin)
+
+site = app[SITE_ID]
+setSite(site)
+
+if DELTA:
+    since = None
+    if SINCE:
+        since = datetime.datetime.combine(datetime.date.fromisoformat(SINCE), datetime.time(), datetime.UTC)
+    result = onix_feed.export_delta(OUTPUT, site, since=since, record=since is None)
+    transaction.commit()
+else:
+    result = onix_feed.write_feed(OUTPUT, onix_feed.find_metadata())
+print(f"{OUTPUT}: {result.products} products, {result.withdrawn} withdrawn")
+for path, reasons_failed in result.skipped:
+    print(f"Skipped {path}: {' '.join(reasons_failed)}")
+for isbn, errors in result.schema_errors:
+    print(f"Not valid wrt the ONIX XSD {isbn}: {'; '.join(map(str, errors))}")
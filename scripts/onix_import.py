@@ -0,0 +1,48 @@
+"""
+Create or update Metadata objects from an ONIX message (see src/scienzaexpress/preflights/onix_import.py).
+
+    zconsole run instance/etc/zope.conf ./scripts/onix_import.py
+
+Environment variables:
+
+- SITE_ID: the id of the Plone site (default: Plone)
+- ADMIN: the id of the user (in the Zope root) that creates and updates the
+  Metadata objects (default: admin)
+- INPUT: the ONIX file to read (default: onix.xml)
+- FOLDER: the path (from the site) of the folder where the new Metadata
+  objects are created (default: the site)
+- BATCH_SIZE: commit after this many products (default: 100)
+"""
+
+from AccessControl.SecurityManagement import newSecurityManager
+from scienzaexpress.preflights import onix_import
+from zope.component.hooks import setSite
+
+import os
+import transaction
+
+
+SITE_ID = os.getenv("SITE_ID", "Plone")
+INPUT = os.getenv("INPUT", "onix.xml")
+FOLDER = os.getenv("FOLDER", "")
+BATCH_SIZE = int(os.getenv("BATCH_SIZE", onix_import.BATCH_SIZE))
+ADMIN = os.getenv("ADMIN", "admin")
+
+app = globals()["app"]
+
+admin = app.acl_users.getUserById(ADMIN)
+admin = admin.__of__(app.acl_users)
+newSecurityManager(None, admin)
+
+site = app[SITE_ID]
+setSite(site)
+
+folder = site.unrestrictedTraverse(FOLDER.strip("/")) if FOLDER.strip("/") else site
+result = onix_import.import_products(INPUT, folder, batch_size=BATCH_SIZE, commit=True)
+transaction.commit()
+print(
+    f"{INPUT}: {len(result.created)} created, {len(result.updated)} updated,"
+    f" {result.unchanged} unchanged, {len(result.skipped)} skipped"
+)
+for reference, reason in result.skipped:
+    print(f"Skipped {reference}: {reason}")
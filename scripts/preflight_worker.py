@@ -0,0 +1,34 @@
+"""
+Run the preflights enqueued with ?async=1 (see src/scienzaexpress/preflights/jobs.py).
+
+    zconsole run instance/etc/zope.conf ./scripts/preflight_worker.py
+
+Environment variables:
+
+- SITE_ID: the id of the Plone site (default: Plone)
+- POLL_INTERVAL: seconds between checks of the queue (default: 5)
+"""
+
+from scienzaexpress.preflights import jobs
+from scienzaexpress.preflights.interfaces import IBrowserLayer
+from Testing.makerequest import makerequest
+from zope.component.hooks import setSite
+from zope.globalrequest import setRequest
+from zope.interface import alsoProvides
+
+import os
+
+
+SITE_ID = os.getenv("SITE_ID", "Plone")
+POLL_INTERVAL = float(os.getenv("POLL_INTERVAL", "5"))
+
+app = makerequest(globals()["app"])
+
+request = app.REQUEST
+alsoProvides(request, IBrowserLayer)
+setRequest(request)
+
+site = app[SITE_ID]
+setSite(site)
+
+jobs.work(site, request, poll_interval=POLL_INTERVAL)
@@ -54,7 +54,11 @@ setup(
         "plone.api",
     ],
     extras_require={
+        "pypdf": [
+            "pypdf",
+        ],
         "test": [
+            "pypdf",
             "zest.releaser[recommended]",
             "zestreleaser.towncrier",
             "plone.app.testing",
@@ -0,0 +1,78 @@
+"""
+Read images and text of PDF files (see interfaces.IPdfBackend).
+
+- poppler: runs pdfimages, pdftotext and pdfinfo (the reference)
+- pypdf: reads the PDF in-process, without spawning processes (needs pypdf)
+"""
+
+from plone import api
+from scienzaexpress.preflights import logger
+from scienzaexpress.preflights.interfaces import IPdfBackend
+from zope.component import getUtility
+from zope.component import queryUtility
+
+import dataclasses
+
+
+REGISTRY_RECORD = "se_meta.pdf_backend"
+DEFAULT_BACKEND = "poppler"
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class PdfImageInfo:
+    """Represent an image as returned from pdfimages -list."""
+
+    # $ pdfimages -list x.pdf
+    # page   num  type   width height color comp bpc  enc interp  object ID x-ppi y-ppi size ratio
+    # --------------------------------------------------------------------------------------------
+    #    1     0 image     420   520  rgb     3   8  image  no         7  0   432   432  100K  16%
+    # ...
+    page: int
+    num: int
+    objecttype: str
+    width: int
+    height: int
+    color: str
+    comp: int
+    bpc: int
+    enc: str
+    interp: str
+    pdfobject: int
+    pdfobjectid: int
+    x_ppi: int
+    y_ppi: int
+    size: str
+    ratio: str
+    # name: str = dataclasses.field(init=False)
+
+    def __str__(self):
+        return f"{self.color} {self.objecttype} {self.width}x{self.height} ({self.x_ppi}x{self.y_ppi} ppi) at pg. {self.page}"
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class PdfReadError:
+    """An error met while reading the images of a PDF (see IPdfBackend.iter_images)."""
+
+    page: int | None
+    """None if the error is not about a single page (e.g. the PDF is unreadable)."""
+    message: str
+
+    def __str__(self):
+        if self.page is None:
+            return self.message
+        return f"pg. {self.page}: {self.message}"
+
+
+def get_backend() -> tuple[str, IPdfBackend]:
+    """
+    Return the name of the backend chosen in the registry, and the backend.
+
+    Call this in the request thread, and hand the backend to the workers.
+    """
+    name = api.portal.get_registry_record(REGISTRY_RECORD, default=DEFAULT_BACKEND)
+    backend = queryUtility(IPdfBackend, name=name or DEFAULT_BACKEND)
+    if backend is None:
+        logger.warning("PDF backend %r not available, using %r", name, DEFAULT_BACKEND)
+        name = DEFAULT_BACKEND
+        backend = getUtility(IPdfBackend, name=name)
+    return name, backend
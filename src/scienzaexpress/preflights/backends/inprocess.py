@@ -0,0 +1,307 @@
+"""
+Read PDFs in-process with pypdf.
+
+No process is spawned and no temporary file is written, but all the work
+is done in Python (holding the GIL): see scripts/benchmark_backends.py to
+compare with poppler on real books.
+
+The images are found walking the content streams of the pages (and of the
+forms they use), keeping track of the current transformation matrix (CTM):
+the size of an image on the page, and so its effective resolution, is given
+by the CTM in effect when the image is drawn. Soft masks are not listed.
+
+Malformed PDFs make pypdf raise all sorts of exceptions (not only
+PyPdfError: also ValueError, KeyError, TypeError, AssertionError...), so any
+exception is caught, per page or per image, and reported as a PdfReadError,
+as the poppler backend does with the errors of its tools.
+"""
+
+from collections.abc import Iterable
+from collections.abc import Iterator
+from pathlib import Path
+from pypdf import PdfReader
+from pypdf.generic import ContentStream
+from pypdf.generic import DictionaryObject
+from pypdf.generic import IndirectObject
+from scienzaexpress.preflights import logger
+from scienzaexpress.preflights.backends import PdfImageInfo
+from scienzaexpress.preflights.backends import PdfReadError
+from scienzaexpress.preflights.interfaces import IPdfBackend
+from zope.interface import implementer
+
+import itertools
+import math
+
+
+IDENTITY = (1.0, 0.0, 0.0, 1.0, 0.0, 0.0)
+
+MAX_FORM_DEPTH = 16
+"""Forms that nest deeper than this are ignored (they are probably a loop)."""
+
+# Same names used by pdfimages
+COLOR_SPACES = {
+    "/DeviceGray": ("gray", 1),
+    "/CalGray": ("gray", 1),
+    "/G": ("gray", 1),
+    "/DeviceRGB": ("rgb", 3),
+    "/CalRGB": ("rgb", 3),
+    "/RGB": ("rgb", 3),
+    "/DeviceCMYK": ("cmyk", 4),
+    "/CMYK": ("cmyk", 4),
+    "/Lab": ("lab", 3),
+    "/Indexed": ("index", 1),
+    "/I": ("index", 1),
+    "/Separation": ("sep", 1),
+    "/Pattern": ("pattern", 1),
+}
+
+ENCODINGS = {
+    "/DCTDecode": "jpeg",
+    "/DCT": "jpeg",
+    "/JPXDecode": "jpx",
+    "/JBIG2Decode": "jbig2",
+    "/CCITTFaxDecode": "ccitt",
+    "/CCF": "ccitt",
+}
+
+# Abbreviations used by inline images
+INLINE_KEYS = {
+    "/W": "/Width",
+    "/H": "/Height",
+    "/CS": "/ColorSpace",
+    "/BPC": "/BitsPerComponent",
+    "/F": "/Filter",
+    "/IM": "/ImageMask",
+    "/I": "/Interpolate",
+}
+
+
+def resolve(obj) -> DictionaryObject:
+    """Resolve an (optional) indirect dictionary."""
+    if obj is None:
+        return DictionaryObject()
+    return obj.get_object()
+
+
+def multiply(m: tuple[float, ...], n: tuple[float, ...]) -> tuple[float, ...]:
+    """Multiply two PDF matrices (a b c d e f): the result is m × n."""
+    return (
+        m[0] * n[0] + m[1] * n[2],
+        m[0] * n[1] + m[1] * n[3],
+        m[2] * n[0] + m[3] * n[2],
+        m[2] * n[1] + m[3] * n[3],
+        m[4] * n[0] + m[5] * n[2] + n[4],
+        m[4] * n[1] + m[5] * n[3] + n[5],
+    )
+
+
+def effective_ppi(pixels: int, ctm: tuple[float, ...], axis: int) -> int:
+    """
+    Return the resolution of an image along one axis (0: x, 1: y).
+
+    Images are drawn into the unit square, which the CTM maps onto the page:
+    the length of the image in points is the length of the transformed unit
+    vector.
+    """
+    a, b, c, d = ctm[:4]
+    points = math.hypot(a, b) if axis == 0 else math.hypot(c, d)
+    if not points:
+        return 0
+    return round(pixels * 72 / points)
+
+
+def color_space(value) -> tuple[str, int]:
+    """Return the name (as pdfimages does) and the number of components of a color space."""
+    value = value.get_object() if value is not None else None
+    if value is None:
+        return "-", 0
+    if isinstance(value, list):
+        family = str(value[0])
+        if family == "/ICCBased":
+            return "icc", int(value[1].get_object().get("/N", 0))
+        if family == "/DeviceN":
+            return "devn", len(value[1].get_object())
+        return COLOR_SPACES.get(family, ("-", 0))
+    return COLOR_SPACES.get(str(value), ("-", 0))
+
+
+def human_size(size: int) -> str:
+    """Format a size like pdfimages does."""
+    for unit in ("B", "K", "M"):
+        if size < 1024:
+            return f"{size}{unit}"
+        size //= 1024
+    return f"{size}G"
+
+
+@implementer(IPdfBackend)
+class PypdfBackend:
+    """Read images and text with pypdf, without spawning processes."""
+
+    title = "pypdf (in-process)"
+
+    def iter_images(self, path: Path) -> Iterator[PdfImageInfo | PdfReadError]:
+        with path.open("rb") as stream:
+            try:
+                reader = PdfReader(stream)
+                pages = list(reader.pages)
+            except Exception as e:
+                logger.warning("Cannot read %s: %s", path, e)
+                yield PdfReadError(page=None, message=f"Cannot read the PDF: {e}")
+                return
+            counter = itertools.count()
+            for page_number, page in enumerate(pages, start=1):
+                try:
+                    resources = resolve(page.get("/Resources"))
+                    contents = page.get_contents()
+                    if contents is None or not self._may_have_images(resources, contents):
+                        continue
+                    yield from self._walk(reader, contents, resources, IDENTITY, page_number, counter, depth=0)
+                except Exception as e:
+                    logger.warning("Cannot read page %s of %s: %s", page_number, path, e)
+                    yield PdfReadError(page=page_number, message=f"Cannot read the page: {e}")
+
+    @staticmethod
+    def _may_have_images(resources: DictionaryObject, contents: ContentStream) -> bool:
+        """Avoid parsing content streams that cannot draw any image."""
+        if resources.get("/XObject"):
+            return True
+        return b"BI" in contents.get_data()
+
+    def _walk(
+        self,
+        reader: PdfReader,
+        contents,
+        resources: DictionaryObject,
+        ctm: tuple[float, ...],
+        page_number: int,
+        counter: Iterator[int],
+        depth: int,
+    ) -> Iterator[PdfImageInfo | PdfReadError]:
+        """Yield the images drawn by a content stream (of a page or of a form)."""
+        xobjects = resolve(resources.get("/XObject"))
+        if not isinstance(contents, ContentStream):
+            contents = ContentStream(contents, reader)
+        stack = []
+        for operands, operator in contents.operations:
+            if operator == b"q":
+                stack.append(ctm)
+            elif operator == b"Q":
+                if stack:
+                    ctm = stack.pop()
+            elif operator == b"cm":
+                ctm = multiply(tuple(float(x) for x in operands), ctm)
+            elif operator == b"Do":
+                name = operands[0]
+                if name not in xobjects:
+                    continue
+                reference = xobjects.raw_get(name)
+                xobject = reference.get_object()
+                subtype = xobject.get("/Subtype")
+                if subtype == "/Image":
+                    yield self._safe_image_info(xobject, reference, ctm, page_number, counter)
+                elif subtype == "/Form" and depth < MAX_FORM_DEPTH:
+                    matrix = tuple(float(x) for x in xobject.get("/Matrix", IDENTITY))
+                    form_resources = resolve(xobject.get("/Resources")) or resources
+                    yield from self._walk(
+                        reader,
+                        xobject,
+                        form_resources,
+                        multiply(matrix, ctm),
+                        page_number,
+                        counter,
+                        depth + 1,
+                    )
+            elif operator == b"INLINE IMAGE":
+                settings = {INLINE_KEYS.get(key, key): value for key, value in operands["settings"].items()}
+                yield self._safe_image_info(
+                    settings,
+                    None,
+                    ctm,
+                    page_number,
+                    counter,
+                    size=len(operands["data"]),
+                )
+
+    def _safe_image_info(self, image, reference, ctm, page_number, counter, size=None) -> PdfImageInfo | PdfReadError:
+        """Like _image_info, but report the images that cannot be read."""
+        num = next(counter)
+        try:
+            return self._image_info(image, reference, ctm, page_number, num, size=size)
+        except Exception as e:
+            logger.warning("Cannot read image %s on page %s: %s", num, page_number, e)
+            return PdfReadError(page=page_number, message=f"Cannot read image {num}: {e}")
+
+    @staticmethod
+    def _image_info(image, reference, ctm, page_number, num, size=None) -> PdfImageInfo:
+        width = int(image.get("/Width", 0))
+        height = int(image.get("/Height", 0))
+        bpc = int(image.get("/BitsPerComponent", 1))
+        if image.get("/ImageMask"):
+            color, comp = "-", 1
+        else:
+            color, comp = color_space(image.get("/ColorSpace"))
+        filters = image.get("/Filter")
+        filters = filters.get_object() if filters is not None else []
+        if not isinstance(filters, list):
+            filters = [filters]
+        enc = ENCODINGS.get(str(filters[-1]), "image") if filters else "image"
+        if size is None:
+            size = int(image.get("/Length", 0))
+        raw_size = width * height * comp * bpc / 8
+        if isinstance(reference, IndirectObject):
+            pdfobject, pdfobjectid = str(reference.idnum), str(reference.generation)
+        else:
+            pdfobject, pdfobjectid = "[inline]", "-"
+        return PdfImageInfo(
+            page=page_number,
+            num=num,
+            objecttype="image",
+            width=width,
+            height=height,
+            color=color,
+            comp=str(comp),
+            bpc=str(bpc),
+            enc=enc,
+            interp="yes" if image.get("/Interpolate") else "no",
+            pdfobject=pdfobject,
+            pdfobjectid=pdfobjectid,
+            x_ppi=effective_ppi(width, ctm, 0),
+            y_ppi=effective_ppi(height, ctm, 1),
+            size=human_size(size),
+            ratio=f"{round(100 * size / raw_size)}%" if raw_size else "-",
+        )
+
+    def page_count(self, path: Path) -> int:
+        with path.open("rb") as stream:
+            try:
+                return len(PdfReader(stream).pages)
+            except Exception as e:
+                logger.warning("Cannot find the number of pages of %s: %s", path, e)
+                return 0
+
+    def extract_pages(self, path: Path, pages: Iterable[int]) -> dict[int, str]:
+        texts = {}
+        with path.open("rb") as stream:
+            try:
+                reader = PdfReader(stream)
+                count = len(reader.pages)
+            except Exception as e:
+                logger.warning("Cannot extract the text of %s: %s", path, e)
+                return texts
+            for page in pages:
+                try:
+                    texts[page] = reader.pages[page - 1].extract_text() if 0 < page <= count else ""
+                except Exception as e:
+                    logger.warning("Cannot extract the text of page %s of %s: %s", page, path, e)
+                    texts[page] = ""
+        return texts
+
+    def page_sizes(self, path: Path) -> list[tuple[float, float]]:
+        with path.open("rb") as stream:
+            try:
+                # pypdf falls back to the crop box, and then to the media box
+                return [(float(page.trimbox.width), float(page.trimbox.height)) for page in PdfReader(stream).pages]
+            except Exception as e:
+                logger.warning("Cannot read the pages of %s: %s", path, e)
+                return []
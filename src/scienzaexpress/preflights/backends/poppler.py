@@ -0,0 +1,119 @@
+"""Read PDFs with the poppler command line tools."""
+
+from collections.abc import Iterable
+from collections.abc import Iterator
+from pathlib import Path
+from scienzaexpress.preflights import pdftext
+from scienzaexpress.preflights.backends import PdfImageInfo
+from scienzaexpress.preflights.backends import PdfReadError
+from scienzaexpress.preflights.interfaces import IPdfBackend
+from zope.interface import implementer
+
+import dataclasses
+import re
+import subprocess  # noqa: S404
+import tempfile
+
+
+# e.g. "Page    1 TrimBox:      0.00     0.00   595.28   841.89"
+TRIM_BOX = re.compile(r"^Page\s+(\d+)\s+TrimBox:\s+(\S+)\s+(\S+)\s+(\S+)\s+(\S+)", re.MULTILINE)
+
+# e.g. "Syntax Error (1234): Bad block header" (warnings are ignored)
+ERROR = re.compile(r"^[\w/ ]*Error(?: \(\d+\))?: .*$", re.MULTILINE)
+
+
+def parse_trim_boxes(output: str) -> list[tuple[float, float]]:
+    """Parse the output of pdfinfo -box (with -f and -l) into page sizes."""
+    sizes = {}
+    for match in TRIM_BOX.finditer(output):
+        x0, y0, x1, y1 = (float(value) for value in match.groups()[1:])
+        sizes[int(match[1])] = (abs(x1 - x0), abs(y1 - y0))
+    return [sizes[page] for page in sorted(sizes)]
+
+
+def parse_errors(output: str) -> list[PdfReadError]:
+    """Parse the errors printed by the poppler tools on stderr."""
+    return [PdfReadError(page=None, message=match[0]) for match in ERROR.finditer(output)]
+
+
+def parse_line(line: str) -> PdfImageInfo | None:
+    """Parse one line of the output of pdfimages -list."""
+    parts = line.split()
+    if len(parts) != len(dataclasses.fields(PdfImageInfo)):
+        return None
+    return PdfImageInfo(
+        page=int(parts[0]),
+        num=int(parts[1]),
+        objecttype=parts[2],
+        width=int(parts[3]),
+        height=int(parts[4]),
+        color=parts[5],
+        comp=parts[6],
+        bpc=parts[7],
+        enc=parts[8],
+        interp=parts[9],
+        pdfobject=parts[10],
+        pdfobjectid=parts[11],
+        x_ppi=int(parts[12]),
+        y_ppi=int(parts[13]),
+        size=parts[14],
+        ratio=parts[15],
+    )
+
+
+@implementer(IPdfBackend)
+class PopplerBackend:
+    """Run pdfimages, pdftotext and pdfinfo."""
+
+    title = "Poppler (pdfimages, pdftotext)"
+
+    def iter_images(self, path: Path) -> Iterator[PdfImageInfo | PdfReadError]:
+        """
+        Run pdfimages on a file and yield the images as they are listed.
+
+        The errors printed by pdfimages are yielded at the end, as is a
+        failure of pdfimages itself. When the generator is closed early,
+        pdfimages is killed.
+        """
+        # stderr goes to a file: a pipe that nobody reads while we read
+        # stdout could fill up and block pdfimages.
+        with tempfile.TemporaryFile(mode="w+") as stderr:
+            proc = subprocess.Popen(
+                ["pdfimages", "-list", path],
+                stdout=subprocess.PIPE,
+                stderr=stderr,
+                text=True,
+            )
+            try:
+                # skip the header (two lines)
+                for line_number, line in enumerate(proc.stdout):
+                    if line_number < 2:
+                        continue
+                    if (pdfimageinfo := parse_line(line)) is not None:
+                        yield pdfimageinfo
+            finally:
+                if proc.poll() is None:
+                    proc.kill()
+                proc.stdout.close()
+                proc.wait()
+            stderr.seek(0)
+            errors = parse_errors(stderr.read())
+        yield from errors
+        if proc.returncode and not errors:
+            yield PdfReadError(page=None, message=f"pdfimages failed (exit status {proc.returncode})")
+
+    def page_count(self, path: Path) -> int:
+        return pdftext.page_count(path)
+
+    def extract_pages(self, path: Path, pages: Iterable[int]) -> dict[int, str]:
+        return pdftext.extract_pages(path, pages)
+
+    def page_sizes(self, path: Path) -> list[tuple[float, float]]:
+        # pdfinfo stops at the last page anyway
+        proc = subprocess.run(
+            ["pdfinfo", "-box", "-f", "1", "-l", str(2**31 - 1), path],
+            capture_output=True,
+            text=True,
+            check=False,
+        )
+        return parse_trim_boxes(proc.stdout)
@@ -0,0 +1,117 @@
+"""
+Give external tools (poppler & co.) a path to the content of a File.
+
+Committed blobs already live on the filesystem (in blobstorage, or in the
+local blob cache of a ZEO client), so we just hand out that path: no data
+is loaded into memory and nothing is written to disk.
+
+Only when the blob has no committed file (e.g. it was uploaded in the current
+transaction) we fall back to a chunked copy into a temporary file.
+
+The same goes for exporting files (see views/files_dumper.py): the committed
+blob file is cloned or copied by the kernel, never read into memory.
+"""
+
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from plone.dexterity.interfaces import IDexterityItem
+from ZODB.interfaces import BlobError
+
+import fcntl
+import os
+import shutil
+import tempfile
+
+
+CHUNK_SIZE = 1 << 20  # 1 MiB
+
+FICLONE = 0x40049409
+"""The Linux ioctl that makes a copy-on-write clone (reflink) of a file."""
+
+
+def committed_blob_path(file_obj: IDexterityItem) -> Path | None:
+    """Return the path of the committed blob file, if there is one."""
+    blob = getattr(file_obj.file, "_blob", None)
+    if blob is None or getattr(blob, "_p_jar", None) is None:
+        return None
+    try:
+        path = blob.committed()
+    except BlobError:
+        # uncommitted changes, or open readers/writers
+        return None
+    return Path(path)
+
+
+@contextmanager
+def blob_path(file_obj: IDexterityItem, suffix: str = ".pdf") -> Iterator[Path]:
+    """
+    Provide a (read-only!) filesystem path with the content of the file.
+
+    Use as a context manager: temporary copies (if any) are removed on exit.
+    """
+    if (path := committed_blob_path(file_obj)) is not None and path.exists():
+        yield path
+        return
+
+    with (
+        file_obj.file.open() as src,
+        tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp_file,
+    ):
+        shutil.copyfileobj(src, tmp_file, CHUNK_SIZE)
+        temp_path = Path(tmp_file.name)
+    try:
+        yield temp_path
+    finally:
+        temp_path.unlink(missing_ok=True)
+
+
+def _copy(source: Path, target: Path) -> None:
+    """
+    Copy a file without reading it into memory.
+
+    On filesystems that support it (btrfs, XFS, ...) the copy is a
+    copy-on-write clone, which shares the data but not the inode; otherwise
+    the kernel copies the data (shutil.copyfile uses sendfile).
+    """
+    with open(source, "rb") as src, open(target, "wb") as dst:
+        try:
+            fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+            return
+        except OSError:
+            # e.g. no reflinks on this filesystem, or another filesystem
+            pass
+    shutil.copyfile(source, target)
+
+
+def export_blob(file_obj: IDexterityItem, target: Path, *, link: bool = False) -> None:
+    """
+    Write the content of the file to `target`, with constant memory use.
+
+    The committed blob file is cloned or copied by the kernel (see _copy),
+    or the blob is copied in chunks if it has no committed file.
+
+    With `link`, the committed blob file is hard-linked instead, when
+    possible (i.e. when `target` is on the same filesystem as the
+    blobstorage): no data is copied at all. But the link *is* the blob file:
+    a consumer that makes it writable and changes it silently corrupts the
+    ZODB. So the link is left read-only, and `link` should only be used
+    for consumers that are known to never write to the exported files.
+    """
+    target.unlink(missing_ok=True)
+    if (path := committed_blob_path(file_obj)) is not None and path.exists():
+        if link:
+            try:
+                os.link(path, target)
+            except OSError:
+                # e.g. another filesystem (EXDEV), or no hard links there
+                pass
+            else:
+                # (committed blob files are read-only already)
+                os.chmod(target, 0o444)
+                return
+        _copy(path, target)
+        return
+
+    with file_obj.file.open() as src, open(target, "wb") as dst:
+        shutil.copyfileobj(src, dst, CHUNK_SIZE)
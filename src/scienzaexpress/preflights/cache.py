@@ -0,0 +1,100 @@
+"""
+Persistent cache for the results of the (expensive) PDF preflights.
+
+Results are stored in an annotation on the File object and are keyed by the
+identity of the blob (OID and serial) and by the parameters of the rules that
+produced them. When a new file is uploaded, the blob gets a new serial and any
+cached entry simply stops matching. We also drop all entries when the File is
+modified (see subscribers/pdf_cache.py).
+"""
+
+from persistent.mapping import PersistentMapping
+from plone.dexterity.interfaces import IDexterityItem
+from plone.protect.utils import safeWrite
+from ZODB.utils import oid_repr
+from ZODB.utils import z64
+from zope.annotation.interfaces import IAnnotations
+from zope.globalrequest import getRequest
+
+
+ANNOTATION_KEY = "scienzaexpress.preflights.cache"
+
+
+def blob_key(file_obj: IDexterityItem) -> str | None:
+    """
+    Return a string that identifies the current version of the file's blob.
+
+    Uncommitted blobs have no stable identity, so we return None and the
+    callers should not cache anything.
+    """
+    named_file = getattr(file_obj, "file", None)
+    blob = getattr(named_file, "_blob", None)
+    if blob is None:
+        return None
+    oid = getattr(blob, "_p_oid", None)
+    if oid is None:
+        return None
+    # Committed blobs are ghosts: their serial is known only after loading them.
+    blob._p_activate()
+    serial = blob._p_serial
+    if serial == z64:
+        return None
+    return f"{oid_repr(oid)}:{oid_repr(serial)}"
+
+
+def get_cached(file_obj: IDexterityItem, namespace: str, params: tuple):
+    """
+    Return what was cached for the given namespace and rule parameters.
+
+    Returns:
+        the cached value, or None if nothing valid is available.
+
+    """
+    key = blob_key(file_obj)
+    if key is None:
+        return None
+    storage = IAnnotations(file_obj).get(ANNOTATION_KEY)
+    if not storage or namespace not in storage:
+        return None
+    entry = storage[namespace]
+    if entry["blob"] != key or entry["params"] != params:
+        return None
+    return entry["value"]
+
+
+def set_cached(file_obj: IDexterityItem, namespace: str, params: tuple, value) -> None:
+    """
+    Store a value for the given namespace and rule parameters.
+
+    The value should be made of plain python types (tuples, strings, numbers...),
+    so that no class path gets pinned into the ZODB.
+
+    Only one entry per namespace is kept: a new blob or new rule parameters
+    replace the old entry.
+    """
+    key = blob_key(file_obj)
+    if key is None:
+        return
+    annotations = IAnnotations(file_obj)
+    storage = annotations.get(ANNOTATION_KEY)
+    if storage is None:
+        storage = annotations[ANNOTATION_KEY] = PersistentMapping()
+    storage[namespace] = {"blob": key, "params": params, "value": value}
+
+    # The cache is usually filled during a GET request: tell plone.protect
+    # that these writes are intended.
+    request = getRequest()
+    for obj in (file_obj, getattr(file_obj, "__annotations__", None), storage):
+        if obj is not None:
+            safeWrite(obj, request)
+
+
+def invalidate(file_obj: IDexterityItem, namespace: str | None = None) -> None:
+    """Drop the cached entries of a namespace, or all of them."""
+    annotations = IAnnotations(file_obj, None)
+    if annotations is None or ANNOTATION_KEY not in annotations:
+        return
+    if namespace is None:
+        del annotations[ANNOTATION_KEY]
+    else:
+        annotations[ANNOTATION_KEY].pop(namespace, None)
@@ -1,5 +1,7 @@
+from plone import api
 from plone.dexterity.content import Item
 from plone.supermodel import model
+from scienzaexpress.preflights.isbn import normalize_isbn
 from z3c.form.validator import SimpleFieldValidator
 from zope.interface import implementer
 from zope.interface import Invalid
@@ -18,12 +20,15 @@ class ValidateISBN(SimpleFieldValidator):
     Accept only ISBN-13 values starting with Scienza Express' 979-12-80068
     - ...                 979-12-80068-56-9
     - Raccontare il meteo 978-88-96973-04-2
+
+    The ISBN must not be used by other Metadata objects (this is a lookup
+    in the "isbn" index of the catalog).
     """
 
     def validate(self, value: str) -> None:
         super().validate(value)
 
-        isbn = value.replace("-", "").replace(" ", "")  # remove hyphens and spaces
+        isbn = normalize_isbn(value)
 
         if not re.fullmatch(r"\d{13}", isbn):
             msg = "L'ISBN dovrebbe avere 13 caratteri ed iniziare con 978 o 979."
@@ -40,8 +45,25 @@ class ValidateISBN(SimpleFieldValidator):
             msg = f"Gli ISBN di SE iniziano con {'o '.join(good_ones)}"
             raise Invalid(msg)
 
+        if duplicates := self._find_duplicates(isbn):
+            msg = f"L'ISBN è già usato da: {', '.join(brain.Title for brain in duplicates)}"
+            raise Invalid(msg)
+
         return True
 
+    def _find_duplicates(self, isbn: str) -> list:
+        """Return the other Metadata objects with this ISBN (also those the user cannot see)."""
+        catalog = api.portal.get_tool("portal_catalog")
+        # on the edit form the context is the object itself, on the add form its container
+        own_uid = (
+            api.content.get_uuid(self.context) if getattr(self.context, "portal_type", None) == "Metadata" else None
+        )
+        return [
+            brain
+            for brain in catalog.unrestrictedSearchResults(portal_type="Metadata", isbn=isbn)
+            if brain.UID != own_uid
+        ]
+
 
 class ValidateEven(SimpleFieldValidator):
     """
@@ -4,7 +4,7 @@ from zope.interface import Interface
 
 class ISEMetaSettings(Interface):
     """
-    List of typographies.
+    Settings of the preflights.
 
     See also profiles/defaults/registry/main.xml.
     """
@@ -17,3 +17,27 @@ class ISEMetaSettings(Interface):
         missing_value=[],
         default=[],
     )
+
+    max_concurrent_preflights = schema.Int(
+        title="Preflight contemporanei",
+        description=(
+            "Numero massimo di programmi esterni (pdfimages, pdftotext, ...)"
+            " eseguiti contemporaneamente da ciascun processo Zope."
+            " Il limite vale per processo: con più istanze il totale"
+            " è moltiplicato per il numero di istanze"
+        ),
+        required=True,
+        min=1,
+        default=2,
+    )
+
+    pdf_backend = schema.Choice(
+        title="Motore PDF",
+        description=(
+            "Come leggere immagini e testo dei PDF: con i programmi di poppler"
+            " (pdfimages, pdftotext) o direttamente in Python (pypdf)"
+        ),
+        required=True,
+        vocabulary="se_meta.pdf_backends",
+        default="poppler",
+    )
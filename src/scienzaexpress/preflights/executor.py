@@ -0,0 +1,69 @@
+"""
+Run the external tools of the preflights (poppler & co.) concurrently.
+
+All requests of a Zope process share the same pool of worker threads, so
+that editors running preflights at the same time cannot fork-bomb the host.
+The size of the pool is set in the registry (se_meta.max_concurrent_preflights).
+The limit holds per Zope process: a deployment with N instances can run up
+to N times as many tools. To bound the whole site, run the preflights through
+the job queue (see jobs.py) with a fixed number of workers.
+
+The functions run in the workers must not touch the ZODB: they get plain
+data (e.g. the path of a blob, see blobs.py) and return plain data.
+"""
+
+from collections.abc import Callable
+from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
+from plone import api
+
+import threading
+
+
+REGISTRY_RECORD = "se_meta.max_concurrent_preflights"
+DEFAULT_MAX_WORKERS = 2
+
+_lock = threading.Lock()
+_pool: ThreadPoolExecutor | None = None
+_pool_size: int | None = None
+
+
+def max_workers() -> int:
+    """Return the maximum number of concurrent workers."""
+    value = api.portal.get_registry_record(REGISTRY_RECORD, default=DEFAULT_MAX_WORKERS)
+    return max(1, value or DEFAULT_MAX_WORKERS)
+
+
+def _get_pool(size: int) -> ThreadPoolExecutor:
+    # Call with _lock held.
+    global _pool, _pool_size  # noqa: PLW0603
+    if _pool is None or _pool_size != size:
+        if _pool is not None:
+            # Work already submitted to the old pool still completes,
+            # but its threads exit instead of waiting for more.
+            _pool.shutdown(wait=False)
+        _pool = ThreadPoolExecutor(max_workers=size, thread_name_prefix="preflights")
+        _pool_size = size
+    return _pool
+
+
+def map_concurrently(func: Callable, *iterables: Iterable) -> list:
+    """
+    Like map(), but run in the shared pool.
+
+    Returns:
+        the results, in the same order as the arguments.
+
+    """
+    arguments = list(zip(*iterables, strict=True))
+    if not arguments:
+        return []
+    # Even a single call goes through the pool: many requests with one
+    # file each must not run more tools than the limit.
+    size = max_workers()
+    # Submit under the lock, so that a resize cannot shut the pool down
+    # between getting it and submitting to it.
+    with _lock:
+        pool = _get_pool(size)
+        futures = [pool.submit(func, *args) for args in arguments]
+    return [future.result() for future in futures]
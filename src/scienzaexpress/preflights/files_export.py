@@ -0,0 +1,203 @@
+"""
+Keep a folder on the filesystem in sync with the Files of a folder (see
+views/files_dumper.py).
+
+The export folder is a symbolic link to the current version of the export,
+in a hidden sibling folder (VERSIONS_SUFFIX). Next to each version, and so
+out of the folder the app reads, a manifest records the name, size and
+blob serial (i.e. the transaction that last changed the blob) of each file
+exported. If nothing changed, nothing is written at all. Otherwise a new
+version is staged: the files that did not change are hard-linked from the
+current version, the others are exported from the blobstorage (see
+blobs.export_blob); then the link is replaced with os.replace, atomically:
+the app sees either the old export or the new one, never a half-written
+one nor no export at all. The files that are gone are simply not staged.
+
+Concurrent exports of the same folder are serialized with a lock file. The
+previous version is kept until the next export, for the readers that are
+still using it.
+
+An export folder written before the versions existed (a plain folder) is
+moved among the versions the first time: only then, for an instant, there
+is no export at all.
+"""
+
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from plone.dexterity.interfaces import IDexterityItem
+from scienzaexpress.preflights.blobs import committed_blob_path
+from scienzaexpress.preflights.blobs import export_blob
+from ZODB.utils import tid_repr
+
+import dataclasses
+import fcntl
+import json
+import os
+import shutil
+import uuid
+
+
+VERSIONS_SUFFIX = ".versions"
+MANIFEST_SUFFIX = ".manifest.json"
+LOCK_SUFFIX = ".lock"
+
+
+@dataclasses.dataclass
+class SyncResult:
+    written: list[str] = dataclasses.field(default_factory=list)
+    """The names of the files exported from the blobstorage."""
+    kept: list[str] = dataclasses.field(default_factory=list)
+    """The names of the files that did not change."""
+    removed: list[str] = dataclasses.field(default_factory=list)
+    """The names of the files that are gone."""
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.written or self.removed)
+
+
+def file_entry(file_obj: IDexterityItem) -> dict:
+    """Return the manifest entry of a File: its size, and the serial of its blob (if committed)."""
+    serial = None
+    if committed_blob_path(file_obj) is not None:
+        serial = tid_repr(file_obj.file._blob._p_serial)
+    return {"size": file_obj.file.getSize(), "serial": serial}
+
+
+def versions_folder(folder: Path) -> Path:
+    return folder.parent / f".{folder.name}{VERSIONS_SUFFIX}"
+
+
+def manifest_path(version: Path) -> Path:
+    return version.with_name(version.name + MANIFEST_SUFFIX)
+
+
+def current_version(folder: Path) -> Path | None:
+    """Return the version the export folder links to (None for a plain folder, or no export)."""
+    if not folder.is_symlink():
+        return None
+    return folder.parent / os.readlink(folder)
+
+
+def read_manifest(folder: Path) -> dict[str, dict]:
+    version = current_version(folder)
+    if version is None:
+        return {}
+    try:
+        return json.loads(manifest_path(version).read_text())
+    except (OSError, ValueError):
+        return {}
+
+
+def _is_current(folder: Path, name: str, entry: dict, manifest: dict[str, dict]) -> bool:
+    """Tell whether the exported file matches the entry (uncommitted blobs never do)."""
+    if entry["serial"] is None or manifest.get(name) != entry:
+        return False
+    try:
+        return (folder / name).stat().st_size == entry["size"]
+    except OSError:
+        return False
+
+
+@contextmanager
+def _locked(folder: Path) -> Iterator[None]:
+    """Hold the lock of the exports of a folder (across processes too)."""
+    with open(folder.parent / f".{folder.name}{LOCK_SUFFIX}", "a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def sync(files: list[IDexterityItem], folder: Path) -> SyncResult:
+    """Export the Files to a folder, writing only what changed."""
+    entries = {}
+    for file_obj in files:
+        # as before, a file with the same name as an earlier one replaces it
+        entries[file_obj.file.filename or file_obj.getId()] = (file_obj, file_entry(file_obj))
+
+    folder.parent.mkdir(parents=True, exist_ok=True)
+    with _locked(folder):
+        manifest = read_manifest(folder)
+        result = SyncResult()
+        for name, (_file_obj, entry) in entries.items():
+            if _is_current(folder, name, entry, manifest):
+                result.kept.append(name)
+            else:
+                result.written.append(name)
+        result.removed = sorted(set(manifest) - set(entries))
+        if not result.changed and folder.is_dir():
+            return result
+
+        versions = versions_folder(folder)
+        versions.mkdir(exist_ok=True)
+        staging = versions / uuid.uuid4().hex
+        staging.mkdir()
+        kept = set(result.kept)
+        try:
+            for name, (file_obj, _entry) in entries.items():
+                if name in kept:
+                    try:
+                        os.link(folder / name, staging / name)
+                        continue
+                    except OSError:
+                        pass
+                export_blob(file_obj, staging / name)
+            manifest_path(staging).write_text(
+                json.dumps({name: entry for name, (_file_obj, entry) in entries.items()}, indent=1, sort_keys=True)
+            )
+            previous = _swap(staging, folder)
+        except BaseException:
+            # the swap failed: the export is still the previous one
+            shutil.rmtree(staging, ignore_errors=True)
+            manifest_path(staging).unlink(missing_ok=True)
+            raise
+        _remove_old_versions(versions, keep={staging.name, previous and previous.name})
+    return result
+
+
+def _swap(staging: Path, folder: Path) -> Path | None:
+    """
+    Point the export folder to the staged version.
+
+    Returns:
+        the previous version, if any.
+
+    """
+    previous = current_version(folder)
+    if folder.is_dir() and previous is None:
+        # an export written before the versions: make it a version
+        previous = staging.parent / f"legacy-{uuid.uuid4().hex}"
+        folder.rename(previous)
+        try:
+            _link(staging, folder)
+        except BaseException:
+            previous.rename(folder)
+            raise
+        return previous
+    _link(staging, folder)
+    return previous
+
+
+def _link(version: Path, folder: Path) -> None:
+    """Replace (atomically) the export folder with a link to a version."""
+    link = folder.parent / f".{folder.name}.link-{uuid.uuid4().hex}"
+    link.symlink_to(version.relative_to(folder.parent), target_is_directory=True)
+    try:
+        os.replace(link, folder)
+    except BaseException:
+        link.unlink(missing_ok=True)
+        raise
+
+
+def _remove_old_versions(versions: Path, keep: set[str | None]) -> None:
+    for path in versions.iterdir():
+        name = path.name.removesuffix(MANIFEST_SUFFIX)
+        if name in keep:
+            continue
+        if path.is_dir():
+            shutil.rmtree(path, ignore_errors=True)
+        else:
+            path.unlink(missing_ok=True)
@@ -0,0 +1,51 @@
+"""
+Index the fields of the Metadata objects.
+
+So that e.g. the titles of a collana, or the Metadata with a given ISBN,
+can be found without loading all Metadata objects.
+
+The Metadata objects are plain dexterity Items (the FTI does not use
+content.metadata.Metadata), and their schema cannot be imported while the
+ZCML is loaded: so the indexers are registered for all Items.
+"""
+
+from plone.dexterity.interfaces import IDexterityItem
+from plone.indexer import indexer
+from scienzaexpress.preflights.isbn import normalize_isbn
+
+import datetime
+
+
+def _field_value(obj, name: str):
+    if obj.portal_type != "Metadata":
+        raise AttributeError(name)
+    value = getattr(obj, name, None)
+    if not value:
+        # nothing to index
+        raise AttributeError(name)
+    return value
+
+
+@indexer(IDexterityItem)
+def isbn(obj) -> str:
+    return normalize_isbn(_field_value(obj, "isbn"))
+
+
+@indexer(IDexterityItem)
+def collana(obj) -> str:
+    return _field_value(obj, "collana").strip()
+
+
+@indexer(IDexterityItem)
+def collana_issn(obj) -> str:
+    return _field_value(obj, "collana_issn").strip().upper()
+
+
+@indexer(IDexterityItem)
+def data_pubblicazione(obj) -> datetime.date:
+    return _field_value(obj, "data_pubblicazione")
+
+
+@indexer(IDexterityItem)
+def tipografia(obj) -> str:
+    return _field_value(obj, "tipografia")
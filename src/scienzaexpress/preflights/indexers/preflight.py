@@ -0,0 +1,40 @@
+"""
+Index the summary of the last preflights of a folder.
+
+So that e.g. the folders with problems can be found from the catalog
+alone (see views/preflight_dashboard.py). The summaries are stored by the
+background jobs, which reindex the folder (see jobs.py).
+"""
+
+from DateTime import DateTime
+from plone.app.contenttypes.interfaces import IFolder
+from plone.indexer import indexer
+from scienzaexpress.preflights import jobs
+
+
+def _summary_value(obj, name: str):
+    summary = jobs.latest_summary(obj)
+    if summary is None or summary.get(name) is None:
+        # nothing to index
+        raise AttributeError(name)
+    return summary[name]
+
+
+@indexer(IFolder)
+def preflight_ok(obj) -> bool:
+    return _summary_value(obj, "ok")
+
+
+@indexer(IFolder)
+def preflight_checked(obj) -> DateTime:
+    return DateTime(_summary_value(obj, "checked"))
+
+
+@indexer(IFolder)
+def preflight_low_ppi_images(obj) -> int:
+    return _summary_value(obj, "low_ppi_images")
+
+
+@indexer(IFolder)
+def preflight_failed_metadata_checks(obj) -> int:
+    return _summary_value(obj, "failed_metadata_checks")
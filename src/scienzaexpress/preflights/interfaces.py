@@ -1,7 +1,75 @@
 """Module where all interfaces, events and exceptions live."""
 
+from zope.interface import Attribute
+from zope.interface import Interface
 from zope.publisher.interfaces.browser import IDefaultBrowserLayer
 
 
 class IBrowserLayer(IDefaultBrowserLayer):
     """Marker interface that defines a browser layer."""
+
+
+class IPdfBackend(Interface):
+    """
+    Something that reads the images and the text of PDF files.
+
+    Backends are registered as named utilities; the one in use is chosen in
+    the registry (se_meta.pdf_backend). They are used from worker threads
+    (see executor.py), so they must be thread-safe and must not touch the
+    ZODB: they only get the path of a PDF.
+    """
+
+    title = Attribute("A human-friendly name")
+
+    def iter_images(path):
+        """
+        Yield a PdfImageInfo for each image placed on the pages of the PDF.
+
+        The parts of the PDF that cannot be read (the whole file, a page, an
+        image) are not skipped silently: a PdfReadError is yielded for each.
+
+        Closing the generator early must stop the work in progress.
+        """
+
+    def page_count(path):
+        """Return the number of pages of the PDF (0 if the PDF is unreadable)."""
+
+    def extract_pages(path, pages):
+        """
+        Return a mapping page number -> text for the given pages.
+
+        Additional pages may be returned too.
+        """
+
+    def page_sizes(path):
+        """Return the width and height (in points) of the trim box of each page."""
+
+
+class IPreflightStage(Interface):
+    """
+    A check run on each PDF by the preflight pipeline (see pipeline.py).
+
+    Stages are registered as named utilities. The results are stored on the
+    File (see cache.py), so that a PDF is read only when it changes.
+    """
+
+    title = Attribute("A human-friendly name")
+
+    def load(file_obj, backend_name, options):
+        """Return what is stored for this file, or None."""
+
+    def is_complete(stored, options):
+        """Tell if what is stored is enough, or if compute() must run."""
+
+    def compute(backend, path, options, stored):
+        """
+        Compute the result for the PDF at `path`, using `backend`.
+
+        `stored` is what load() returned (None on refresh): stages may
+        complete it instead of starting from scratch.
+
+        Runs in a worker thread (see executor.py): do not touch the ZODB.
+        """
+
+    def save(file_obj, backend_name, options, result):
+        """Store the result for this file (if it is worth storing)."""
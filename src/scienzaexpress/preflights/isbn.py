@@ -0,0 +1,6 @@
+"""ISBN helpers."""
+
+
+def normalize_isbn(value: str) -> str:
+    """Remove hyphens and spaces from an ISBN (this form is indexed)."""
+    return value.replace("-", "").replace(" ", "")
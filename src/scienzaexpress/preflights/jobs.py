@@ -0,0 +1,330 @@
+"""
+Run preflights in the background.
+
+Preflighting a folder of print PDFs can take minutes: too long for a request.
+So the preflight views can enqueue a job (?async=1) instead, and return at
+once. The queue lives in the ZODB (in the annotations of the portal), and is
+consumed by a separate worker process (scripts/preflight_worker.py) that
+runs the same views, outside of the request threads of the web server.
+
+The results of the preflights are stored on the Files as usual (see
+pipeline.py), so when a job is done the views render at once; a summary of
+the last report of each kind is stored on the folder, and indexed in the
+catalog (see indexers/preflight.py).
+
+Jobs are committed as they progress, so their status can be polled (see
+views/preflight_jobs.py). Each commit refreshes the heartbeat of the job: a
+running job without a heartbeat for STALE_AFTER belongs to a worker that died
+(killed, restarted, ...). The next worker puts it back in the queue, or marks
+it as failed after MAX_ATTEMPTS; enqueue never reuses it.
+"""
+
+from BTrees.OOBTree import OOBTree
+from collections.abc import Callable
+from persistent import Persistent
+from persistent.mapping import PersistentMapping
+from plone import api
+from plone.protect.utils import safeWrite
+from scienzaexpress.preflights import logger
+from ZODB.POSException import ConflictError
+from zope.annotation.interfaces import IAnnotations
+from zope.component import getMultiAdapter
+from zope.globalrequest import getRequest
+
+import datetime
+import time
+import transaction
+import uuid
+
+
+ANNOTATION_KEY = "scienzaexpress.preflights.jobs"
+REPORTS_KEY = "scienzaexpress.preflights.reports"
+
+KINDS = ("pdf-preflight", "validate-pdf-metadata", "preflight-report")
+"""The preflight views that can run as jobs."""
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+KEEP_FINISHED = datetime.timedelta(days=7)
+"""Finished jobs are forgotten after this time."""
+
+STALE_AFTER = datetime.timedelta(minutes=30)
+"""Running jobs without a heartbeat for this long are considered dead."""
+
+MAX_ATTEMPTS = 3
+"""Stale jobs are run again up to this number of times, then marked as failed."""
+
+COUNTS = ("low_ppi_images", "read_errors", "failed_metadata_checks", "odd_page_files")
+"""The problems counted in the summaries of the reports."""
+
+CATALOG_INDEXES = (
+    "preflight_ok",
+    "preflight_checked",
+    "preflight_low_ppi_images",
+    "preflight_failed_metadata_checks",
+)
+"""The catalog indexes of the summaries of the reports of a folder."""
+
+
+def _now() -> datetime.datetime:
+    return datetime.datetime.now(datetime.UTC)
+
+
+class Job(Persistent):
+    """A preflight of a folder, to be run in the background."""
+
+    def __init__(self, folder, kind: str, refresh: bool, user: str | None):
+        self.id = uuid.uuid4().hex
+        self.path = folder.getPhysicalPath()
+        self.kind = kind
+        self.refresh = refresh
+        self.user = user
+        self.status = QUEUED
+        self.done = 0
+        self.total = None
+        self.error = None
+        self.created = _now()
+        self.started = None
+        self.heartbeat = None
+        self.attempts = 0
+        self.finished = None
+
+    def is_stale(self, now: datetime.datetime | None = None) -> bool:
+        """Tell whether the job is running, but its worker stopped beating."""
+        if self.status != RUNNING:
+            return False
+        last = self.heartbeat or self.started or self.created
+        return (now or _now()) - last > STALE_AFTER
+
+    def as_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "path": "/".join(self.path),
+            "kind": self.kind,
+            "status": self.status,
+            "done": self.done,
+            "total": self.total,
+            "error": self.error,
+            "created": self.created.isoformat(),
+            "started": self.started and self.started.isoformat(),
+            "heartbeat": self.heartbeat and self.heartbeat.isoformat(),
+            "finished": self.finished and self.finished.isoformat(),
+        }
+
+
+def _queue(portal) -> OOBTree:
+    annotations = IAnnotations(portal)
+    if ANNOTATION_KEY not in annotations:
+        annotations[ANNOTATION_KEY] = OOBTree()
+    return annotations[ANNOTATION_KEY]
+
+
+def enqueue(folder, kind: str, *, refresh: bool = False, reuse_running: bool = True) -> Job:
+    """
+    Ask for a preflight of a folder.
+
+    If the same preflight is already waiting (or running, if reuse_running),
+    that job is returned. A running job might not see the files added after
+    it started. Stale running jobs are never reused.
+    """
+    if kind not in KINDS:
+        raise ValueError(f"Unknown preflight {kind!r}")
+    portal = api.portal.get()
+    queue = _queue(portal)
+    path = folder.getPhysicalPath()
+    statuses = (QUEUED, RUNNING) if reuse_running else (QUEUED,)
+    for job in queue.values():
+        if job.path == path and job.kind == kind and job.status in statuses and not job.is_stale():
+            return job
+
+    user = None if api.user.is_anonymous() else api.user.get_current().getId()
+    job = Job(folder, kind, refresh, user)
+    queue[job.id] = job
+    # The views enqueue during GET requests
+    request = getRequest()
+    for obj in (portal, getattr(portal, "__annotations__", None), queue):
+        if obj is not None:
+            safeWrite(obj, request)
+    return job
+
+
+def get(job_id: str) -> Job | None:
+    return IAnnotations(api.portal.get()).get(ANNOTATION_KEY, {}).get(job_id)
+
+
+def reclaim_stale(portal) -> list[Job]:
+    """
+    Requeue the stale running jobs, or fail them after MAX_ATTEMPTS.
+
+    A stale job is failed also when the same preflight was enqueued again
+    meanwhile (enqueue does not reuse stale jobs), so it does not run twice.
+
+    Returns:
+        the reclaimed jobs.
+
+    """
+    queue = _queue(portal)
+    now = _now()
+    stale = [job for job in queue.values() if job.is_stale(now)]
+    for job in stale:
+        requeued = any(
+            other.path == job.path
+            and other.kind == job.kind
+            and other.status in (QUEUED, RUNNING)
+            and not other.is_stale(now)
+            for other in queue.values()
+        )
+        if requeued or job.attempts >= MAX_ATTEMPTS:
+            logger.warning("Preflight job %s is stale: giving up", job.id)
+            job.status = FAILED
+            job.error = "The worker running the job stopped"
+            job.finished = now
+        else:
+            logger.warning("Preflight job %s is stale: running it again", job.id)
+            job.status = QUEUED
+            job.started = None
+            job.heartbeat = None
+    return stale
+
+
+def claim_next(portal) -> Job | None:
+    """
+    Mark the oldest waiting job as running (and commit), and return it.
+
+    Stale running jobs are reclaimed first (see reclaim_stale).
+    """
+    if reclaim_stale(portal):
+        try:
+            transaction.commit()
+        except ConflictError:
+            # another worker is reclaiming them
+            transaction.abort()
+    queued = sorted(
+        (job for job in _queue(portal).values() if job.status == QUEUED),
+        key=lambda job: job.created,
+    )
+    for job in queued:
+        job.status = RUNNING
+        job.started = job.heartbeat = _now()
+        job.attempts += 1
+        try:
+            transaction.commit()
+        except ConflictError:
+            # someone else took it (or changed the queue): try the next one
+            transaction.abort()
+            continue
+        return job
+    return None
+
+
+def _progress(job: Job) -> Callable[[int, int], None]:
+    def progress(done: int, total: int) -> None:
+        job.done, job.total = done, total
+        job.heartbeat = _now()
+        transaction.commit()
+
+    return progress
+
+
+def run(portal, job: Job, request) -> None:
+    """Run a (claimed) job; commit its results and its final status."""
+    try:
+        folder = portal.unrestrictedTraverse(job.path)
+        user = api.user.get(userid=job.user) if job.user else None
+        # run with the permissions of who asked for the preflight
+        with api.env.adopt_user(user=user) if user is not None else api.env.adopt_roles(["Anonymous"]):
+            view = getMultiAdapter((folder, request), name=job.kind)
+            view.run_checks(refresh=job.refresh, progress=_progress(job))
+            store_report(folder, job, view)
+    except ConflictError:
+        # try again later
+        transaction.abort()
+        job.status = QUEUED
+        job.started = job.heartbeat = None
+        # a conflict is not the fault of the job
+        job.attempts -= 1
+        transaction.commit()
+        return
+    except Exception as e:
+        logger.exception("Preflight job %s failed", job.id)
+        transaction.abort()
+        job.status = FAILED
+        job.error = str(e)
+    else:
+        job.status = DONE
+    job.finished = _now()
+    transaction.commit()
+
+
+def store_report(folder, job: Job, view) -> None:
+    """Store on the folder the summary of the last report of this kind."""
+    annotations = IAnnotations(folder)
+    if REPORTS_KEY not in annotations:
+        annotations[REPORTS_KEY] = PersistentMapping()
+    annotations[REPORTS_KEY][job.kind] = {
+        "job": job.id,
+        "finished": _now(),
+        "files": len(view.results),
+        "problems": view.count_problems(),
+        **view.report_counts(),
+    }
+    folder.reindexObject(idxs=list(CATALOG_INDEXES))
+
+
+def get_report(folder, kind: str) -> dict | None:
+    """Return the summary of the last report of this kind run in the background."""
+    return IAnnotations(folder).get(REPORTS_KEY, {}).get(kind)
+
+
+def latest_summary(folder) -> dict | None:
+    """
+    Merge the summaries of the last reports of all kinds.
+
+    Each count comes from the most recent report that has it (e.g. a newer
+    @@pdf-preflight overrides the images of an older @@preflight-report).
+    The folder is "ok" if none of the checks that were run found problems.
+
+    Returns:
+        the time of the last check, the counts and "ok"; or None if no
+        report was ever stored.
+
+    """
+    reports = sorted(
+        IAnnotations(folder).get(REPORTS_KEY, {}).values(),
+        key=lambda report: report["finished"],
+    )
+    if not reports:
+        return None
+    summary = {"checked": reports[-1]["finished"]}
+    for report in reports:
+        summary.update((name, report[name]) for name in COUNTS if name in report)
+    summary["ok"] = not any(summary.get(name) for name in COUNTS)
+    return summary
+
+
+def purge(portal) -> None:
+    """Forget old finished jobs."""
+    queue = _queue(portal)
+    threshold = _now() - KEEP_FINISHED
+    for job_id, job in list(queue.items()):
+        if job.finished is not None and job.finished < threshold:
+            del queue[job_id]
+
+
+def work(portal, request, *, poll_interval: float = 5, once: bool = False) -> None:
+    """Run the jobs, as they arrive (see scripts/preflight_worker.py)."""
+    while True:
+        portal._p_jar.sync()
+        job = claim_next(portal)
+        if job is not None:
+            logger.info("Running preflight job %s (%s on %s)", job.id, job.kind, "/".join(job.path))
+            run(portal, job, request)
+            continue
+        purge(portal)
+        transaction.commit()
+        if once:
+            return
+        time.sleep(poll_interval)
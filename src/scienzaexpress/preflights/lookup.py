@@ -0,0 +1,124 @@
+"""
+Find the Metadata object that governs a folder.
+
+We look for a Metadata object inside a folder named "XML", walking back from
+the current folder up to the site root, and descending into all folders.
+Near the site root this means catalog queries over big subtrees, so:
+
+- the result of the walk (the path of the Metadata object) is kept in a RAM
+  cache, keyed by the folder's path and by a site-wide token;
+- the token is changed whenever Metadata objects or "XML" folders are added,
+  moved, renamed or removed, and whenever any folder is moved, renamed or
+  removed (see subscribers/metadata_lookup.py); this invalidates the cache of
+  all ZEO clients at once;
+- the objects found are also memoized on the request.
+"""
+
+from plone import api
+from plone.api.exc import CannotGetPortalError
+from plone.dexterity.interfaces import IDexterityItem
+from plone.memoize import ram
+from plone.protect.utils import safeWrite
+from Products.CMFCore.interfaces import ISiteRoot
+from zope.annotation.interfaces import IAnnotations
+from zope.globalrequest import getRequest
+
+import uuid
+
+
+ANNOTATION_KEY = "scienzaexpress.preflights.metadata_lookup"
+REQUEST_KEY = "scienzaexpress.preflights.metadata_lookup"
+
+
+def _token() -> str | None:
+    """Return the current site-wide token of the lookup cache."""
+    return IAnnotations(api.portal.get()).get(ANNOTATION_KEY)
+
+
+def invalidate() -> None:
+    """Forget all cached lookups (of all processes)."""
+    try:
+        portal = api.portal.get()
+    except CannotGetPortalError:
+        return
+    annotations = IAnnotations(portal)
+    # A fresh random token (not a counter): tokens from aborted
+    # transactions are never reused.
+    annotations[ANNOTATION_KEY] = uuid.uuid4().hex
+
+    request = getRequest()
+    # Some of our views create content during GET requests
+    for obj in (portal, getattr(portal, "__annotations__", None)):
+        if obj is not None:
+            safeWrite(obj, request)
+    if request is not None:
+        IAnnotations(request).pop(REQUEST_KEY, None)
+
+
+def walk(context) -> IDexterityItem | None:
+    """
+    Find the Metadata object, without any cache.
+
+    The first such object that we find "wins".
+    """
+    # TODO: should we just drop the constraint about having a container folder named "XML"?
+    catalog = api.portal.get_tool("portal_catalog")
+    xml_folder = None
+    for parent in context.aq_chain:
+        if xml_folder := parent.get("XML", None):
+            break
+        if ISiteRoot.providedBy(parent):
+            break
+        path = "/".join(parent.getPhysicalPath())
+        results = catalog(
+            portal_type="Folder",
+            id="XML",
+            path={"query": path},
+        )
+        if results:
+            xml_folder = results[0].getObject()
+            break
+
+    if not xml_folder:
+        return None
+
+    metadata_objects = xml_folder.listFolderContents(
+        # NB: use the human-friendly type name (with the space in name)!
+        contentFilter={"portal_type": "Metadata"},
+    )
+    if len(metadata_objects) > 1:
+        # TODO: issue a warning!
+        metadata_object = metadata_objects[0]
+    elif len(metadata_objects) == 0:
+        # let callee deal with this problem 😈
+        return None
+    else:
+        metadata_object = metadata_objects[0]
+
+    return metadata_object
+
+
+def _metadata_path_cache_key(fun, context):
+    return (_token(), context.getPhysicalPath())
+
+
+@ram.cache(_metadata_path_cache_key)
+def _metadata_path(context) -> tuple[str, ...] | None:
+    metadata_object = walk(context)
+    if metadata_object is None:
+        return None
+    return metadata_object.getPhysicalPath()
+
+
+def find_metadata_object(context) -> IDexterityItem | None:
+    """Find the Metadata object related to this folder (cached)."""
+    request = getRequest()
+    memo = {}
+    if request is not None:
+        memo = IAnnotations(request).setdefault(REQUEST_KEY, {})
+
+    key = context.getPhysicalPath()
+    if key not in memo:
+        path = _metadata_path(context)
+        memo[key] = None if path is None else context.unrestrictedTraverse(path, None)
+    return memo[key]
@@ -0,0 +1,165 @@
+"""
+Find many strings in the text of a PDF page, tolerating typographic noise.
+
+The text extracted from a PDF is rarely identical to what the editors type
+into a Metadata object: ligatures, curly quotes, hyphenation and line breaks
+get in the way. Both the page text and the targets are normalized with
+normalize(), then all targets are searched in one pass with an Aho-Corasick
+automaton (see MultiMatcher).
+"""
+
+from collections import deque
+from collections.abc import Iterable
+from collections.abc import Iterator
+
+import dataclasses
+import re
+
+
+LIGATURES = {
+    "ﬀ": "ff",
+    "ﬁ": "fi",
+    "ﬂ": "fl",
+    "ﬃ": "ffi",
+    "ﬄ": "ffl",
+    "ﬅ": "st",
+    "ﬆ": "st",
+}
+
+QUOTES = {
+    "‘": "'",
+    "’": "'",
+    "‚": "'",
+    "‛": "'",
+    "′": "'",
+    "“": '"',
+    "”": '"',
+    "„": '"',
+    "‟": '"',
+    "″": '"',
+}
+
+REPLACEMENTS = LIGATURES | QUOTES
+
+SOFT_HYPHEN = "\u00ad"
+
+# A letter, a hyphen at the end of the line and a letter on the next line:
+# "tipo-\ngrafia" is "tipografia". Digits are left alone, so that e.g.
+# ISBNs broken on two lines keep their hyphens.
+END_OF_LINE_HYPHENATION = re.compile(r"(?<=[^\W\d_])-[^\S\n]*\n\s*(?=[^\W\d_])")
+
+# Whitespace next to a hyphen between digits: "979-12-\n80068-56-9" is
+# "979-12-80068-56-9" (e.g. an ISBN broken on two lines).
+HYPHENATED_DIGITS_SPACE = re.compile(r"(?<=\d-)\s+(?=\d)|(?<=\d)\s+(?=-\d)")
+
+
+@dataclasses.dataclass(frozen=True)
+class NormalizedText:
+    """A normalized text, with a reference to the original one."""
+
+    text: str
+    positions: tuple[int, ...]
+    """For each character of the normalized text, its index in the original text."""
+
+    def original_offset(self, offset: int) -> int:
+        """Map an offset in the normalized text to the original text."""
+        if offset < len(self.positions):
+            return self.positions[offset]
+        return self.positions[-1] + 1 if self.positions else 0
+
+
+def normalize(text: str) -> NormalizedText:
+    """
+    Normalize a text for matching.
+
+    - drop soft hyphens and join words hyphenated at the end of a line
+    - drop whitespace next to hyphens between digits (e.g. in ISBNs)
+    - expand typographic ligatures and straighten curly quotes
+    - casefold
+    - collapse all whitespace into a single space and strip it
+    """
+    skip = bytearray(len(text))
+    for pattern in (END_OF_LINE_HYPHENATION, HYPHENATED_DIGITS_SPACE):
+        for match in pattern.finditer(text):
+            skip[match.start() : match.end()] = b"\x01" * (match.end() - match.start())
+
+    chars = []
+    positions = []
+    pending_space = None
+    for i, char in enumerate(text):
+        if skip[i] or char == SOFT_HYPHEN:
+            continue
+        if char.isspace():
+            if chars and pending_space is None:
+                pending_space = i
+            continue
+        if pending_space is not None:
+            chars.append(" ")
+            positions.append(pending_space)
+            pending_space = None
+        for normalized_char in REPLACEMENTS.get(char, char).casefold():
+            chars.append(normalized_char)
+            positions.append(i)
+
+    return NormalizedText(text="".join(chars), positions=tuple(positions))
+
+
+class MultiMatcher:
+    """
+    Find all occurrences of a set of patterns in a single pass over a text.
+
+    Implements the Aho-Corasick automaton. Patterns and texts are used as
+    given: normalize them beforehand.
+    """
+
+    def __init__(self, patterns: Iterable[str]):
+        self.patterns = tuple(dict.fromkeys(p for p in patterns if p))
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._output: list[tuple[str, ...]] = [()]
+        for pattern in self.patterns:
+            self._add(pattern)
+        self._link()
+
+    def _add(self, pattern: str) -> None:
+        state = 0
+        for char in pattern:
+            if char not in self._goto[state]:
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(())
+                self._goto[state][char] = len(self._goto) - 1
+            state = self._goto[state][char]
+        self._output[state] += (pattern,)
+
+    def _link(self) -> None:
+        """Compute the failure links, breadth first."""
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(char, 0)
+                self._output[next_state] += self._output[self._fail[next_state]]
+
+    def finditer(self, text: str) -> Iterator[tuple[str, int]]:
+        """Yield (pattern, start offset) for each occurrence of the patterns."""
+        state = 0
+        for i, char in enumerate(text):
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            for pattern in self._output[state]:
+                yield pattern, i - len(pattern) + 1
+
+    def search(self, text: str) -> dict[str, int]:
+        """Return the offset of the first occurrence of each pattern found in the text."""
+        found = {}
+        for pattern, offset in self.finditer(text):
+            found.setdefault(pattern, offset)
+            if len(found) == len(self.patterns):
+                break
+        return found
@@ -0,0 +1,216 @@
+"""
+The whole catalogue as a single ONIX 3.1 message.
+
+The Metadata objects are found through the catalog and the message is
+streamed with lxml.etree.xmlfile: each Product is built, written out and
+forgotten before the next one, and each Metadata object is turned back into
+a ghost after use. So memory use does not grow with the number of titles.
+
+A delta feed has only the titles created, modified or removed since a given
+time (by default, since the last delta export of the same folder: its
+"watermark"), each with the NotificationType (ONIX List 1) that tells the
+recipients what to do with it.
+"""
+
+from Acquisition import aq_base
+from BTrees.OOBTree import OOBTree
+from collections.abc import Iterable
+from collections.abc import Iterator
+from DateTime import DateTime
+from lxml import etree
+from persistent.mapping import PersistentMapping
+from plone import api
+from plone.dexterity.interfaces import IDexterityItem
+from plone.protect.utils import safeWrite
+from scienzaexpress.preflights import logger
+from scienzaexpress.preflights import onix_schema
+from scienzaexpress.preflights.views.onix_generator import book_metadata
+from scienzaexpress.preflights.views.onix_generator import generate_header
+from scienzaexpress.preflights.views.onix_generator import generate_product
+from scienzaexpress.preflights.views.onix_generator import generate_withdrawn_product
+from scienzaexpress.preflights.views.onix_generator import ONIX_NAMESPACE
+from zope.annotation.interfaces import IAnnotations
+from zope.globalrequest import getRequest
+
+import dataclasses
+import datetime
+
+
+# NotificationType (List 1)
+ADVANCE = "02"
+"""A new title, not yet published."""
+CONFIRMED = "03"
+"""A new (published) title, or any title in a full feed."""
+UPDATE = "04"
+"""A title modified since the last feed (all blocks are sent)."""
+DELETE = "05"
+"""A title withdrawn since the last feed."""
+
+WATERMARKS_KEY = "scienzaexpress.preflights.onix_feed.watermarks"
+"""When the last delta export of each folder started (in the portal annotations)."""
+WITHDRAWN_KEY = "scienzaexpress.preflights.onix_feed.withdrawn"
+"""(when, ISBN) -> where each withdrawn title was (in the portal annotations)."""
+
+
+@dataclasses.dataclass
+class FeedResult:
+    products: int = 0
+    """The number of Products written."""
+    withdrawn: int = 0
+    """The number of delete records written."""
+    skipped: list[tuple[str, list[str]]] = dataclasses.field(default_factory=list)
+    """The path of the Metadata objects that are not valid, and why."""
+    schema_errors: list[tuple[str, list[onix_schema.SchemaError]]] = dataclasses.field(default_factory=list)
+    """The ISBN of the Products written that are not valid wrt the ONIX XSD, and why."""
+
+
+def _now() -> datetime.datetime:
+    return datetime.datetime.now(datetime.UTC)
+
+
+def find_metadata(*, since: datetime.datetime | None = None, **query) -> Iterator[IDexterityItem]:
+    """Yield the Metadata objects (that the user can see, modified since `since`), one at a time."""
+    if since is not None:
+        query["modified"] = {"query": DateTime(since), "range": "min"}
+    for brain in api.content.find(portal_type="Metadata", sort_on="sortable_title", **query):
+        obj = brain.getObject()
+        yield obj
+        if not obj._p_changed:
+            aq_base(obj)._p_deactivate()
+
+
+def _notification_type(pmo: IDexterityItem, since: datetime.datetime | None) -> str:
+    if since is None:
+        return CONFIRMED
+    if pmo.created() < DateTime(since):
+        return UPDATE
+    if pmo.data_pubblicazione is not None and pmo.data_pubblicazione > datetime.date.today():
+        return ADVANCE
+    return CONFIRMED
+
+
+def write_feed(
+    output,
+    metadata_objects: Iterable[IDexterityItem],
+    *,
+    since: datetime.datetime | None = None,
+    withdrawn: Iterable[str] = (),
+) -> FeedResult:
+    """
+    Write an ONIX message with a Product for each Metadata object.
+
+    Args:
+        output: a file name, or anything with a write(bytes) method (e.g. a
+            file or an HTTP response);
+        metadata_objects: e.g. find_metadata();
+        since: for a delta feed, the time of the previous one: the titles
+            created before are sent as updates;
+        withdrawn: the ISBNs to send as delete records (see withdrawn_since).
+
+    Invalid Metadata objects are skipped (and logged). If the ONIX XSD is
+    available, each Product is validated wrt it on its own (the line numbers of the errors
+    refer to a message with just that Product); invalid Products are
+    written anyway, and logged.
+    """
+    result = FeedResult()
+    validating = onix_schema.get_schema() is not None
+    with etree.xmlfile(output, encoding="utf-8") as xf:
+        xf.write_declaration()
+        with xf.element("ONIXMessage", nsmap={None: ONIX_NAMESPACE}, release="3.1"):
+            header = generate_header()
+            xf.write(header)
+            sent = set()
+            for pmo in metadata_objects:
+                book_meta = book_metadata(pmo)
+                valid, reasons_failed = book_meta.validate()
+                if not valid:
+                    path = "/".join(pmo.getPhysicalPath())
+                    logger.warning("Skipped %s in the ONIX feed: %s", path, " ".join(reasons_failed))
+                    result.skipped.append((path, reasons_failed))
+                    continue
+                product = generate_product(
+                    book_meta,
+                    is_for_ISBN=False,
+                    notification_type=_notification_type(pmo, since),
+                )
+                if validating and (errors := onix_schema.validate_product(header, product)):
+                    logger.warning("Invalid ONIX product %s: %s", book_meta.isbn, "; ".join(map(str, errors)))
+                    result.schema_errors.append((book_meta.isbn, errors))
+                xf.write(product)
+                sent.add(book_meta.isbn)
+                result.products += 1
+            for isbn in withdrawn:
+                # e.g. a Metadata object removed and created again
+                if isbn not in sent:
+                    xf.write(generate_withdrawn_product(isbn))
+                    result.withdrawn += 1
+    return result
+
+
+def _portal_storage(key: str, factory):
+    portal = api.portal.get()
+    annotations = IAnnotations(portal)
+    if key not in annotations:
+        annotations[key] = factory()
+    storage = annotations[key]
+    # the watermark is recorded by the POSTs of external systems,
+    # which have no CSRF token
+    request = getRequest()
+    for obj in (portal, getattr(portal, "__annotations__", None), storage):
+        if obj is not None:
+            safeWrite(obj, request)
+    return storage
+
+
+def record_withdrawn(isbn: str, path: str) -> None:
+    """Remember that a title was withdrawn, for the next delta feeds."""
+    _portal_storage(WITHDRAWN_KEY, OOBTree)[(_now(), isbn)] = path
+
+
+def withdrawn_since(since: datetime.datetime, path: str) -> list[str]:
+    """Return the ISBNs withdrawn (from below `path`) since a given time."""
+    storage = IAnnotations(api.portal.get()).get(WITHDRAWN_KEY)
+    if storage is None:
+        return []
+    prefix = path.rstrip("/") + "/"
+    # the keys are sorted by time: only the entries since `since` are read
+    withdrawn = (isbn for (_, isbn), old_path in storage.items(min=(since,)) if old_path.startswith(prefix))
+    return list(dict.fromkeys(withdrawn))
+
+
+def get_watermark(path: str) -> datetime.datetime | None:
+    """Return when the last delta export of a folder started."""
+    return IAnnotations(api.portal.get()).get(WATERMARKS_KEY, {}).get(path)
+
+
+def export_delta(
+    output,
+    folder,
+    *,
+    since: datetime.datetime | None = None,
+    record: bool = False,
+) -> FeedResult:
+    """
+    Write a delta feed of the titles below a folder.
+
+    Without `since`, the titles changed since the last delta export are
+    written (all of them the first time). With `record`, the watermark is
+    moved forward when the export succeeds: only the exports that are
+    really delivered should record it. With `since`, the watermark is not
+    touched.
+    """
+    if record and since is not None:
+        raise ValueError("A delta export since a given date cannot move the watermark")
+    path = "/".join(folder.getPhysicalPath())
+    if since is None:
+        since = get_watermark(path)
+    started = _now()
+    result = write_feed(
+        output,
+        find_metadata(since=since, path=path),
+        since=since,
+        withdrawn=withdrawn_since(since, path) if since is not None else (),
+    )
+    if record:
+        _portal_storage(WATERMARKS_KEY, PersistentMapping)[path] = started
+    return result
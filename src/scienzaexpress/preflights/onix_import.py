@@ -0,0 +1,338 @@
+"""
+Read ONIX 3.x messages (e.g. from partners, or from legacy systems) into
+Metadata objects.
+
+The message is read with lxml.etree.iterparse: each Product is mapped onto
+the fields of a Metadata object as soon as it has been parsed, then it is
+cleared (with what came before it), so memory use does not grow with the
+size of the file. The Metadata objects are found by ISBN (in the catalog)
+and updated, or created; every `batch_size` Products a savepoint is made
+(or, from the console script, a commit), so the changed objects do not
+pile up in memory either.
+
+Only the reference tags (<Product>, not <product>) are understood, with or
+without the ONIX namespace. The mapping is the inverse of the one of
+views/onix_generator.py.
+"""
+
+from collections.abc import Iterator
+from lxml import etree
+from plone import api
+from plone.dexterity.interfaces import IDexterityItem
+from scienzaexpress.preflights import logger
+from scienzaexpress.preflights.isbn import normalize_isbn
+from zope.lifecycleevent import modified
+
+import dataclasses
+import datetime
+import transaction
+
+
+BATCH_SIZE = 100
+"""Make a savepoint (or commit) after this many Products."""
+
+ROLES = {
+    "A01": "autori",
+    "A12": "illustratori",
+    "B06": "traduttori",
+    "C04": "curatori",
+}
+"""The Metadata fields of the contributors, by ContributorRole (List 17)."""
+
+MEASURES = {
+    "01": "altezza",
+    "02": "larghezza",
+    "03": "spessore",
+}
+"""The Metadata fields of the measures, by MeasureType (List 48)."""
+
+MM_PER_UNIT = {"mm": 1, "cm": 10, "in": 25.4}
+"""MeasureUnitCode (List 50)."""
+
+FORMS = {
+    "BB": "BB - Copertina rigida",
+    "BC": "BC - Copertina flessibile",
+}
+"""The values of the "rilegatura" field, by ProductForm (List 150)."""
+
+ABSTRACT_TYPES = ("30", "03", "02")
+"""TextType (List 153) of the abstract, in order of preference: abstract, description, short description."""
+
+ORIGINAL_TITLE_TYPES = ("03", "16")
+"""TitleType (List 15) of the original title; 16 is what views/onix_generator.py writes."""
+
+THEMA_SCHEMES = ("93", "94", "95", "96", "97", "98", "99")
+"""SubjectSchemeIdentifier (List 27) of Thema subjects and qualifiers."""
+
+TAX_INCLUDED_PRICES = ("02", "04")
+"""PriceType (List 58) of the prices with VAT."""
+
+
+@dataclasses.dataclass
+class ImportResult:
+    created: list[str] = dataclasses.field(default_factory=list)
+    """The path of the Metadata objects created."""
+    updated: list[str] = dataclasses.field(default_factory=list)
+    """The path of the Metadata objects changed."""
+    unchanged: int = 0
+    """The number of Products that matched their Metadata object already."""
+    skipped: list[tuple[str, str]] = dataclasses.field(default_factory=list)
+    """The RecordReference of the Products not imported, and why."""
+
+
+def _text(element: etree.Element | None, path: str) -> str | None:
+    if element is None:
+        return None
+    value = element.findtext(path)
+    return value.strip() if value and value.strip() else None
+
+
+def _children(element: etree.Element | None, path: str) -> list[etree.Element]:
+    return [] if element is None else element.findall(path)
+
+
+def _date(element: etree.Element) -> datetime.date | None:
+    """Parse a Date (with the default dateformat: YYYYMMDD, also YYYYMM or YYYY)."""
+    value = (_text(element, "{*}Date") or "").replace("-", "")
+    for fmt in ("%Y%m%d", "%Y%m", "%Y"):
+        try:
+            return datetime.datetime.strptime(value, fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+def _title_fields(descriptive_detail: etree.Element) -> dict:
+    """The title, subtitle and original title."""
+    fields = {}
+    for title_detail in _children(descriptive_detail, "{*}TitleDetail"):
+        # views/onix_generator.py writes the original title in the same
+        # TitleDetail, so the TitleType of each TitleElement is the one before it
+        title_type = None
+        for child in title_detail:
+            if not isinstance(child.tag, str):
+                continue
+            name = etree.QName(child).localname
+            if name == "TitleType":
+                title_type = (child.text or "").strip()
+            elif name == "TitleElement" and _text(child, "{*}TitleElementLevel") in {None, "01"}:
+                text = _text(child, "{*}TitleText") or " ".join(
+                    filter(None, (_text(child, "{*}TitlePrefix"), _text(child, "{*}TitleWithoutPrefix")))
+                )
+                if title_type == "01" and "title" not in fields:
+                    fields["title"] = text
+                    if subtitle := _text(child, "{*}Subtitle"):
+                        fields["sottotitolo"] = subtitle
+                elif title_type in ORIGINAL_TITLE_TYPES and "titolo_originale" not in fields:
+                    fields["titolo_originale"] = text
+    return fields
+
+
+def _contributor_fields(descriptive_detail: etree.Element) -> dict:
+    """The contributors (separated by ";"), and the biographies of the authors (by ";;")."""
+    names = {field: [] for field in ROLES.values()}
+    bios = []
+    for contributor in _children(descriptive_detail, "{*}Contributor"):
+        field = ROLES.get(_text(contributor, "{*}ContributorRole"))
+        name = _text(contributor, "{*}PersonName") or " ".join(
+            filter(None, (_text(contributor, "{*}NamesBeforeKey"), _text(contributor, "{*}KeyNames")))
+        )
+        if field is None or not name:
+            continue
+        names[field].append(name)
+        if field == "autori":
+            bios.append(_text(contributor, "{*}BiographicalNote") or "")
+    fields = {field: ";".join(values) for field, values in names.items() if values}
+    if any(bios):
+        fields["biografie"] = ";;".join(bios)
+    return fields
+
+
+def _descriptive_fields(descriptive_detail: etree.Element) -> dict:  # noqa: C901
+    fields = {}
+    if form := FORMS.get(_text(descriptive_detail, "{*}ProductForm")):
+        fields["rilegatura"] = form
+
+    for measure in _children(descriptive_detail, "{*}Measure"):
+        field = MEASURES.get(_text(measure, "{*}MeasureType"))
+        factor = MM_PER_UNIT.get(_text(measure, "{*}MeasureUnitCode"))
+        try:
+            value = float(_text(measure, "{*}Measurement"))
+        except (TypeError, ValueError):
+            continue
+        if field and factor:
+            fields[field] = round(value * factor)
+
+    for collection in _children(descriptive_detail, "{*}Collection"):
+        if _text(collection, "{*}CollectionType") not in {None, "10"}:
+            continue
+        for collection_id in _children(collection, "{*}CollectionIdentifier"):
+            if _text(collection_id, "{*}CollectionIDType") == "02":
+                fields["collana_issn"] = _text(collection_id, "{*}IDValue")
+        for title_element in _children(collection, "{*}TitleDetail/{*}TitleElement"):
+            if _text(title_element, "{*}TitleElementLevel") == "02":
+                fields["collana"] = _text(title_element, "{*}TitleText")
+                if number := _text(title_element, "{*}PartNumber"):
+                    fields["collana_numero"] = number
+        break
+
+    fields.update(_title_fields(descriptive_detail))
+    fields.update(_contributor_fields(descriptive_detail))
+
+    if edition := _text(descriptive_detail, "{*}EditionNumber"):
+        fields["edizione"] = edition
+
+    for language in _children(descriptive_detail, "{*}Language"):
+        if _text(language, "{*}LanguageRole") == "02":
+            fields["lingua_originale"] = _text(language, "{*}LanguageCode")
+
+    for extent in _children(descriptive_detail, "{*}Extent"):
+        if _text(extent, "{*}ExtentUnit") == "03":
+            try:
+                fields["pagine"] = int(_text(extent, "{*}ExtentValue"))
+            except (TypeError, ValueError):
+                continue
+            break
+
+    thema = [
+        code
+        for subject in _children(descriptive_detail, "{*}Subject")
+        if _text(subject, "{*}SubjectSchemeIdentifier") in THEMA_SCHEMES and (code := _text(subject, "{*}SubjectCode"))
+    ]
+    if thema:
+        fields["classificazione"] = ";".join(thema)
+    return fields
+
+
+def product_fields(product: etree.Element) -> dict:
+    """Map a Product onto the fields of a Metadata object (only those found in the Product)."""
+    fields = {}
+    for product_id in _children(product, "{*}ProductIdentifier"):
+        if _text(product_id, "{*}ProductIDType") in {"15", "03"}:
+            fields["isbn"] = _text(product_id, "{*}IDValue")
+            break
+
+    if (descriptive_detail := product.find("{*}DescriptiveDetail")) is not None:
+        fields.update(_descriptive_fields(descriptive_detail))
+
+    texts = {
+        _text(text_content, "{*}TextType"): _text(text_content, "{*}Text")
+        for text_content in _children(product, "{*}CollateralDetail/{*}TextContent")
+    }
+    for text_type in ABSTRACT_TYPES:
+        if texts.get(text_type):
+            fields["abstract"] = texts[text_type]
+            break
+
+    publishing_detail = product.find("{*}PublishingDetail")
+    if city := _text(publishing_detail, "{*}CityOfPublication"):
+        fields["luogo_di_pubblicazione"] = city
+    for publishing_date in _children(publishing_detail, "{*}PublishingDate"):
+        if _text(publishing_date, "{*}PublishingDateRole") == "01":
+            fields["data_pubblicazione"] = _date(publishing_date)
+
+    for price in _children(product, "{*}ProductSupply/{*}SupplyDetail/{*}Price"):
+        if _text(price, "{*}PriceType") in TAX_INCLUDED_PRICES and _text(price, "{*}CurrencyCode") in {None, "EUR"}:
+            try:
+                fields["prezzo_con_iva"] = float(_text(price, "{*}PriceAmount"))
+            except (TypeError, ValueError):
+                continue
+            break
+
+    return {field: value for field, value in fields.items() if value is not None}
+
+
+def read_products(source) -> Iterator[tuple[str, str, dict]]:
+    """
+    Yield the RecordReference, the NotificationType and the fields of each Product.
+
+    Args:
+        source: a file name, or a file open in binary mode.
+    """
+    # the messages come from outside: never expand entities, nor fetch anything
+    products = etree.iterparse(
+        source,
+        events=("end",),
+        tag="{*}Product",
+        huge_tree=True,
+        resolve_entities=False,
+        no_network=True,
+    )
+    for _event, product in products:
+        yield (
+            _text(product, "{*}RecordReference") or "",
+            _text(product, "{*}NotificationType") or "",
+            product_fields(product),
+        )
+        # forget the Product, and the elements before it
+        product.clear(keep_tail=True)
+        while product.getprevious() is not None:
+            del product.getparent()[0]
+
+
+def find_by_isbn(isbn: str) -> IDexterityItem | None:
+    """Return the Metadata object with an ISBN (also if the user cannot see it)."""
+    catalog = api.portal.get_tool("portal_catalog")
+    brains = catalog.unrestrictedSearchResults(portal_type="Metadata", isbn=normalize_isbn(isbn))
+    return brains[0]._unrestrictedGetObject() if brains else None
+
+
+def _update(obj: IDexterityItem, fields: dict) -> bool:
+    """Set the fields that differ (except the ISBN); tell whether some did."""
+    changed = False
+    for name, value in fields.items():
+        if name == "isbn":
+            # the object was found by this ISBN (see find_by_isbn, which compares
+            # them normalized): keep it as the editors wrote it, e.g. with hyphens
+            continue
+        if getattr(obj, name, None) != value:
+            setattr(obj, name, value)
+            changed = True
+    if changed:
+        modified(obj)
+    return changed
+
+
+def import_products(source, container, *, batch_size: int = BATCH_SIZE, commit: bool = False) -> ImportResult:
+    """
+    Create or update a Metadata object for each Product of an ONIX message.
+
+    Args:
+        source: see read_products;
+        container: where the new Metadata objects are created (those that
+            exist already, with the same ISBN, are updated where they are);
+        batch_size: make a savepoint after this many Products;
+        commit: commit instead of making savepoints (for console scripts:
+            the Products imported are kept even if a later one fails).
+
+    Products without an ISBN, delete records (NotificationType 05), and
+    Products of Metadata objects that the user cannot modify, are skipped:
+    nothing is ever removed.
+    """
+    result = ImportResult()
+    for count, (reference, notification_type, fields) in enumerate(read_products(source), start=1):
+        if notification_type == "05":
+            result.skipped.append((reference, "Titolo ritirato (NotificationType 05): non importato."))
+        elif not fields.get("isbn"):
+            result.skipped.append((reference, "Manca l'ISBN."))
+        elif (obj := find_by_isbn(fields["isbn"])) is not None:
+            if not api.user.has_permission("Modify portal content", obj=obj):
+                result.skipped.append((reference, "Il titolo esiste già, ma non hai il permesso di modificarlo."))
+            elif _update(obj, fields):
+                result.updated.append("/".join(obj.getPhysicalPath()))
+            else:
+                result.unchanged += 1
+        else:
+            fields.setdefault("title", fields["isbn"])
+            obj = api.content.create(container=container, type="Metadata", **fields)
+            result.created.append("/".join(obj.getPhysicalPath()))
+
+        if count % batch_size == 0:
+            if commit:
+                transaction.commit()
+            else:
+                transaction.savepoint(optimistic=True)
+            logger.info("ONIX import: %d products read", count)
+    for reference, reason in result.skipped:
+        logger.warning("Skipped %s in the ONIX import: %s", reference, reason)
+    return result
@@ -0,0 +1,101 @@
+"""
+Validate the generated ONIX messages against the ONIX 3.1 reference XSD.
+
+Parsing and compiling the XSD takes seconds, so it is done once per
+process, the first time a message is validated (not at startup), and the
+compiled etree.XMLSchema is shared by all threads.
+
+The XSD files are not in the package yet (see schemas/README.md): until they
+are copied there, the messages are not validated and a warning is logged.
+"""
+
+from lxml import etree
+from pathlib import Path
+from scienzaexpress.preflights import logger
+
+import dataclasses
+import threading
+
+
+SCHEMA_DIR = Path(__file__).parent / "schemas"
+SCHEMA_FILE = "ONIX_BookProduct_3.1_reference.xsd"
+
+ONIX_NAMESPACE = "http://ns.editeur.org/onix/3.1/reference"
+
+_lock = threading.Lock()
+_schema: etree.XMLSchema | bool | None = None
+"""The compiled schema; False if it is not available; None if not loaded yet."""
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class SchemaError:
+    """Something wrong in an ONIX message."""
+
+    line: int
+    column: int
+    message: str
+
+    def __str__(self):
+        return f"riga {self.line}: {self.message}"
+
+
+def _load_schema() -> etree.XMLSchema | bool:
+    path = SCHEMA_DIR / SCHEMA_FILE
+    if not path.exists():
+        logger.warning("%s not found: the ONIX messages are not validated (see schemas/README.md)", path)
+        return False
+    # the reference schema includes the code lists (relative to its path)
+    return etree.XMLSchema(etree.parse(str(path)))
+
+
+def get_schema() -> etree.XMLSchema | None:
+    """Return the compiled schema (or None if the XSD is not available)."""
+    global _schema
+    if _schema is None:
+        with _lock:
+            if _schema is None:
+                _schema = _load_schema()
+    return _schema or None
+
+
+def serialize(root: etree.Element) -> bytes:
+    """Serialize a message as it is saved, so that the line numbers of the errors match."""
+    return etree.tostring(root, encoding="utf-8", xml_declaration=True, pretty_print=True)
+
+
+def validate(xml: bytes) -> list[SchemaError] | None:
+    """
+    Validate a serialized ONIX message.
+
+    Returns:
+        the errors (an empty list if the message is valid), or None if the
+        schema is not available.
+
+    """
+    schema = get_schema()
+    if schema is None:
+        return None
+    # (parsing again also puts the elements generated without a namespace
+    # in the ONIX one, as they are when the file is read)
+    root = etree.fromstring(xml)
+    if root.tag == f"{{{ONIX_NAMESPACE}}}ONIXISBNMessage":
+        # the message for the ISBN agency is an ONIX message under another name
+        root.tag = f"{{{ONIX_NAMESPACE}}}ONIXMessage"
+    # the error log belongs to the schema, which is shared by the threads
+    with _lock:
+        if schema.validate(root):
+            return []
+        return [SchemaError(error.line, error.column, error.message) for error in schema.error_log]
+
+
+def validate_product(header: etree.Element, product: etree.Element) -> list[SchemaError] | None:
+    """Validate a single Product (e.g. of a streamed feed), in a message of its own."""
+    root = etree.Element("ONIXMessage", attrib={"release": "3.1"}, nsmap={None: ONIX_NAMESPACE})
+    root.append(header)
+    root.append(product)
+    try:
+        return validate(serialize(root))
+    finally:
+        # give the elements back to the caller, as they were
+        root.remove(header)
+        root.remove(product)
@@ -0,0 +1,89 @@
+"""
+Extract the text of some pages of a PDF with as few poppler runs as possible.
+
+The pages that we need are grouped into ranges of consecutive pages, and each
+range is extracted by a single pdftotext run. Poppler terminates every page
+with a form feed, so the output is easily split back into pages.
+"""
+
+from collections.abc import Iterable
+from pathlib import Path
+from scienzaexpress.preflights import logger
+
+import subprocess  # noqa: S404
+
+
+FORM_FEED = "\f"
+
+MAX_GAP = 2
+"""Extract also up to this many unneeded pages, if this saves one pdftotext run."""
+
+
+def page_count(path: Path) -> int:
+    """
+    Return the number of pages of the PDF, as reported by pdfinfo.
+
+    Unreadable PDFs have 0 pages.
+    """
+    proc = subprocess.run(
+        ["pdfinfo", path],
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    for line in proc.stdout.splitlines():
+        key, _, value = line.partition(":")
+        if key == "Pages":
+            return int(value)
+    logger.warning("Cannot find the number of pages of %s: %s", path, proc.stderr.strip())
+    return 0
+
+
+def resolve_page(page: int, last_page: int) -> int:
+    """Resolve negative page numbers (-1 is the last page)."""
+    if page < 0:
+        return last_page + page + 1
+    return page
+
+
+def plan_ranges(pages: Iterable[int], max_gap: int = MAX_GAP) -> list[tuple[int, int]]:
+    """
+    Group page numbers into ranges (first, last) to be extracted in one go.
+
+    Pages must be already resolved (i.e. positive).
+    """
+    ranges = []
+    for page in sorted(set(pages)):
+        if ranges and page - ranges[-1][1] <= max_gap + 1:
+            ranges[-1] = (ranges[-1][0], page)
+        else:
+            ranges.append((page, page))
+    return ranges
+
+
+def extract_range(path: Path, first: int, last: int) -> dict[int, str]:
+    """Extract the text of the pages first...last (inclusive)."""
+    proc = subprocess.run(
+        ["pdftotext", "-f", str(first), "-l", str(last), path, "-"],
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    # TODO: do something with the stderr?
+    chunks = proc.stdout.split(FORM_FEED)
+    return {page: chunks[i] if i < len(chunks) else "" for i, page in enumerate(range(first, last + 1))}
+
+
+def extract_pages(path: Path, pages: Iterable[int]) -> dict[int, str]:
+    """
+    Extract the text of the given pages.
+
+    Returns:
+        a mapping page number -> text. Unneeded pages that were extracted
+        anyway (see MAX_GAP) are returned too.
+
+    """
+    texts = {}
+    for first, last in plan_ranges(pages):
+        texts.update(extract_range(path, first, last))
+    return texts
@@ -0,0 +1,99 @@
+"""
+Run several checks (stages) over the PDFs of a folder, reading each PDF once.
+
+A stage is a named IPreflightStage utility (see stages/). For each PDF,
+the stored results are used when complete; the stages that are left are
+run one after the other in a single worker task (see executor.py), on the
+same path of the blob (see blobs.py). So a full preflight of a book costs at
+most one pass over each PDF, and nothing at all when the PDFs did not change.
+"""
+
+from collections.abc import Callable
+from contextlib import ExitStack
+from pathlib import Path
+from plone.dexterity.interfaces import IDexterityItem
+from scienzaexpress.preflights import executor
+from scienzaexpress.preflights.backends import get_backend
+from scienzaexpress.preflights.blobs import blob_path
+from scienzaexpress.preflights.interfaces import IPdfBackend
+from scienzaexpress.preflights.interfaces import IPreflightStage
+from typing import Any
+from zope.component import getUtility
+
+
+def _compute(
+    backend: IPdfBackend,
+    path: Path,
+    stages: dict[str, tuple[IPreflightStage, Any, Any]],
+) -> dict[str, Any]:
+    """
+    Run some stages on one PDF.
+
+    Runs in a worker thread: do not touch the ZODB here.
+    """
+    return {name: stage.compute(backend, path, options, stored) for name, (stage, options, stored) in stages.items()}
+
+
+def run(
+    file_objs: list[IDexterityItem],
+    stages: dict[str, Any],
+    *,
+    refresh: bool = False,
+    progress: Callable[[int, int], None] | None = None,
+) -> list[dict[str, Any]]:
+    """
+    Run some stages on some PDFs.
+
+    Args:
+        file_objs: the PDF Files
+        stages: the names of the stages to run, with their options
+        refresh: ignore the stored results and compute everything again
+        progress: if given, the PDFs are processed a few at a time, and
+          this is called with the number of PDFs done and the total
+
+    Returns:
+        for each file, a mapping stage name -> result
+
+    """
+    backend_name, backend = get_backend()
+    utilities = {name: getUtility(IPreflightStage, name=name) for name in stages}
+
+    reports = []
+    todo = []
+    for i, file_obj in enumerate(file_objs):
+        report = {}
+        missing = {}
+        for name, stage in utilities.items():
+            options = stages[name]
+            stored = None if refresh else stage.load(file_obj, backend_name, options)
+            if stored is not None and stage.is_complete(stored, options):
+                report[name] = stored
+            else:
+                missing[name] = (stage, options, stored)
+        reports.append(report)
+        if missing:
+            todo.append((i, missing))
+
+    # Without progress reports, all PDFs go to the workers at once
+    chunk_size = executor.max_workers() if progress is not None else max(len(todo), 1)
+    for start in range(0, len(todo), chunk_size):
+        chunk = todo[start : start + chunk_size]
+        with ExitStack() as stack:
+            paths = [stack.enter_context(blob_path(file_objs[i])) for i, _ in chunk]
+            computed = executor.map_concurrently(
+                _compute,
+                [backend] * len(chunk),
+                paths,
+                [missing for _, missing in chunk],
+            )
+
+        for (i, missing), results in zip(chunk, computed, strict=True):
+            for name, result in results.items():
+                stage, options, _ = missing[name]
+                stage.save(file_objs[i], backend_name, options, result)
+                reports[i][name] = result
+        if progress is not None:
+            progress(len(file_objs) - len(todo) + start + len(chunk), len(file_objs))
+    if progress is not None and not todo:
+        progress(len(file_objs), len(file_objs))
+    return reports
@@ -0,0 +1 @@
+"""plone.restapi services."""
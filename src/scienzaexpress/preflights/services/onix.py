@@ -0,0 +1,80 @@
+"""
+The ONIX (or App-ready) XML of a folder, straight from its Metadata object.
+
+Unlike @@xml-generator-onix and @@xml-generator-app nothing is saved: the
+XML is returned. The ETag depends only on the Metadata object (its UID and
+modification time) and on onix_generator.GENERATOR_VERSION, so clients
+that send If-None-Match get a 304 without the XML being generated at all;
+and the XML is kept in a RAM cache, keyed by the ETag, so other clients
+get it without generating it again (its SentDateTime is the one of when
+it was generated).
+"""
+
+from plone import api
+from plone.dexterity.interfaces import IDexterityItem
+from plone.memoize import ram
+from plone.restapi.services import Service
+from scienzaexpress.preflights import onix_schema
+from scienzaexpress.preflights.views.onix_generator import book_metadata
+from scienzaexpress.preflights.views.onix_generator import generate_onix_message
+from scienzaexpress.preflights.views.onix_generator import GENERATOR_VERSION
+from scienzaexpress.preflights.views.validate_pdf_metadata import (
+    missing_metadata_message,
+)
+from scienzaexpress.preflights.views.validate_pdf_metadata import ValidatePdfMetadata
+
+import json
+
+
+@ram.cache(lambda func, etag, pmo, is_for_ISBN: etag)
+def _generate(etag: str, pmo: IDexterityItem, is_for_ISBN: bool) -> tuple[bool, bytes | list[str]]:  # noqa: N803
+    """Return the serialized XML (or why it cannot be generated)."""
+    book_meta = book_metadata(pmo)
+    valid, reasons_failed = book_meta.validate()
+    if not valid:
+        return (False, reasons_failed)
+    return (True, onix_schema.serialize(generate_onix_message(book_meta, is_for_ISBN=is_for_ISBN)))
+
+
+def etag_matches(etag: str, if_none_match: str) -> bool:
+    """Tell whether an If-None-Match header matches an ETag (weakly)."""
+    candidates = {candidate.strip().removeprefix("W/") for candidate in if_none_match.split(",")}
+    return "*" in candidates or etag in candidates
+
+
+class OnixGet(Service):
+    """ISBN-ready XML (i.e. non-app)."""
+
+    is_for_ISBN = True
+
+    def render(self):
+        self.check_permission()
+        response = self.request.response
+        pmo = ValidatePdfMetadata.find_metadata_object(self.context)
+        if pmo is None:
+            return self._error(404, "NotFound", missing_metadata_message)
+
+        kind = "isbn" if self.is_for_ISBN else "app"
+        etag = f'"{kind}-{GENERATOR_VERSION}-{api.content.get_uuid(pmo)}-{pmo.modified().millis()}"'
+        response.setHeader("ETag", etag)
+        response.setHeader("Cache-Control", "no-cache")
+        if etag_matches(etag, self.request.getHeader("If-None-Match", "")):
+            response.setStatus(304)
+            return b""
+
+        valid, other = _generate(etag, pmo, self.is_for_ISBN)
+        if not valid:
+            return self._error(400, "Invalid metadata", "\n".join(other))
+        response.setHeader("Content-Type", "application/xml; charset=utf-8")
+        return other
+
+    def _error(self, status: int, error_type: str, message: str) -> str:
+        self.request.response.setStatus(status)
+        self.request.response.setHeader("Content-Type", "application/json")
+        return json.dumps({"error": {"type": error_type, "message": message}})
+
+
+class OnixAppGet(OnixGet):
+    """App-ready XML."""
+
+    is_for_ISBN = False
@@ -1,7 +1,34 @@
+from plone import api
 from Products.CMFPlone.interfaces import INonInstallable
+from scienzaexpress.preflights import logger
 from zope.interface import implementer
 
 
+# The indexes are added here, and not in a profiles/default/catalog.xml:
+# importing catalog.xml again clears the DateIndexes it lists, and the
+# summaries of the preflights cannot be computed again from the content.
+PREFLIGHT_INDEXES = {
+    "preflight_ok": "BooleanIndex",
+    "preflight_checked": "DateIndex",
+    "preflight_low_ppi_images": "FieldIndex",
+    "preflight_failed_metadata_checks": "FieldIndex",
+}
+"""The summary of the last preflights of a folder (see indexers/preflight.py)."""
+
+PREFLIGHT_COLUMNS = tuple(PREFLIGHT_INDEXES)
+
+METADATA_INDEXES = {
+    "isbn": "FieldIndex",
+    "collana": "FieldIndex",
+    "collana_issn": "FieldIndex",
+    "data_pubblicazione": "DateIndex",
+    "tipografia": "FieldIndex",
+}
+"""The fields of the Metadata objects (see indexers/metadata.py)."""
+
+METADATA_COLUMNS = ("isbn", "collana", "data_pubblicazione")
+
+
 @implementer(INonInstallable)
 class HiddenProfiles:
     def getNonInstallableProfiles(self):
@@ -9,3 +36,33 @@ class HiddenProfiles:
         return [
             "scienzaexpress.preflights:uninstall",
         ]
+
+
+def add_catalog_indexes(indexes: dict[str, str], columns: tuple[str, ...] = ()) -> list[str]:
+    """
+    Add the missing catalog indexes (name: meta type) and index them.
+
+    Existing indexes are left alone. The missing metadata columns are added
+    too: they are filled when the objects are reindexed.
+
+    Returns:
+        the names of the indexes added.
+
+    """
+    catalog = api.portal.get_tool("portal_catalog")
+    added = [name for name in indexes if name not in catalog.indexes()]
+    for name in added:
+        catalog.addIndex(name, indexes[name])
+        logger.info("Added the %s %s to the catalog", indexes[name], name)
+    if added:
+        catalog.manage_reindexIndex(ids=added)
+    for name in columns:
+        if name not in catalog.schema():
+            catalog.addColumn(name)
+    return added
+
+
+def post_install(context):
+    """Post install script."""
+    add_catalog_indexes(PREFLIGHT_INDEXES, PREFLIGHT_COLUMNS)
+    add_catalog_indexes(METADATA_INDEXES, METADATA_COLUMNS)
@@ -0,0 +1,7 @@
+"""
+The checks run on each PDF by the preflight pipeline (see pipeline.py).
+
+- images: the resolution of the images
+- text: the text of the pages needed by the metadata checks
+- pages: the number of pages and their size
+"""
@@ -0,0 +1,133 @@
+"""The resolution of the images of a PDF."""
+
+from array import array
+from collections import Counter
+from pathlib import Path
+from plone.dexterity.interfaces import IDexterityItem
+from scienzaexpress.preflights import cache
+from scienzaexpress.preflights.backends import PdfImageInfo
+from scienzaexpress.preflights.backends import PdfReadError
+from scienzaexpress.preflights.interfaces import IPdfBackend
+from scienzaexpress.preflights.interfaces import IPreflightStage
+from zope.interface import implementer
+
+import dataclasses
+import statistics
+
+
+CACHE_NAMESPACE = "pdfimages"
+
+CACHE_FORMAT = 3
+"""Change this when the format of the cached results changes."""
+
+
+@dataclasses.dataclass(frozen=True)
+class ImagesOptions:
+    ppi_lowthreshold: int = 300
+    """Images with a lower resolution (on either axis) are reported as bad."""
+    max_failures: int | None = None
+    """Stop (e.g. kill pdfimages) as soon as this many bad images are found."""
+
+
+@dataclasses.dataclass(slots=True)
+class ImagesSummary:
+    """
+    The result of the check of the images of one PDF.
+
+    Only aggregates are kept for all images; the details are kept only for
+    the bad ones. There are no references to the File object.
+    """
+
+    count: int = 0
+    min_ppi: int | None = None
+    median_ppi: float | None = None
+    failures: list[PdfImageInfo] = dataclasses.field(default_factory=list)
+    errors: list[PdfReadError] = dataclasses.field(default_factory=list)
+    """The parts of the PDF that could not be read: their images are not counted."""
+    truncated: bool = False
+    """The scan was stopped early (see max_failures); aggregates are partial."""
+
+    @property
+    def good(self) -> bool:
+        return not self.failures and not self.errors
+
+    @property
+    def failures_by_page(self) -> dict[int, int]:
+        """Number of bad images on each page."""
+        return dict(sorted(Counter(info.page for info in self.failures).items()))
+
+
+@implementer(IPreflightStage)
+class ImagesStage:
+    """Check that all images have a sufficient resolution."""
+
+    title = "Risoluzione delle immagini"
+
+    @staticmethod
+    def _cache_params(backend_name: str, options: ImagesOptions) -> tuple:
+        return (options.ppi_lowthreshold, backend_name, CACHE_FORMAT)
+
+    def load(self, file_obj: IDexterityItem, backend_name: str, options: ImagesOptions) -> ImagesSummary | None:
+        value = cache.get_cached(file_obj, CACHE_NAMESPACE, self._cache_params(backend_name, options))
+        if value is None:
+            return None
+        count, min_ppi, median_ppi, failures, errors = value
+        return ImagesSummary(
+            count=count,
+            min_ppi=min_ppi,
+            median_ppi=median_ppi,
+            failures=[PdfImageInfo(*fields) for fields in failures],
+            errors=[PdfReadError(*fields) for fields in errors],
+        )
+
+    def is_complete(self, stored: ImagesSummary, options: ImagesOptions) -> bool:
+        return True
+
+    def compute(
+        self,
+        backend: IPdfBackend,
+        path: Path,
+        options: ImagesOptions,
+        stored: ImagesSummary | None,
+    ) -> ImagesSummary:
+        ppi_lowthreshold = options.ppi_lowthreshold
+        max_failures = options.max_failures
+        summary = ImagesSummary()
+        # the resolution of each image (the worse of the two axes)
+        ppis = array("L")
+        images = backend.iter_images(path)
+        try:
+            for pdfimageinfo in images:
+                if isinstance(pdfimageinfo, PdfReadError):
+                    summary.errors.append(pdfimageinfo)
+                    continue
+                ppi = min(pdfimageinfo.x_ppi, pdfimageinfo.y_ppi)
+                ppis.append(ppi)
+
+                # 🌟 The (only) interesting logic is here!
+                if ppi < ppi_lowthreshold:
+                    summary.failures.append(pdfimageinfo)
+                    if max_failures is not None and len(summary.failures) >= max_failures:
+                        summary.truncated = True
+                        break
+        finally:
+            images.close()
+
+        summary.count = len(ppis)
+        if ppis:
+            summary.min_ppi = min(ppis)
+            summary.median_ppi = statistics.median(ppis)
+        return summary
+
+    def save(self, file_obj: IDexterityItem, backend_name: str, options: ImagesOptions, result: ImagesSummary) -> None:
+        if result.truncated:
+            # partial results (quick check)
+            return
+        value = (
+            result.count,
+            result.min_ppi,
+            result.median_ppi,
+            tuple(dataclasses.astuple(info) for info in result.failures),
+            tuple(dataclasses.astuple(error) for error in result.errors),
+        )
+        cache.set_cached(file_obj, CACHE_NAMESPACE, self._cache_params(backend_name, options), value)
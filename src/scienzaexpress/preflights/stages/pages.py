@@ -0,0 +1,64 @@
+"""The number of pages of a PDF, and their (trim) size."""
+
+from collections import Counter
+from pathlib import Path
+from plone.dexterity.interfaces import IDexterityItem
+from scienzaexpress.preflights import cache
+from scienzaexpress.preflights.interfaces import IPdfBackend
+from scienzaexpress.preflights.interfaces import IPreflightStage
+from zope.interface import implementer
+
+import dataclasses
+
+
+CACHE_NAMESPACE = "pages"
+
+MM_PER_POINT = 25.4 / 72
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class PagesSummary:
+    """The pages of a PDF: how many, and how big."""
+
+    page_count: int = 0
+    sizes: tuple[tuple[tuple[float, float], int], ...] = ()
+    """The sizes of the pages (width and height in mm), most common first, with the number of pages."""
+    odd_pages: tuple[int, ...] = ()
+    """The pages whose size is not the most common one."""
+
+    @property
+    def good(self) -> bool:
+        return self.page_count > 0 and len(self.sizes) == 1
+
+
+@implementer(IPreflightStage)
+class PagesStage:
+    """Check that all pages have the same trim size."""
+
+    title = "Numero e formato delle pagine"
+
+    def load(self, file_obj: IDexterityItem, backend_name: str, options: None) -> PagesSummary | None:
+        value = cache.get_cached(file_obj, CACHE_NAMESPACE, (backend_name,))
+        return None if value is None else PagesSummary(*value)
+
+    def is_complete(self, stored: PagesSummary, options: None) -> bool:
+        return True
+
+    def compute(self, backend: IPdfBackend, path: Path, options: None, stored: PagesSummary | None) -> PagesSummary:
+        # round to 0.1 mm: producers express the same size in slightly different ways
+        sizes = [
+            (round(width * MM_PER_POINT, 1), round(height * MM_PER_POINT, 1))
+            for width, height in backend.page_sizes(path)
+        ]
+        counter = Counter(sizes)
+        if not counter:
+            return PagesSummary()
+        most_common = counter.most_common(1)[0][0]
+        return PagesSummary(
+            page_count=len(sizes),
+            sizes=tuple(counter.most_common()),
+            odd_pages=tuple(page for page, size in enumerate(sizes, start=1) if size != most_common),
+        )
+
+    def save(self, file_obj: IDexterityItem, backend_name: str, options: None, result: PagesSummary) -> None:
+        cache.set_cached(file_obj, CACHE_NAMESPACE, (backend_name,), dataclasses.astuple(result))
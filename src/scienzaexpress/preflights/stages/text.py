@@ -0,0 +1,50 @@
+"""The text of some pages of a PDF (see textstore.py)."""
+
+from collections.abc import Callable
+from collections.abc import Iterable
+from pathlib import Path
+from plone.dexterity.interfaces import IDexterityItem
+from scienzaexpress.preflights import textstore
+from scienzaexpress.preflights.interfaces import IPdfBackend
+from scienzaexpress.preflights.interfaces import IPreflightStage
+from zope.interface import implementer
+
+
+NeededPages = Callable[[int], Iterable[int]]
+"""Given the number of pages of a PDF, return the pages that we need."""
+
+PageTexts = tuple[int, dict[int, str]]
+"""The number of pages of a PDF and a mapping page number -> text."""
+
+
+@implementer(IPreflightStage)
+class TextStage:
+    """
+    Extract the text of the pages that we need.
+
+    The result is the number of pages and a mapping page number -> text.
+    """
+
+    title = "Testo delle pagine"
+
+    def load(self, file_obj: IDexterityItem, backend_name: str, options: NeededPages) -> PageTexts | None:
+        return textstore.load(file_obj, backend_name)
+
+    def is_complete(self, stored: PageTexts, options: NeededPages) -> bool:
+        last_page, texts = stored
+        return set(options(last_page)) <= texts.keys()
+
+    def compute(self, backend: IPdfBackend, path: Path, options: NeededPages, stored: PageTexts | None) -> PageTexts:
+        """Extract what is missing from the stored text (if any)."""
+        last_page, texts = stored if stored is not None else (backend.page_count(path), {})
+        missing = set(options(last_page)) - texts.keys()
+        return last_page, texts | backend.extract_pages(path, missing)
+
+    def save(
+        self,
+        file_obj: IDexterityItem,
+        backend_name: str,
+        options: NeededPages,
+        result: PageTexts,
+    ) -> None:
+        textstore.store(file_obj, backend_name, *result)
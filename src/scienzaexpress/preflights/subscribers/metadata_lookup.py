@@ -0,0 +1,19 @@
+from plone.dexterity.interfaces import IDexterityContainer
+from scienzaexpress.preflights import lookup
+from zope.lifecycleevent.interfaces import IObjectAddedEvent
+
+
+def invalidate_metadata_lookup(obj, event):
+    """
+    Forget where the Metadata objects are, when they might have moved.
+
+    Any move, rename or removal of a container changes the paths of the
+    cached lookups. A newly created container instead matters only if it is
+    an "XML" folder (copied containers fire this event also for their content).
+    """
+    if obj.portal_type == "Metadata":
+        lookup.invalidate()
+    elif IDexterityContainer.providedBy(obj):
+        if IObjectAddedEvent.providedBy(event) and obj.getId() != "XML":
+            return
+        lookup.invalidate()
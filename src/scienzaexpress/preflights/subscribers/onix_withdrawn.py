@@ -0,0 +1,14 @@
+from plone.api.exc import CannotGetPortalError
+from scienzaexpress.preflights import onix_feed
+
+
+def record_withdrawn_title(obj, event):
+    """Remember the ISBN of a removed Metadata object, for the delta ONIX feeds."""
+    if obj.portal_type != "Metadata" or not getattr(obj, "isbn", None):
+        return
+    path = "/".join((*event.oldParent.getPhysicalPath(), event.oldName))
+    try:
+        onix_feed.record_withdrawn(obj.isbn, path)
+    except CannotGetPortalError:
+        # the whole site is being removed
+        pass
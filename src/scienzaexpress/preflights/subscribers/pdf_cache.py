@@ -0,0 +1,6 @@
+from scienzaexpress.preflights import cache
+
+
+def invalidate_preflight_cache(obj, event):
+    """Forget any cached preflight result when a File is modified."""
+    cache.invalidate(obj)
@@ -0,0 +1,27 @@
+from Acquisition import aq_parent
+from plone.app.contenttypes.interfaces import IFolder
+from scienzaexpress.preflights import jobs
+
+
+PRECOMPUTE_KIND = "preflight-report"
+"""The job that runs all the stages (images, text and pages) of the folder."""
+
+
+def precompute_preflights(obj, event):
+    """
+    Preflight a PDF in the background as soon as it is uploaded or changed.
+
+    The job is stored in the same transaction, so the worker sees it only
+    after the commit, when the blob can be read. Its results are cached on
+    the File, so @@pdf-preflight and @@validate-pdf-metadata render at once.
+    Files that are already cached are skipped by the job.
+    """
+    named_file = getattr(obj, "file", None)
+    if named_file is None or named_file.contentType != "application/pdf":
+        return
+    folder = aq_parent(obj)
+    if not IFolder.providedBy(folder):
+        # the preflight views are only available on folders
+        return
+    # a running job might have listed the folder before this file was added
+    jobs.enqueue(folder, PRECOMPUTE_KIND, reuse_running=False)
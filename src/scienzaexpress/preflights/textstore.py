@@ -0,0 +1,86 @@
+"""
+Per-page text of a PDF File, extracted once per blob version.
+
+The text is extracted by the "text" stage of the pipeline (see
+stages/text.py) and stored compressed in the preflights cache of the File (see
+cache.py), so it is automatically forgotten when a new PDF is uploaded. Only
+the pages that someone asked for are extracted; pages requested later are
+added to the store.
+
+The text is extracted with the backend chosen in the registry (see
+backends/); the text extracted by another backend is not reused.
+"""
+
+from collections.abc import Callable
+from collections.abc import Iterable
+from plone.dexterity.interfaces import IDexterityItem
+from scienzaexpress.preflights import cache
+from scienzaexpress.preflights import pipeline
+
+import zlib
+
+
+CACHE_NAMESPACE = "pdftext"
+
+
+def _compress(texts: dict[int, str]) -> dict[int, bytes]:
+    return {page: zlib.compress(text.encode("utf-8")) for page, text in texts.items()}
+
+
+def _decompress(texts: dict[int, bytes]) -> dict[int, str]:
+    return {page: zlib.decompress(data).decode("utf-8") for page, data in texts.items()}
+
+
+def load(file_obj: IDexterityItem, backend_name: str) -> tuple[int, dict[int, str]] | None:
+    """Return the stored number of pages and texts of a PDF, if any."""
+    stored = cache.get_cached(file_obj, CACHE_NAMESPACE, (backend_name,))
+    if stored is None:
+        return None
+    return stored["last_page"], _decompress(stored["texts"])
+
+
+def store(file_obj: IDexterityItem, backend_name: str, last_page: int, texts: dict[int, str]) -> None:
+    """Store the number of pages and the texts of a PDF."""
+    cache.set_cached(
+        file_obj,
+        CACHE_NAMESPACE,
+        (backend_name,),
+        {"last_page": last_page, "texts": _compress(texts)},
+    )
+
+
+def page_texts_many(
+    file_objs: list[IDexterityItem],
+    needed_pages: Callable[[int], Iterable[int]],
+    *,
+    refresh: bool = False,
+    progress: Callable[[int, int], None] | None = None,
+) -> list[tuple[int, dict[int, str]]]:
+    """
+    Return the number of pages of some PDFs and the text of some of their pages.
+
+    PDFs that need extraction are processed concurrently (see pipeline.py).
+
+    Args:
+        file_objs: the PDF Files
+        needed_pages: given the number of pages of a PDF, returns the
+          pages that we need (so that e.g. "the last page" can be resolved)
+        refresh: ignore what is stored and extract everything again
+        progress: see pipeline.run
+
+    Returns:
+        for each file, the number of pages and a mapping page number -> text
+
+    """
+    reports = pipeline.run(file_objs, {"text": needed_pages}, refresh=refresh, progress=progress)
+    return [report["text"] for report in reports]
+
+
+def page_texts(
+    file_obj: IDexterityItem,
+    needed_pages: Callable[[int], Iterable[int]],
+    *,
+    refresh: bool = False,
+) -> tuple[int, dict[int, str]]:
+    """Return the number of pages of a PDF and the text of some of its pages (see page_texts_many)."""
+    return page_texts_many([file_obj], needed_pages, refresh=refresh)[0]
@@ -0,0 +1,18 @@
+from plone import api
+from scienzaexpress.preflights import logger
+
+
+def remove_date_parts(context):
+    """
+    Remove the month/year attributes that used to be stored on Metadata objects.
+
+    E.g. data_pubblicazione__B and data_pubblicazione__Y are now computed by
+    views.validate_pdf_metadata.MetadataFormatter.
+    """
+    for brain in api.content.find(portal_type="Metadata"):
+        obj = brain.getObject()
+        stale = [name for name in vars(obj) if name.startswith("data_") and name.endswith(("__B", "__Y"))]
+        for name in stale:
+            delattr(obj, name)
+        if stale:
+            logger.info("Removed %s from %s", ", ".join(stale), obj.absolute_url(1))
@@ -0,0 +1,17 @@
+from plone import api
+from scienzaexpress.preflights import jobs
+from scienzaexpress.preflights import logger
+from scienzaexpress.preflights.setuphandlers import add_catalog_indexes
+from scienzaexpress.preflights.setuphandlers import PREFLIGHT_COLUMNS
+from scienzaexpress.preflights.setuphandlers import PREFLIGHT_INDEXES
+from zope.annotation.interfaces import IAnnotations
+
+
+def add_preflight_indexes(context):
+    """Add the catalog indexes of the preflights, and index the stored reports."""
+    add_catalog_indexes(PREFLIGHT_INDEXES, PREFLIGHT_COLUMNS)
+    for brain in api.content.find(portal_type="Folder"):
+        obj = brain.getObject()
+        if jobs.REPORTS_KEY in IAnnotations(obj):
+            obj.reindexObject(idxs=list(jobs.CATALOG_INDEXES))
+            logger.info("Indexed the preflights of %s", obj.absolute_url(1))
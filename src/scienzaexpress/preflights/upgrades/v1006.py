@@ -0,0 +1,14 @@
+from plone import api
+from scienzaexpress.preflights import logger
+from scienzaexpress.preflights.setuphandlers import add_catalog_indexes
+from scienzaexpress.preflights.setuphandlers import METADATA_COLUMNS
+from scienzaexpress.preflights.setuphandlers import METADATA_INDEXES
+
+
+def add_metadata_indexes(context):
+    """Add the catalog indexes of the Metadata fields, and index the Metadata objects."""
+    add_catalog_indexes(METADATA_INDEXES, METADATA_COLUMNS)
+    brains = api.content.find(portal_type="Metadata")
+    for brain in brains:
+        brain.getObject().reindexObject(idxs=list(METADATA_INDEXES))
+    logger.info("Indexed %s Metadata objects", len(brains))
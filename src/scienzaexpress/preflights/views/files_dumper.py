@@ -3,6 +3,7 @@ from pathlib import Path
 from plone import api
 from Products.CMFCore.interfaces import ISiteRoot
 from Products.Five.browser import BrowserView
+from scienzaexpress.preflights import files_export
 from scienzaexpress.preflights.views.validate_pdf_metadata import (
     missing_metadata_message,
 )
@@ -10,8 +11,6 @@ from scienzaexpress.preflights.views.validate_pdf_metadata import ValidatePdfMet
 from zope.interface import implementer
 from zope.interface import Interface
 
-import shutil
-
 
 class IFilesDumper(Interface):
     """Marker Interface for IFilesDumper"""
@@ -52,17 +51,19 @@ class FilesDumper(BrowserView):
 
         editorial_object_name = pmo.title.replace(" ", "-").lower()
         appfriendly_folder = root / ctype / editorial_object_name
-        if appfriendly_folder.exists():
-            # This process is destructive on the filesystem!
-            shutil.rmtree(appfriendly_folder)
-        appfriendly_folder.mkdir(parents=True, exist_ok=True)
 
         files_here = self.context.listFolderContents(
             contentFilter={"portal_type": "File"},
         )
-        for file_obj in files_here:
-            with open(appfriendly_folder / file_obj.file.filename, "wb") as file_fs:
-                file_fs.write(file_obj.file.data)
+        # Only the files that changed are written, and the folder is replaced
+        # as a whole: the files that are not here any more are removed!
+        sync = files_export.sync(files_here, appfriendly_folder)
 
-        self.result = f"{len(files_here)} file scritti in {appfriendly_folder}"
+        if sync.changed:
+            self.result = (
+                f"{len(sync.written)} file scritti, {len(sync.kept)} invariati,"
+                f" {len(sync.removed)} rimossi in {appfriendly_folder}"
+            )
+        else:
+            self.result = f"Nessuna modifica: {len(sync.kept)} file già presenti in {appfriendly_folder}"
         return self.index()
@@ -0,0 +1,70 @@
+from plone import api
+from Products.Five.browser import BrowserView
+from scienzaexpress.preflights import onix_feed
+from zExceptions import BadRequest
+from zExceptions import Unauthorized
+from ZPublisher.Iterators import filestream_iterator
+
+import datetime
+import os
+import tempfile
+
+
+class OnixFeed(BrowserView):
+    """
+    The catalogue (the titles below this folder) as a single ONIX message.
+
+    The message is streamed to the response as it is generated (see
+    onix_feed.py); invalid titles are skipped.
+
+    With ?delta=1 only the titles changed since the last delta export are
+    sent (or since ?since=YYYY-MM-DD). A GET changes nothing, so prefetches,
+    crawlers and retried downloads get the same feed; the watermark of the
+    last delta export is moved forward only by a POST (without since), by
+    a user who can manage the portal (e.g. the account of the distributor).
+    """
+
+    filename = "onix.xml"
+
+    def __call__(self):
+        since = self._parse_since()
+        response = self.request.response
+        response.setHeader("Content-Type", "application/xml; charset=utf-8")
+        response.setHeader("Content-Disposition", f'attachment; filename="{self.filename}"')
+        if self.request.form.get("delta"):
+            if self.request.method == "POST" and since is None:
+                if not api.user.has_permission("Manage portal", obj=self.context):
+                    raise Unauthorized("Only a Manager can move the watermark of the ONIX feed")
+                return self._recorded_delta()
+            onix_feed.export_delta(response, self.context, since=since)
+        else:
+            metadata_objects = onix_feed.find_metadata(path="/".join(self.context.getPhysicalPath()))
+            onix_feed.write_feed(response, metadata_objects)
+        return ""
+
+    def _recorded_delta(self) -> filestream_iterator:
+        """
+        Write the delta feed to a temporary file, and move the watermark.
+
+        The file is sent only after the transaction is committed: if it is
+        retried after a ConflictError, nothing was sent yet.
+        """
+        fd, name = tempfile.mkstemp(suffix=".xml")
+        try:
+            with os.fdopen(fd, "wb") as output:
+                onix_feed.export_delta(output, self.context, record=True)
+            self.request.response.setHeader("Content-Length", str(os.path.getsize(name)))
+            # the open file stays readable after it is unlinked
+            return filestream_iterator(name, "rb")
+        finally:
+            os.unlink(name)
+
+    def _parse_since(self) -> datetime.datetime | None:
+        value = self.request.form.get("since")
+        if not value:
+            return None
+        try:
+            day = datetime.date.fromisoformat(value)
+        except ValueError:
+            raise BadRequest("since should be a date (YYYY-MM-DD)") from None
+        return datetime.datetime.combine(day, datetime.time(), datetime.UTC)
@@ -6,6 +6,7 @@ from plone import api
 from plone.dexterity.interfaces import IDexterityItem
 from plone.namedfile.file import NamedBlobFile
 from Products.Five.browser import BrowserView
+from scienzaexpress.preflights import onix_schema
 from scienzaexpress.preflights.views.validate_pdf_metadata import (
     missing_metadata_message,
 )
@@ -14,6 +15,10 @@ from zope.interface import implementer
 from zope.interface import Interface
 from zope.lifecycleevent import modified
 
+import copy
+import hashlib
+import re
+
 
 # TODO: transfer to Plone registry
 SEND_NAME: str = "Scienza Express"
@@ -31,6 +36,12 @@ PUBL_STAT: str = "IT"
 SUPL_NAME: str = "Scienza Express"
 SUPL_CURR: str = "EUR"
 
+ONIX_NAMESPACE: str = onix_schema.ONIX_NAMESPACE
+GENERATOR_VERSION: str = "1"
+"""Change this when the generated XML changes (it is part of the ETags of services/onix.py)."""
+MAX_SCHEMA_ERRORS: int = 10
+"""Show at most this many errors of validation wrt Onix XSD."""
+
 
 @dataclass
 class BookMetadata:
@@ -123,7 +134,7 @@ class BookMetadata:
     def validate_authors(self) -> tuple[bool, list[str] | None]:
         """Check authors and biographies."""
         if len(self.authors) < 1:
-            return (False, [f"Assicurarsi che almeno un autore sia presente ({self.autors})."])
+            return (False, [f"Assicurarsi che almeno un autore sia presente ({self.authors})."])
         elif len(self.authors) != len(self.bios):
             return (
                 False,
@@ -134,6 +145,11 @@ class BookMetadata:
         else:
             return (True, None)
 
+    def validate_pub_date(self) -> tuple[bool, list[str] | None]:
+        if self.pub_date is None:
+            return (False, ["Manca la data di pubblicazione."])
+        return (True, None)
+
     def validate(self) -> tuple[bool, list[str] | None]:
         """
         Validate the metadata.
@@ -145,6 +161,7 @@ class BookMetadata:
             "validate_authors",
             "validate_translation",
             "validate_collection",
+            "validate_pub_date",
         ):
             valid, reason_failed = getattr(self, validator)()
             if not valid:
@@ -155,7 +172,7 @@ class BookMetadata:
         return (all_valid, reasons_failed)
 
 
-def generate_onix_message(  # noqa: C901, PLR0912, PLR0914, PLR0915
+def generate_onix_message(
     book_meta: BookMetadata,
     *,
     is_for_ISBN: bool = True,  # noqa: N803
@@ -177,7 +194,7 @@ def generate_onix_message(  # noqa: C901, PLR0912, PLR0914, PLR0915
             "ONIXISBNMessage",
             attrib={"release": "3.1"},
             nsmap={
-                None: "http://ns.editeur.org/onix/3.1/reference",
+                None: ONIX_NAMESPACE,
             },
         )
     else:
@@ -185,90 +202,315 @@ def generate_onix_message(  # noqa: C901, PLR0912, PLR0914, PLR0915
             "ONIXMessage",
             attrib={"release": "3.1"},
             nsmap={
-                None: "http://ns.editeur.org/onix/3.1/reference",
+                None: ONIX_NAMESPACE,
             },
         )
 
-    # HEADER
-    header = etree.SubElement(root, "Header")
-    sender = etree.SubElement(header, "Sender")
-    etree.SubElement(sender, "SenderName").text = SEND_NAME
-    etree.SubElement(sender, "ContactName").text = SEND_NAME
-    etree.SubElement(sender, "EmailAddress").text = SEND_MAIL
-    etree.SubElement(header, "SentDateTime").text = datetime.utcnow().strftime("%Y%m%d")
+    root.append(generate_header())
+    root.append(generate_product(book_meta, is_for_ISBN=is_for_ISBN))
 
-    # PRODUCT
-    product = etree.SubElement(root, "Product")
+    # the tree is validated wrt Onix XSD when it is saved (see onix_schema.py)
+    return root
 
-    # BLOCK 0: Preamble
-    # P.1
-    etree.SubElement(product, "RecordReference").text = RCRD_CODE + book_meta.isbn
-    etree.SubElement(product, "NotificationType").text = "03"  # List 1
-    etree.SubElement(product, "RecordSourceType").text = "01"  # List 44
-    etree.SubElement(product, "RecordSourceName").text = RCRD_NAME
 
-    # P.2
-    product_id = etree.SubElement(product, "ProductIdentifier")
-    etree.SubElement(product_id, "ProductIDType").text = ISBN_TYPE
-    etree.SubElement(product_id, "IDValue").text = book_meta.isbn
+# The blocks that are the same in every message are built once, as templates
+# (with empty slots, i.e. elements with no text yet): each message copies them
+# (copy.deepcopy of an lxml element is done in C) and fills in the slots.
+# This is much faster than building them with one etree.SubElement at a time
+# when a catalogue of thousands of Products is exported
+# (see scripts/benchmark_onix.py).
+
+
+def _element(tag: str, text: str | None = None, *children: etree.Element, **attrib: str) -> etree.Element:
+    element = etree.Element(tag, attrib)
+    element.text = text
+    element.extend(children)
+    return element
+
+
+def _copy(template: etree.Element) -> etree.Element:
+    return copy.deepcopy(template)
+
+
+# [1]: SentDateTime
+_HEADER = _element(
+    "Header",
+    None,
+    _element(
+        "Sender",
+        None,
+        _element("SenderName", SEND_NAME),
+        _element("ContactName", SEND_NAME),
+        _element("EmailAddress", SEND_MAIL),
+    ),
+    _element("SentDateTime"),
+)
+
+# [0]: RecordReference, [1]: NotificationType, [4][1]: IDValue
+_PREAMBLE = _element(
+    "Product",
+    None,
+    _element("RecordReference"),
+    _element("NotificationType"),  # List 1
+    _element("RecordSourceType", "01"),  # List 44
+    _element("RecordSourceName", RCRD_NAME),
+    _element(
+        "ProductIdentifier",
+        None,
+        _element("ProductIDType", ISBN_TYPE),
+        _element("IDValue"),
+    ),
+)
+
+# [1]: ProductForm
+_DESCRIPTIVE_DETAIL = _element(
+    "DescriptiveDetail",
+    None,
+    _element("ProductComposition", "00"),  # List 2
+    _element("ProductForm"),  # List 150
+)
+
+# [0]: MeasureType, [1]: Measurement
+_MEASURE = _element(
+    "Measure",
+    None,
+    _element("MeasureType"),
+    _element("Measurement"),
+    _element("MeasureUnitCode", MEAS_UNIT),
+)
+
+_COUNTRY_OF_MANUFACTURE = _element("CountryOfManufacture", PRNT_STAT)
+
+# [1][1]: IDValue, [2][1][1]: TitleText
+_COLLECTION = _element(
+    "Collection",
+    None,
+    _element("CollectionType", "10"),  # List 148
+    _element(
+        "CollectionIdentifier",
+        None,
+        _element("CollectionIDType", "02"),
+        _element("IDValue"),
+    ),
+    _element(
+        "TitleDetail",
+        None,
+        _element("TitleType", "01"),  # List 15
+        _element(
+            "TitleElement",
+            None,
+            _element("TitleElementLevel", "02"),
+            _element("TitleText"),
+        ),
+    ),
+)
+
+_NO_COLLECTION = _element("NoCollection")
+
+# [0]: TitleType, [1][1]: TitleText
+_TITLE_DETAIL = _element(
+    "TitleDetail",
+    None,
+    _element("TitleType"),  # List 15
+    _element(
+        "TitleElement",
+        None,
+        _element("TitleElementLevel", "01"),
+        _element("TitleText"),
+    ),
+)
+
+# [0]: SequenceNumber, [1]: ContributorRole, [2]: PersonName
+_CONTRIBUTOR = _element(
+    "Contributor",
+    None,
+    _element("SequenceNumber"),
+    _element("ContributorRole"),  # List 17
+    _element("PersonName"),
+)
+
+# [0]: LanguageRole, [1]: LanguageCode
+_LANGUAGE = _element(
+    "Language",
+    None,
+    _element("LanguageRole"),  # List 22
+    _element("LanguageCode"),
+)
+
+# [1]: ExtentValue
+_EXTENT = _element(
+    "Extent",
+    None,
+    _element("ExtentType", "06"),  # List 23
+    _element("ExtentValue"),
+    _element("ExtentUnit", "03"),  # List 24
+)
+
+# [2]: SubjectCode
+_SUBJECT = _element(
+    "Subject",
+    None,
+    _element("SubjectSchemeIdentifier", "93"),  # List 27
+    _element("SubjectSchemeVersion", "1.1"),  # Current version
+    _element("SubjectCode"),
+)
+
+# [0][2]: Text
+_COLLATERAL_DETAIL = _element(
+    "CollateralDetail",
+    None,
+    _element(
+        "TextContent",
+        None,
+        _element("TextType", "30"),  # List 153
+        _element("ContentAudience", "00"),  # List 153
+        _element("Text", textformat="05"),
+    ),
+)
+
+# [1]: CityOfPublication, [3][1]: Date
+_PUBLISHING_DETAIL = _element(
+    "PublishingDetail",
+    None,
+    _element(
+        "Publisher",
+        None,
+        _element("PublishingRole", "01"),  # List 45
+        _element("PublisherName", PUBL_NAME),
+    ),
+    _element("CityOfPublication"),
+    _element("CountryOfPublication", PUBL_STAT),
+    _element(
+        "PublishingDate",
+        None,
+        _element("PublishingDateRole", "01"),  # For ISBN purposes
+        _element("Date"),
+    ),
+)
+
+
+def _price(price_type: str) -> etree.Element:
+    return _element(
+        "Price",
+        None,
+        _element("PriceType", price_type),  # List 58
+        _element("PriceAmount"),
+        _element("CurrencyCode", SUPL_CURR),
+    )
+
+
+# [0][2][1]: PriceAmount (without tax), [0][3][1]: PriceAmount (with tax)
+_PRODUCT_SUPPLY = _element(
+    "ProductSupply",
+    None,
+    _element(
+        "SupplyDetail",
+        None,
+        _element(
+            "Supplier",
+            None,
+            _element("SupplierRole", "01"),  # List 93
+            _element("SupplierName", SUPL_NAME),
+        ),
+        _element("ProductAvailability", "20"),
+        _price("01"),
+        _price("02"),
+    ),
+)
+
+
+def generate_header() -> etree.Element:
+    """Return the Header of an ONIX message."""
+    header = _copy(_HEADER)
+    header[1].text = datetime.utcnow().strftime("%Y%m%d")
+    return header
+
+
+def _preamble(isbn: str, notification_type: str) -> etree.Element:
+    product = _copy(_PREAMBLE)
+    product[0].text = RCRD_CODE + isbn
+    product[1].text = notification_type
+    product[4][1].text = isbn
+    return product
+
+
+def _contributor(role: str, name: str, sequence_number: int) -> etree.Element:
+    contributor = _copy(_CONTRIBUTOR)
+    contributor[0].text = f"{sequence_number:02d}"
+    contributor[1].text = role
+    contributor[2].text = name
+    return contributor
+
+
+def _language(role: str, code: str) -> etree.Element:
+    language = _copy(_LANGUAGE)
+    language[0].text = role
+    language[1].text = code
+    return language
+
+
+def generate_product(  # noqa: C901
+    book_meta: BookMetadata,
+    *,
+    is_for_ISBN: bool = True,  # noqa: N803
+    notification_type: str = "03",
+) -> etree.Element:
+    """
+    Return the Product of an ONIX message.
+
+    See generate_onix_message for is_for_ISBN; notification_type is a code
+    of List 1 (see onix_feed.py).
+    """
+    # BLOCK 0: Preamble
+    # P.1, P.2
+    product = _preamble(book_meta.isbn, notification_type)
 
     # BLOCK 1: Decriptive detail
     # P.3
-    descriptive_detail = etree.SubElement(product, "DescriptiveDetail")
-    etree.SubElement(descriptive_detail, "ProductComposition").text = "00"  # List 2
+    descriptive_detail = _copy(_DESCRIPTIVE_DETAIL)
+    product.append(descriptive_detail)
     if book_meta.type in {"BB", "BC"}:
-        etree.SubElement(descriptive_detail, "ProductForm").text = book_meta.type  # List 150
+        descriptive_detail[1].text = book_meta.type
     else:
         # TO DO Raise warning
-        etree.SubElement(descriptive_detail, "ProductForm").text = DFLT_FORM
+        descriptive_detail[1].text = DFLT_FORM
     for i, m in enumerate(book_meta.measures, start=1):
-        measure = etree.Element("Measure")
-        etree.SubElement(measure, "MeasureType").text = f"0{i}"
-        etree.SubElement(measure, "Measurement").text = str(m)
-        etree.SubElement(measure, "MeasureUnitCode").text = MEAS_UNIT
+        measure = _copy(_MEASURE)
+        measure[0].text = f"0{i}"
+        measure[1].text = str(m)
         descriptive_detail.append(measure)
-    etree.SubElement(descriptive_detail, "CountryOfManufacture").text = PRNT_STAT
+    descriptive_detail.append(_copy(_COUNTRY_OF_MANUFACTURE))
 
     # P.4
     # Not relevant
 
     # P.5
     if book_meta.collection_title:
-        collection = etree.SubElement(descriptive_detail, "Collection")
-        etree.SubElement(collection, "CollectionType").text = "10"  # List 148
-        collection_id = etree.SubElement(collection, "CollectionIdentifier")
-        etree.SubElement(collection_id, "CollectionIDType").text = "02"
-        etree.SubElement(collection_id, "IDValue").text = book_meta.collection_issn
-        collection_title = etree.SubElement(collection, "TitleDetail")
-        etree.SubElement(collection_title, "TitleType").text = "01"  # List 15
-        collection_title_element = etree.SubElement(collection_title, "TitleElement")
-        etree.SubElement(collection_title_element, "TitleElementLevel").text = "02"
-        etree.SubElement(collection_title_element, "TitleText").text = book_meta.collection_title
+        collection = _copy(_COLLECTION)
+        collection[1][1].text = book_meta.collection_issn
+        collection[2][1][1].text = book_meta.collection_title
+        descriptive_detail.append(collection)
     else:
-        etree.SubElement(descriptive_detail, "NoCollection")
+        descriptive_detail.append(_copy(_NO_COLLECTION))
 
     # P.6
-    title_detail = etree.SubElement(descriptive_detail, "TitleDetail")
-    etree.SubElement(title_detail, "TitleType").text = "01"  # List 15
-    title_element = etree.SubElement(title_detail, "TitleElement")
-    etree.SubElement(title_element, "TitleElementLevel").text = "01"
-    etree.SubElement(title_element, "TitleText").text = book_meta.title
+    title_detail = _copy(_TITLE_DETAIL)
+    title_detail[0].text = "01"
+    title_detail[1][1].text = book_meta.title
     if book_meta.subtitle:
-        etree.SubElement(title_element, "Subtitle").text = book_meta.subtitle
+        etree.SubElement(title_detail[1], "Subtitle").text = book_meta.subtitle
     if book_meta.orig_title:
-        etree.SubElement(title_detail, "TitleType").text = "16"  # List 15
-        title_element = etree.SubElement(title_detail, "TitleElement")
-        etree.SubElement(title_element, "TitleElementLevel").text = "01"
-        etree.SubElement(title_element, "TitleText").text = book_meta.orig_title
+        original = _copy(_TITLE_DETAIL)
+        original[0].text = "16"
+        original[1][1].text = book_meta.orig_title
+        title_detail.extend(original)
+    descriptive_detail.append(title_detail)
 
     # P.7
     count_contrib: int = 0
     for i, author in enumerate(book_meta.authors):
         count_contrib = +1
-        contributor = etree.Element("Contributor")
-        etree.SubElement(contributor, "SequenceNumber").text = f"{count_contrib:02d}"
-        etree.SubElement(contributor, "ContributorRole").text = "A01"  # List 17
-        etree.SubElement(contributor, "PersonName").text = author
+        contributor = _contributor("A01", author, count_contrib)
         try:
             bio = book_meta.bios[i]
             if bio:
@@ -278,77 +520,46 @@ def generate_onix_message(  # noqa: C901, PLR0912, PLR0914, PLR0915
         descriptive_detail.append(contributor)
     for illustrator in book_meta.illustrators:
         count_contrib = +1
-        contributor = etree.Element("Contributor")
-        etree.SubElement(contributor, "SequenceNumber").text = f"{count_contrib:02d}"
-        etree.SubElement(contributor, "ContributorRole").text = "A12"  # List 17
-        etree.SubElement(contributor, "PersonName").text = illustrator
-        descriptive_detail.append(contributor)
+        descriptive_detail.append(_contributor("A12", illustrator, count_contrib))
     for translator in book_meta.translators:
         count_contrib = +1
-        contributor = etree.Element("Contributor")
-        etree.SubElement(contributor, "SequenceNumber").text = f"{count_contrib:02d}"
-        etree.SubElement(contributor, "ContributorRole").text = "B06"  # List 17
-        etree.SubElement(contributor, "PersonName").text = translator
-        descriptive_detail.append(contributor)
+        descriptive_detail.append(_contributor("B06", translator, count_contrib))
     for curator in book_meta.curators:
         count_contrib = +1
-        contributor = etree.Element("Contributor")
-        etree.SubElement(contributor, "SequenceNumber").text = f"{count_contrib:02d}"
-        etree.SubElement(contributor, "ContributorRole").text = "C04"  # List 17
-        etree.SubElement(contributor, "PersonName").text = curator
-        descriptive_detail.append(contributor)
+        descriptive_detail.append(_contributor("C04", curator, count_contrib))
 
     # P.8
     # Not relevant
 
     # P.9
-    if book_meta.ed_number:
-        etree.SubElement(descriptive_detail, "EditionNumber").text = book_meta.ed_number
-    else:
-        etree.SubElement(descriptive_detail, "EditionNumber").text = "1"
+    etree.SubElement(descriptive_detail, "EditionNumber").text = book_meta.ed_number or "1"
 
     # P.10
-    language = etree.SubElement(descriptive_detail, "Language")
-    etree.SubElement(language, "LanguageRole").text = "01"  # List 22
-    etree.SubElement(language, "LanguageCode").text = LANG_CODE
+    descriptive_detail.append(_language("01", LANG_CODE))
     if book_meta.translators:
-        original = etree.SubElement(descriptive_detail, "Language")
-        etree.SubElement(original, "LanguageRole").text = "02"  # List 22
-        etree.SubElement(original, "LanguageCode").text = book_meta.orig_lang
+        descriptive_detail.append(_language("02", book_meta.orig_lang))
 
     # P.11
-    extent = etree.SubElement(descriptive_detail, "Extent")
-    etree.SubElement(extent, "ExtentType").text = "06"  # List 23
-    etree.SubElement(extent, "ExtentValue").text = str(book_meta.pages)
-    etree.SubElement(extent, "ExtentUnit").text = "03"  # List 24
+    extent = _copy(_EXTENT)
+    extent[1].text = str(book_meta.pages)
+    descriptive_detail.append(extent)
 
     # P.12
     for item in book_meta.thema_keys:
-        subject = etree.Element("Subject")
-        etree.SubElement(subject, "SubjectSchemeIdentifier").text = "93"  # List 27
-        etree.SubElement(subject, "SubjectSchemeVersion").text = "1.1"  # Current version
-        etree.SubElement(subject, "SubjectCode").text = item
+        subject = _copy(_SUBJECT)
+        subject[2].text = item
         descriptive_detail.append(subject)
 
     # P.13
     # Not relevant (at the moment)
 
     # BLOCK 2: Collateral detail
-    collateral_detail = etree.SubElement(product, "CollateralDetail")
-
     # P.14
-    text_content = etree.SubElement(collateral_detail, "TextContent")
-    etree.SubElement(text_content, "TextType").text = "30"  # List 153
-    etree.SubElement(text_content, "ContentAudience").text = "00"  # List 153
-    etree.SubElement(text_content, "Text", attrib={"textformat": "05"}).text = book_meta.abstract
+    collateral_detail = _copy(_COLLATERAL_DETAIL)
+    collateral_detail[0][2].text = book_meta.abstract
+    product.append(collateral_detail)
 
-    # P.15
-    # Not relevant
-
-    # P.16
-    # Not relevant
-
-    # P.17
+    # P.15, P.16, P.17
     # Not relevant
 
     # BLOCK 3: Content detail
@@ -356,71 +567,50 @@ def generate_onix_message(  # noqa: C901, PLR0912, PLR0914, PLR0915
     # Not relevant
 
     # BLOCK 4: Publishing detail
-    publishing_detail = etree.SubElement(product, "PublishingDetail")
-
-    # P.19
-    publisher = etree.SubElement(publishing_detail, "Publisher")
-    etree.SubElement(publisher, "PublishingRole").text = "01"  # List 45
-    etree.SubElement(publisher, "PublisherName").text = PUBL_NAME
-    etree.SubElement(publishing_detail, "CityOfPublication").text = book_meta.pub_city
-    etree.SubElement(publishing_detail, "CountryOfPublication").text = PUBL_STAT
-
-    # P.20
-    publication_date = etree.SubElement(publishing_detail, "PublishingDate")
-    etree.SubElement(publication_date, "PublishingDateRole").text = "01"  # For ISBN purposes
-    etree.SubElement(publication_date, "Date").text = book_meta.pub_date.strftime("%Y%m%d")  # Format "YYYYMM"
+    # P.19, P.20
+    publishing_detail = _copy(_PUBLISHING_DETAIL)
+    publishing_detail[1].text = book_meta.pub_city
+    publishing_detail[3][1].text = book_meta.pub_date.strftime("%Y%m%d")  # Format "YYYYMM"
+    product.append(publishing_detail)
 
     # P.21
     # Not relevant
 
     # BLOCK 5: Related material
-    # P.22
-    # Not relevant
-
-    # P.23
+    # P.22, P.23
     # Not relevant
 
     # BLOCK 6: Product supply
     # For ISBN registration must be excluded
     if is_for_ISBN:
-        return root
-
-    product_supply = etree.SubElement(product, "ProductSupply")
+        return product
 
-    # P.24
-    # Not relevant
+    # P.24, P.25, P.26
+    product_supply = _copy(_PRODUCT_SUPPLY)
+    product_supply[0][2][1].text = f"{book_meta.price:.2f}"
+    product_supply[0][3][1].text = f"{book_meta.price_tax:.2f}"
+    product.append(product_supply)
 
-    # P.25
-    # Not relevant
+    return product
 
-    # P.26
-    # Not relevant
-    supply_detail = etree.SubElement(product_supply, "SupplyDetail")
-    supplier_element = etree.SubElement(supply_detail, "Supplier")
-    etree.SubElement(supplier_element, "SupplierRole").text = "01"  # List 93
-    etree.SubElement(supplier_element, "SupplierName").text = SUPL_NAME
-    etree.SubElement(supply_detail, "ProductAvailability").text = "20"
-    price_element = etree.SubElement(supply_detail, "Price")
-    etree.SubElement(price_element, "PriceType").text = "01"  # List 58
-    etree.SubElement(price_element, "PriceAmount").text = f"{book_meta.price:.2f}"
-    etree.SubElement(price_element, "CurrencyCode").text = SUPL_CURR
-    price_tax_element = etree.SubElement(supply_detail, "Price")
-    etree.SubElement(price_tax_element, "PriceType").text = "02"  # List 58
-    etree.SubElement(price_tax_element, "PriceAmount").text = f"{book_meta.price_tax:.2f}"
-    etree.SubElement(price_tax_element, "CurrencyCode").text = SUPL_CURR
-
-    # TODO: validate the whole tree wrt Onix XSD
-    # e.g. #  xmlschema_doc = etree.parse("schemas/ONIX_BookProduct_3.1_reference.xsd")
-    # e.g. #  xmlschema = etree.XMLSchema(xmlschema_doc)
-    # e.g. #  print(xmlschema.validate(etree.fromstring(xml)))
 
-    return root
+def generate_withdrawn_product(isbn: str) -> etree.Element:
+    """Return the Product that tells that a title was withdrawn (a "delete" record)."""
+    return _preamble(isbn, "05")  # List 1
 
 
 class IOnixGenerator(Interface):
     """Marker Interface for IOnixGenerator."""
 
 
+SENT_DATE_TIME = re.compile(rb"<SentDateTime>[^<]*</SentDateTime>")
+
+
+def content_hash(data: bytes) -> str:
+    """Return a hash of a serialized message, leaving out the (volatile) SentDateTime."""
+    return hashlib.sha256(SENT_DATE_TIME.sub(b"", data)).hexdigest()
+
+
 def ssplit(s: str, separator: str = ";") -> tuple | None:
     """Split a string. Deal with None values."""
     if s is None:
@@ -428,6 +618,36 @@ def ssplit(s: str, separator: str = ";") -> tuple | None:
     return s.split(separator)
 
 
+def book_metadata(pmo: IDexterityItem) -> BookMetadata:
+    """Return the metadata of a Metadata object, suitable to build an Onix-like or App-ready XML."""
+    # TODO: review this setup: validation functions don't like None-values
+    #       maybe I should use empty-strings in the publication-metadata obj?
+    #       or maybe I should add a method to publication-metadata class
+    return BookMetadata(
+        isbn=pmo.isbn or "",
+        measures=[pmo.altezza or 0, pmo.larghezza or 0, pmo.spessore or 0],
+        collection_issn=pmo.collana_issn or "",
+        collection_title=pmo.collana or "",
+        title=pmo.title or "",
+        type=pmo.rilegatura or "",
+        subtitle=pmo.sottotitolo or "",
+        ed_number=pmo.edizione or "",
+        orig_lang=pmo.lingua_originale or "",
+        orig_title=pmo.titolo_originale or "",
+        authors=ssplit(pmo.autori),
+        illustrators=ssplit(pmo.illustratori),
+        curators=ssplit(pmo.curatori),
+        translators=ssplit(pmo.traduttori),
+        bios=ssplit(pmo.biografie, ";;"),
+        pages=pmo.pagine or "",
+        thema_keys=ssplit(pmo.classificazione),
+        abstract=pmo.abstract or "",
+        pub_city=pmo.luogo_di_pubblicazione or "",
+        pub_date=pmo.data_pubblicazione or None,
+        price_tax=pmo.prezzo_con_iva or 0.0,
+    )
+
+
 @implementer(IOnixGenerator)
 class BaseGenerator(BrowserView):
     def __call__(self):
@@ -436,32 +656,7 @@ class BaseGenerator(BrowserView):
     def get_metadata(self) -> tuple[bool, BookMetadata | list[str]]:
         """Return metadata suitable to build an Onix-like or App-ready XML."""
         if pmo := ValidatePdfMetadata.find_metadata_object(self.context):
-            # TODO: review this setup: validation functions don't like None-values
-            #       maybe I should use empty-strings in the publication-metadata obj?
-            #       or maybe I should add a method to publication-metadata class
-            book_meta = BookMetadata(
-                isbn=pmo.isbn or "",
-                measures=[pmo.altezza or 0, pmo.larghezza or 0, pmo.spessore or 0],
-                collection_issn=pmo.collana_issn or "",
-                collection_title=pmo.collana or "",
-                title=pmo.title or "",
-                type=pmo.rilegatura or "",
-                subtitle=pmo.sottotitolo or "",
-                ed_number=pmo.edizione or "",
-                orig_lang=pmo.lingua_originale or "",
-                orig_title=pmo.titolo_originale or "",
-                authors=ssplit(pmo.autori),
-                illustrators=ssplit(pmo.illustratori),
-                curators=ssplit(pmo.curatori),
-                translators=ssplit(pmo.traduttori),
-                bios=ssplit(pmo.biografie, ";;"),
-                pages=pmo.pagine or "",
-                thema_keys=ssplit(pmo.classificazione),
-                abstract=pmo.abstract or "",
-                pub_city=pmo.luogo_di_pubblicazione or "",
-                pub_date=pmo.data_pubblicazione or None,
-                price_tax=pmo.prezzo_con_iva or 0.0,
-            )
+            book_meta = book_metadata(pmo)
 
             validate, reasons_failed = book_meta.validate()
             if validate:
@@ -479,24 +674,54 @@ class BaseGenerator(BrowserView):
         message_warning: str,
         message_success: str,
     ) -> IDexterityItem:
-        if file_id in self.context:
-            api.content.delete(self.context.get(file_id))
+        """
+        Save the XML in the File file_id of this folder.
+
+        An existing File is updated in place, and only if the XML changed
+        (apart from SentDateTime): regenerating the same XML costs no new
+        blob, no reindexing and no new version.
+        """
+        filename = f"{file_id}.xml"
+        data = onix_schema.serialize(xml_tree)
+
+        self.schema_errors = onix_schema.validate(data)
+        if self.schema_errors:
             api.portal.show_message(
-                message=message_warning,
+                message="Il file XML non è valido secondo lo schema ONIX 3.1:\n"
+                + "\n".join(str(error) for error in self.schema_errors[:MAX_SCHEMA_ERRORS]),
                 request=self.request,
                 type="warning",
             )
 
-        file_obj = api.content.create(
-            container=self.context,
-            type="File",
-            id=file_id,
-            title=title,
-        )
+        file_obj = self.context.get(file_id)
+        if file_obj is not None and getattr(file_obj, "file", None) is not None:
+            if content_hash(file_obj.file.data) == content_hash(data):
+                api.portal.show_message(
+                    message=f"{title}: nessuna modifica.",
+                    request=self.request,
+                    type="info",
+                )
+                return file_obj
+            # the same blob gets the new data
+            file_obj.file.data = data
+            file_obj.file.filename = filename
+            api.portal.show_message(
+                message=message_warning,
+                request=self.request,
+                type="warning",
+            )
+        else:
+            if file_obj is not None:
+                api.content.delete(file_obj)
+            file_obj = api.content.create(
+                container=self.context,
+                type="File",
+                id=file_id,
+                title=title,
+            )
+            file_obj.file = NamedBlobFile(data=data, filename=filename)
+        file_obj.title = title
         file_obj.setDescription(description)
-        filename = f"{file_id}.xml"
-        data = etree.tostring(xml_tree, encoding="unicode")
-        file_obj.file = NamedBlobFile(data=data, filename=filename)
         modified(file_obj)
 
         api.portal.show_message(
@@ -0,0 +1,23 @@
+from plone.protect import CheckAuthenticator
+from plone.protect import PostOnly
+from Products.Five.browser import BrowserView
+from scienzaexpress.preflights import onix_import
+
+
+class OnixImport(BrowserView):
+    """
+    Create or update Metadata objects from an uploaded ONIX message.
+
+    The new Metadata objects are created in this folder; those with an ISBN
+    that is already used are updated where they are (see onix_import.py).
+    """
+
+    result = None
+
+    def __call__(self):
+        upload = self.request.form.get("onix")
+        if upload:
+            PostOnly(self.request)
+            CheckAuthenticator(self.request)
+            self.result = onix_import.import_products(upload, self.context)
+        return self.index()
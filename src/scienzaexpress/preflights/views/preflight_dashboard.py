@@ -0,0 +1,28 @@
+from plone import api
+from Products.Five.browser import BrowserView
+
+
+class PreflightDashboard(BrowserView):
+    """
+    The folders (below this one) whose last preflights found problems.
+
+    Only the catalog is used (see indexers/preflight.py): no folder or PDF
+    is loaded. With ?all=1, all folders that were checked are listed.
+    """
+
+    def __call__(self):
+        self.show_all = bool(self.request.form.get("all"))
+        self.brains = self.find_folders(show_all=self.show_all)
+        return self.index()
+
+    def find_folders(self, *, show_all: bool = False):
+        query = {
+            "path": "/".join(self.context.getPhysicalPath()),
+            "sort_on": "preflight_checked",
+            "sort_order": "descending",
+        }
+        if show_all:
+            query["preflight_checked"] = {"query": "1970-01-01", "range": "min"}
+        else:
+            query["preflight_ok"] = False
+        return api.content.find(**query)
@@ -0,0 +1,54 @@
+from plone import api
+from Products.Five.browser import BrowserView
+from scienzaexpress.preflights import jobs
+from zExceptions import NotFound
+from zExceptions import Unauthorized
+
+import json
+
+
+class PreflightJobMixin:
+    """Let a preflight view run in the background (see jobs.py)."""
+
+    def enqueue_job(self):
+        """
+        Enqueue this preflight, and redirect to the page of the job.
+
+        Enqueuing writes to the ZODB: only who can edit the folder may do it.
+        """
+        if not api.user.has_permission("Modify portal content", obj=self.context):
+            raise Unauthorized("Cannot run preflights in the background here")
+        job = jobs.enqueue(self.context, self.__name__, refresh=bool(self.request.form.get("refresh")))
+        self.request.response.redirect(f"{self.context.absolute_url()}/@@preflight-job?job={job.id}")
+        return ""
+
+
+class PreflightJob(BrowserView):
+    """The status of a preflight running in the background."""
+
+    def __call__(self):
+        self.job = self._get_job()
+        self.report = jobs.get_report(self.context, self.job.kind) if self.job.status == jobs.DONE else None
+        return self.index()
+
+    def _get_job(self) -> jobs.Job:
+        job = jobs.get(self.request.form.get("job", ""))
+        if job is None or job.path != self.context.getPhysicalPath():
+            raise NotFound("No such preflight job")
+        return job
+
+    def status_url(self) -> str:
+        return f"{self.context.absolute_url()}/@@preflight-job-status?job={self.job.id}"
+
+    def results_url(self) -> str:
+        return f"{self.context.absolute_url()}/@@{self.job.kind}"
+
+
+class PreflightJobStatus(PreflightJob):
+    """The status of a preflight running in the background, as JSON."""
+
+    def __call__(self):
+        job = self._get_job()
+        self.request.response.setHeader("Content-Type", "application/json")
+        self.request.response.setHeader("Cache-Control", "no-store")
+        return json.dumps(job.as_dict())
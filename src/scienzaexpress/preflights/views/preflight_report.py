@@ -0,0 +1,125 @@
+from collections.abc import Callable
+from plone.dexterity.interfaces import IDexterityItem
+from Products.Five.browser import BrowserView
+from scienzaexpress.preflights import pipeline
+from scienzaexpress.preflights.stages.images import ImagesOptions
+from scienzaexpress.preflights.stages.images import ImagesSummary
+from scienzaexpress.preflights.stages.pages import PagesSummary
+from scienzaexpress.preflights.views.pdf_preflight import PdfPreflight
+from scienzaexpress.preflights.views.preflight_jobs import PreflightJobMixin
+from scienzaexpress.preflights.views.validate_pdf_metadata import CheckResult
+from scienzaexpress.preflights.views.validate_pdf_metadata import MetadataFormatter
+from scienzaexpress.preflights.views.validate_pdf_metadata import (
+    missing_metadata_message,
+)
+from scienzaexpress.preflights.views.validate_pdf_metadata import ValidatePdfMetadata
+from zope.interface import implementer
+from zope.interface import Interface
+
+import dataclasses
+import plone.api
+
+
+class IPreflightReport(Interface):
+    """Marker Interface for IPreflightReport"""
+
+
+@dataclasses.dataclass
+class FileReport:
+    """The results of all preflights of one PDF."""
+
+    file_obj: IDexterityItem
+    pages: PagesSummary
+    images: ImagesSummary
+    metadata: list[CheckResult] | None = None
+    """None if there is no Metadata object to check against."""
+
+    @property
+    def good(self) -> bool:
+        return self.pages.good and self.images.good and all(result.good for result in self.metadata or ())
+
+
+@implementer(IPreflightReport)
+class PreflightReport(PreflightJobMixin, BrowserView):
+    """
+    Run all preflights on all PDFs of this folder.
+
+    The checks of @@pdf-preflight and @@validate-pdf-metadata, plus the
+    number and size of the pages, are run by the preflight pipeline (see
+    pipeline.py) so that each PDF is read at most once.
+    """
+
+    def __call__(self):
+        if self.request.form.get("async"):
+            return self.enqueue_job()
+        self.run_checks(refresh=bool(self.request.form.get("refresh")))
+        return self.index()
+
+    def run_checks(
+        self,
+        *,
+        refresh: bool = False,
+        progress: Callable[[int, int], None] | None = None,
+    ) -> None:
+        """Run the checks and keep the results (see also jobs.py)."""
+        self.results = self.check_all_pdfs(refresh=refresh, progress=progress)
+
+    def count_problems(self) -> int:
+        """Return the number of PDFs with some problem."""
+        return sum(1 for report in self.results if not report.good)
+
+    def report_counts(self) -> dict[str, int]:
+        """Return the counts stored in the summary of the report (see jobs.py)."""
+        counts = {
+            "low_ppi_images": sum(len(report.images.failures) for report in self.results),
+            "read_errors": sum(len(report.images.errors) for report in self.results),
+            "odd_page_files": sum(1 for report in self.results if not report.pages.good),
+        }
+        if self.has_metadata:
+            counts["failed_metadata_checks"] = sum(
+                1 for report in self.results for result in report.metadata or () if not result.good
+            )
+        return counts
+
+    def check_all_pdfs(
+        self,
+        *,
+        refresh: bool = False,
+        progress: Callable[[int, int], None] | None = None,
+    ) -> list[FileReport]:
+        images_view = PdfPreflight(self.context, self.request)
+        metadata_view = ValidatePdfMetadata(self.context, self.request)
+
+        stages = {
+            "pages": None,
+            "images": ImagesOptions(ppi_lowthreshold=images_view.ppi_lowthreshold),
+        }
+        self.has_metadata = False
+        if obj := ValidatePdfMetadata.find_metadata_object(self.context):
+            metadata_view.metadata_object = MetadataFormatter(obj)
+            stages["text"] = metadata_view._needed_pages
+            self.has_metadata = True
+        else:
+            plone.api.portal.show_message(
+                message=missing_metadata_message,
+                request=self.request,
+                type="warning",
+            )
+
+        pdf_files = images_view._get_all_pdf_objects()
+        reports = pipeline.run(pdf_files, stages, refresh=refresh, progress=progress)
+
+        results = []
+        for file_obj, report in zip(pdf_files, reports, strict=True):
+            metadata = None
+            if "text" in report:
+                metadata = metadata_view.check_texts(file_obj, *report["text"])
+            results.append(
+                FileReport(
+                    file_obj=file_obj,
+                    pages=report["pages"],
+                    images=report["images"],
+                    metadata=metadata,
+                ),
+            )
+        return results
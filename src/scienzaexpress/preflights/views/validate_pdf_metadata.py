@@ -1,8 +1,13 @@
-from pathlib import Path
+from collections.abc import Callable
 from plone.dexterity.interfaces import IDexterityItem
-from Products.CMFCore.interfaces import ISiteRoot
 from Products.Five.browser import BrowserView
+from scienzaexpress.preflights import lookup
+from scienzaexpress.preflights import pdftext
+from scienzaexpress.preflights import textstore
 from scienzaexpress.preflights.content.metadata import IMetadata
+from scienzaexpress.preflights.matcher import MultiMatcher
+from scienzaexpress.preflights.matcher import normalize
+from scienzaexpress.preflights.views.preflight_jobs import PreflightJobMixin
 from zope.interface import implementer
 from zope.interface import Interface
 from zope.schema import getFieldsInOrder
@@ -10,8 +15,6 @@ from zope.schema import getFieldsInOrder
 import dataclasses
 import plone.api
 import string
-import subprocess  # noqa: S404
-import tempfile
 
 
 # Unexpected!!!
@@ -42,6 +45,48 @@ in una cartella denominata "XML"
 """
 
 
+class MetadataFormatter:
+    """
+    Read-only view of a Metadata object, used to format the targets of the checks.
+
+    Besides all the attributes of the Metadata object, for each date field
+    we also offer the localized month name and the year; e.g.
+    data_pubblicazione__B and data_pubblicazione__Y.
+
+    We recognize date fields because they start with "data_";
+    e.g. data_pubblicazione
+
+    Nothing is written on the (persistent) Metadata object, so that viewing
+    a check never causes a write transaction. Create one per request.
+    """
+
+    date_fields = frozenset(name for name, _ in getFieldsInOrder(IMetadata) if name.startswith("data_"))
+
+    def __init__(self, pmo: IDexterityItem):
+        self.pmo = pmo
+        self._date_parts = {}
+
+    def __getattr__(self, name: str):
+        field_name, separator, part = name.rpartition("__")
+        if separator and part in {"B", "Y"} and field_name in self.date_fields:
+            if field_name not in self._date_parts:
+                self._date_parts[field_name] = self._compute_date_parts(getattr(self.pmo, field_name))
+            return self._date_parts[field_name][part]
+        return getattr(self.pmo, name)
+
+    @staticmethod
+    def _compute_date_parts(value) -> dict[str, str | None]:
+        """Return the localized month name and the year of a date."""
+        if not value:
+            return {"B": None, "Y": None}
+        month_l = plone.api.portal.translate(
+            value.strftime("%B"),
+            lang=plone.api.portal.get_current_language(),
+        )
+        month_l = IT_MONTHS.get(month_l, month_l)
+        return {"B": month_l, "Y": value.strftime("%Y")}
+
+
 @dataclasses.dataclass(frozen=True)
 class Check:
     """
@@ -59,12 +104,23 @@ class Check:
     "{:%B}".format(datetime.datetime.now())
     --> "March"
     but I wasn't able to correctly leverage i18n.
-    Please see ValidatePdfMetadata._enrich_pmo()
+    Please see MetadataFormatter
     """
 
     page: int
     target: str
 
+    def pages(self, last_page: int) -> tuple[int, ...]:
+        """
+        Return the pages where the target is searched.
+
+        We look also at the page following the required one (if any), to
+        tolerate small layout shifts. Negative pages count from the end
+        (-1 is the last page).
+        """
+        page = pdftext.resolve_page(self.page, last_page)
+        return tuple(p for p in (page, page + 1) if 1 <= p <= last_page)
+
 
 @dataclasses.dataclass(frozen=True)
 class CheckResult:
@@ -76,11 +132,15 @@ class CheckResult:
     good: bool = False
     warning: str = ""
     """If any field used in the check was empty, here we should find a warning string."""
+    found_page: int | None = None
+    """The page where the target was found."""
+    offset: int | None = None
+    """The position of the target in the text of found_page."""
 
     def __str__(self):
         warning_message = f"🟡 {self.warning.replace('\n', '; ')} - " if self.warning else ""
         if self.good:
-            return f'{warning_message}🟢 {self.file_obj.file.filename} - found "{self.target}" on page {self.check.page} (searched "{self.check.target}")'
+            return f'{warning_message}🟢 {self.file_obj.file.filename} - found "{self.target}" on page {self.found_page or self.check.page} (searched "{self.check.target}")'
         else:
             return f'{warning_message}🔴 {self.file_obj.file.filename} - no "{self.target}" on page {self.check.page} (searched "{self.check.target}")'
 
@@ -90,7 +150,7 @@ class IValidatePdfMetadata(Interface):
 
 
 @implementer(IValidatePdfMetadata)
-class ValidatePdfMetadata(BrowserView):
+class ValidatePdfMetadata(PreflightJobMixin, BrowserView):
     """
     Validate a PDF with respect to its metadata.
 
@@ -140,18 +200,44 @@ class ValidatePdfMetadata(BrowserView):
     )
 
     def __call__(self):
+        if self.request.form.get("async"):
+            return self.enqueue_job()
+        self.run_checks(refresh=bool(self.request.form.get("refresh")))
+        return self.index()
+
+    def run_checks(
+        self,
+        *,
+        refresh: bool = False,
+        progress: Callable[[int, int], None] | None = None,
+    ) -> None:
+        """Run the checks and keep the results (see also jobs.py)."""
         if obj := ValidatePdfMetadata.find_metadata_object(self.context):
-            self.metadata_object = obj
-            self.results = self.check_all_pdfs()
+            self.metadata_object = MetadataFormatter(obj)
+            self.results = self.check_all_pdfs(refresh=refresh, progress=progress)
         else:
             plone.api.portal.show_message(
                 message=missing_metadata_message,
                 request=self.request,
                 type="error",
             )
+            self.metadata_object = None
             self.results = []
 
-        return self.index()
+    def count_problems(self) -> int:
+        """Return the number of PDFs with some problem."""
+        return sum(1 for file_results in self.results if not all(result.good for result in file_results))
+
+    def report_counts(self) -> dict[str, int]:
+        """Return the counts stored in the summary of the report (see jobs.py)."""
+        if self.metadata_object is None:
+            # nothing was checked
+            return {}
+        return {
+            "failed_metadata_checks": sum(
+                1 for file_results in self.results for result in file_results if not result.good
+            ),
+        }
 
     @staticmethod
     def find_metadata_object(context) -> IDexterityItem | None:
@@ -163,81 +249,24 @@ class ValidatePdfMetadata(BrowserView):
         and descending into all folders.
 
         The first such object that we find "wins".
-        """
-        # TODO: should we just drop the constraint about having a container folder named "XML"?
-        catalog = plone.api.portal.get_tool("portal_catalog")
-        xml_folder = None
-        for parent in context.aq_chain:
-            if xml_folder := parent.get("XML", None):
-                break
-            if ISiteRoot.providedBy(parent):
-                break
-            path = "/".join(parent.getPhysicalPath())
-            results = catalog(
-                portal_type="Folder",
-                id="XML",
-                path={"query": path},
-            )
-            if results:
-                xml_folder = results[0].getObject()
-                break
-
-        if not xml_folder:
-            return None
-
-        metadata_objects = xml_folder.listFolderContents(
-            # NB: use the human-friendly type name (with the space in name)!
-            contentFilter={"portal_type": "Metadata"},
-        )
-        if len(metadata_objects) > 1:
-            # TODO: issue a warning!
-            metadata_object = metadata_objects[0]
-        elif len(metadata_objects) == 0:
-            # let callee deal with this problem 😈
-            return None
-        else:
-            metadata_object = metadata_objects[0]
 
-        ValidatePdfMetadata._enrich_pmo(metadata_object)
-
-        return metadata_object
-
-    @staticmethod
-    def _enrich_pmo(pmo: IDexterityItem) -> None:
+        See lookup.py for the details (and the caching).
         """
-        Add computed attributes to the metadata object.
-
-        For each date field, we will also attach an attribute with
-        only the year and one with only the month.
+        return lookup.find_metadata_object(context)
 
-        We recognize date fields because they start with "data_";
-        e.g. data_pubblicazione
-
-        Raises:
-            ValueError: if a date field is not in the expected format.
-
-        """
-        for name, _ in getFieldsInOrder(IMetadata):
-            if name.startswith("data_"):
-                value = getattr(pmo, name)
-                if not value:
-                    month_l = None
-                    year_l = None
-                else:
-                    month_l = plone.api.portal.translate(
-                        value.strftime("%B"),
-                        lang=plone.api.portal.get_current_language(),
-                    )
-                    month_l = IT_MONTHS.get(month_l, month_l)
-                    year_l = value.strftime("%Y")
-
-                setattr(pmo, f"{name}__B", month_l)
-                setattr(pmo, f"{name}__Y", year_l)
-
-    def check_all_pdfs(self) -> list[list[CheckResult]]:
+    def check_all_pdfs(
+        self,
+        *,
+        refresh: bool = False,
+        progress: Callable[[int, int], None] | None = None,
+    ) -> list[list[CheckResult]]:
         """
         Apply all checks to all PDF files in this folder.
 
+        The text of the PDFs is extracted only once per uploaded file (see
+        textstore.py), concurrently for all files; use `refresh` to
+        extract it again. See pipeline.run for `progress`.
+
         Returns:
         the list of list of all checks performed on all PDF files.
 
@@ -245,52 +274,96 @@ class ValidatePdfMetadata(BrowserView):
         # see rise#16
 
         # TODO: refactor with pdf_prefligh.PdfPreflight
-        results = []
         pdf_files = self._get_all_pdf_objects()
-        for file_obj in pdf_files:
-            temp_path = self._temp_copy(file_obj)
-            file_results = self._process_filepath(file_obj, temp_path)
-            results.append(file_results)
-            temp_path.unlink()
-        return results
-
-    def _process_filepath(
+        all_page_texts = textstore.page_texts_many(
+            pdf_files,
+            self._needed_pages,
+            refresh=refresh,
+            progress=progress,
+        )
+        return [
+            self.check_texts(file_obj, last_page, texts)
+            for file_obj, (last_page, texts) in zip(pdf_files, all_page_texts, strict=True)
+        ]
+
+    def check_texts(self, file_obj: IDexterityItem, last_page: int, texts: dict[int, str]) -> list[CheckResult]:
+        """
+        Apply all checks to the text of a PDF.
+
+        Needs self.metadata_object. The text must include at least the pages
+        returned by _needed_pages().
+        """
+        pages_by_check = {check: check.pages(last_page) for check in self.checks}
+        return self._match_checks(file_obj, texts, pages_by_check)
+
+    def _needed_pages(self, last_page: int) -> set[int]:
+        """Return the pages needed by all checks, given the number of pages of a PDF."""
+        return {page for check in self.checks for page in check.pages(last_page)}
+
+    def _match_checks(
         self,
         file_obj: IDexterityItem,
-        temp_path: Path,
+        texts: dict[int, str],
+        pages_by_check: dict[Check, tuple[int, ...]],
     ) -> list[CheckResult]:
-        """Process one file."""
+        """
+        Look for the targets of all checks in the text of the PDF pages.
+
+        Each page is normalized once (see matcher.py) and all targets are
+        searched in a single pass.
+
+        Returns:
+            the results of the checks, in the same order as the checks.
+
+        """
+        targets = {check: self._format_target(check) for check in pages_by_check}
+        normalized_targets = {check: normalize(target).text for check, (target, _) in targets.items()}
+        multi_matcher = MultiMatcher(normalized_targets.values())
+
+        needed_pages = {page for pages in pages_by_check.values() for page in pages}
+        found_by_page = {}
+        for page in needed_pages:
+            normalized_text = normalize(texts.get(page, ""))
+            found_by_page[page] = {
+                pattern: normalized_text.original_offset(offset)
+                for pattern, offset in multi_matcher.search(normalized_text.text).items()
+            }
+
         file_results = []
-        for check in self.checks:
-            proc = subprocess.run(
-                [
-                    "pdftotext",
-                    temp_path,
-                    "-f",
-                    str(check.page),
-                    "-l",
-                    str(check.page + 1),
-                    "-",
-                ],
-                capture_output=True,
-                text=True,
-                check=False,
+        for check, pages in pages_by_check.items():
+            target, warning = targets[check]
+            pattern = normalized_targets[check]
+            found_page = offset = None
+            for page in pages:
+                if not pattern:
+                    # looking for nothing (all fields empty): as before, this
+                    # is "found", and the warning tells that something's odd
+                    found_page, offset = page, 0
+                    break
+                if pattern in found_by_page[page]:
+                    found_page, offset = page, found_by_page[page][pattern]
+                    break
+            file_results.append(
+                CheckResult(
+                    file_obj=file_obj,
+                    target=target,
+                    check=check,
+                    good=found_page is not None,
+                    warning=warning,
+                    found_page=found_page,
+                    offset=offset,
+                ),
             )
-            check_result = self._parse_output(file_obj, check, proc)
-            file_results.append(check_result)
         return file_results
 
-    def _parse_output(self, file_obj, check, proc) -> CheckResult:
+    def _format_target(self, check: Check) -> tuple[str, str]:
         """
-        Look for a ""check-target" in the PDF page that is provided as text.
+        Format the target of a check with the current metadata object.
 
         Returns:
-            the result of the check.
+            the target and a warning (possibly empty)
 
         """
-        stdout = proc.stdout.strip()
-        # TODO: do something with the stderr?
-
         # Sanity check: some field of the metadata-object might be
         # empty; looking for an empty string doesn't make sense, so we
         # report the check result with a warning.
@@ -315,19 +388,7 @@ class ValidatePdfMetadata(BrowserView):
                 warning += f"Empty field {name}. Result is undefined."
 
         target = check.target.format(m=self.metadata_object)
-        good = target in stdout
-        if not good:
-            # try harder: ignore newlines and case
-            good = target.lower() in stdout.replace("\n", " ").lower()
-
-        check_result = CheckResult(
-            file_obj=file_obj,
-            target=target,
-            check=check,
-            good=good,
-            warning=warning,
-        )
-        return check_result
+        return target, warning
 
     def _get_all_pdf_objects(self) -> list[IDexterityItem]:
         """Collect all Files that have .pdf extension."""
@@ -342,11 +403,3 @@ class ValidatePdfMetadata(BrowserView):
             if obj.file.contentType in pdf_types:
                 file_objs.append(obj)
         return file_objs
-
-    def _temp_copy(self, file_obj) -> Path:
-        """Do a temporary copy of the file obj."""
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp_file:
-            tmp_file.write(file_obj.file.data)
-            tmp_file.flush()
-            temp_path = tmp_file.name
-        return Path(temp_path)
@@ -0,0 +1,14 @@
+from scienzaexpress.preflights.interfaces import IPdfBackend
+from zope.component import getUtilitiesFor
+from zope.interface import provider
+from zope.schema.interfaces import IVocabularyFactory
+from zope.schema.vocabulary import SimpleTerm
+from zope.schema.vocabulary import SimpleVocabulary
+
+
+@provider(IVocabularyFactory)
+def pdf_backends_vocabulary(context):
+    """Get a vocabulary of the available PDF backends."""
+    return SimpleVocabulary(
+        [SimpleTerm(value=name, title=backend.title) for name, backend in sorted(getUtilitiesFor(IPdfBackend))],
+    )
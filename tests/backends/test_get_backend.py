@@ -0,0 +1,23 @@
+from plone import api
+from scienzaexpress.preflights.backends import get_backend
+from scienzaexpress.preflights.backends.inprocess import PypdfBackend
+from scienzaexpress.preflights.backends.poppler import PopplerBackend
+from zope.component import getUtility
+from zope.schema.interfaces import IVocabularyFactory
+
+
+class TestGetBackend:
+    def test_default(self, portal):
+        name, backend = get_backend()
+        assert name == "poppler"
+        assert isinstance(backend, PopplerBackend)
+
+    def test_chosen_in_registry(self, portal):
+        api.portal.set_registry_record("se_meta.pdf_backend", "pypdf")
+        name, backend = get_backend()
+        assert name == "pypdf"
+        assert isinstance(backend, PypdfBackend)
+
+    def test_vocabulary(self, portal):
+        vocabulary = getUtility(IVocabularyFactory, name="se_meta.pdf_backends")(portal)
+        assert [term.value for term in vocabulary] == ["poppler", "pypdf"]
@@ -0,0 +1,166 @@
+from pathlib import Path
+from PIL import Image
+from pypdf import PdfWriter
+from pypdf.generic import ArrayObject
+from pypdf.generic import DecodedStreamObject
+from pypdf.generic import DictionaryObject
+from pypdf.generic import FloatObject
+from pypdf.generic import NameObject
+from pypdf.generic import NumberObject
+from scienzaexpress.preflights.backends import PdfReadError
+from scienzaexpress.preflights.backends.inprocess import effective_ppi
+from scienzaexpress.preflights.backends.inprocess import multiply
+from scienzaexpress.preflights.backends.inprocess import PypdfBackend
+
+import pytest
+
+
+def stream(data: bytes, **entries) -> DecodedStreamObject:
+    obj = DecodedStreamObject()
+    obj.set_data(data)
+    obj.update({NameObject(f"/{key}"): value for key, value in entries.items()})
+    return obj
+
+
+@pytest.fixture
+def pdf(tmp_path) -> Path:
+    """
+    A one-page PDF with some text and three images.
+
+    - a 100x100 image, drawn by a form at 72x36 points (100x200 ppi)
+    - the same image, drawn directly at 144x144 points (50 ppi)
+    - a 10x10 inline image, drawn at 36x36 points (20 ppi)
+    """
+    writer = PdfWriter()
+    page = writer.add_blank_page(612, 792)
+    image = writer._add_object(
+        stream(
+            b"\x00" * 100 * 100 * 3,
+            Type=NameObject("/XObject"),
+            Subtype=NameObject("/Image"),
+            Width=NumberObject(100),
+            Height=NumberObject(100),
+            ColorSpace=NameObject("/DeviceRGB"),
+            BitsPerComponent=NumberObject(8),
+        ),
+    )
+    form = writer._add_object(
+        stream(
+            b"q 2 0 0 2 0 0 cm /Im0 Do Q",
+            Type=NameObject("/XObject"),
+            Subtype=NameObject("/Form"),
+            BBox=ArrayObject([NumberObject(0), NumberObject(0), NumberObject(1), NumberObject(1)]),
+            Matrix=ArrayObject(
+                [
+                    FloatObject(0.5),
+                    NumberObject(0),
+                    NumberObject(0),
+                    FloatObject(0.5),
+                    NumberObject(0),
+                    NumberObject(0),
+                ]
+            ),
+            Resources=DictionaryObject({NameObject("/XObject"): DictionaryObject({NameObject("/Im0"): image})}),
+        ),
+    )
+    font = writer._add_object(
+        DictionaryObject(
+            {
+                NameObject("/Type"): NameObject("/Font"),
+                NameObject("/Subtype"): NameObject("/Type1"),
+                NameObject("/BaseFont"): NameObject("/Helvetica"),
+            },
+        ),
+    )
+    page[NameObject("/Resources")] = DictionaryObject(
+        {
+            NameObject("/XObject"): DictionaryObject({NameObject("/Fm0"): form, NameObject("/Im0"): image}),
+            NameObject("/Font"): DictionaryObject({NameObject("/F1"): font}),
+        },
+    )
+    content = (
+        b"BT /F1 12 Tf 72 700 Td (Ciao mondo) Tj ET\n"
+        b"q 72 0 0 36 0 0 cm /Fm0 Do Q\n"
+        b"q 144 0 0 144 200 0 cm /Im0 Do Q\n"
+        b"q 36 0 0 36 300 300 cm BI /W 10 /H 10 /CS /G /BPC 8 ID " + b"\x80" * 100 + b" EI Q\n"
+    )
+    page[NameObject("/Contents")] = writer._add_object(stream(content))
+    path = tmp_path / "book.pdf"
+    with path.open("wb") as f:
+        writer.write(f)
+    return path
+
+
+class TestMatrices:
+    def test_multiply(self):
+        assert multiply((2, 0, 0, 2, 0, 0), (1, 0, 0, 1, 10, 20)) == (2, 0, 0, 2, 10, 20)
+        assert multiply((1, 0, 0, 1, 10, 20), (2, 0, 0, 2, 0, 0)) == (2, 0, 0, 2, 20, 40)
+
+    def test_effective_ppi_of_rotated_image(self):
+        # 300 pixels on 72 points (1 inch), rotated by 90 degrees
+        assert effective_ppi(300, (0, 72, -72, 0, 0, 0), 0) == 300
+        assert effective_ppi(300, (0, 0, 0, 0, 0, 0), 0) == 0
+
+
+class TestPypdfBackend:
+    def test_images(self, pdf):
+        images = list(PypdfBackend().iter_images(pdf))
+        assert [(info.num, info.width, info.x_ppi, info.y_ppi) for info in images] == [
+            (0, 100, 100, 200),
+            (1, 100, 50, 50),
+            (2, 10, 20, 20),
+        ]
+        assert (images[0].color, images[0].comp, images[0].pdfobject) == ("rgb", "3", str(images[1].pdfobject))
+        assert (images[2].color, images[2].pdfobject) == ("gray", "[inline]")
+
+    def test_images_placed_by_pillow(self, tmp_path):
+        path = tmp_path / "image.pdf"
+        Image.new("RGB", (300, 150)).save(path, resolution=150)
+        images = list(PypdfBackend().iter_images(path))
+        assert [(info.x_ppi, info.y_ppi) for info in images] == [(150, 150)]
+
+    def test_text(self, pdf):
+        backend = PypdfBackend()
+        assert backend.page_count(pdf) == 1
+        texts = backend.extract_pages(pdf, {1, 2})
+        assert "Ciao mondo" in texts[1]
+        assert texts[2] == ""
+
+    def test_page_sizes(self, pdf):
+        assert PypdfBackend().page_sizes(pdf) == [(612, 792)]
+
+    def test_unreadable_pdf(self, tmp_path):
+        path = tmp_path / "broken.pdf"
+        path.write_bytes(b"not a PDF")
+        backend = PypdfBackend()
+        [error] = backend.iter_images(path)
+        assert isinstance(error, PdfReadError)
+        assert error.page is None
+        assert backend.page_count(path) == 0
+        assert backend.extract_pages(path, {1}) == {}
+        assert backend.page_sizes(path) == []
+
+    def test_malformed_image_is_reported(self, pdf, monkeypatch):
+        original = PypdfBackend._image_info
+
+        def image_info(image, reference, ctm, page_number, num, size=None):
+            if num == 1:
+                raise KeyError("/Width")
+            return original(image, reference, ctm, page_number, num, size=size)
+
+        monkeypatch.setattr(PypdfBackend, "_image_info", staticmethod(image_info))
+        images = list(PypdfBackend().iter_images(pdf))
+        assert [info.num for info in images if not isinstance(info, PdfReadError)] == [0, 2]
+        assert images[1] == PdfReadError(page=1, message="Cannot read image 1: '/Width'")
+
+    @pytest.mark.parametrize("error", [ValueError, KeyError, TypeError, AssertionError])
+    def test_any_pypdf_error_is_reported(self, pdf, monkeypatch, error):
+        def broken(*args, **kwargs):
+            raise error("malformed")
+
+        monkeypatch.setattr("pypdf._page.PageObject.extract_text", broken)
+        monkeypatch.setattr("pypdf._page.PageObject.get_contents", broken)
+        backend = PypdfBackend()
+        [error] = backend.iter_images(pdf)
+        assert error == PdfReadError(page=1, message="Cannot read the page: malformed")
+        assert backend.extract_pages(pdf, {1}) == {1: ""}
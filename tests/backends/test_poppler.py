@@ -0,0 +1,102 @@
+from pathlib import Path
+from scienzaexpress.preflights.backends import PdfReadError
+from scienzaexpress.preflights.backends.poppler import parse_errors
+from scienzaexpress.preflights.backends.poppler import parse_line
+from scienzaexpress.preflights.backends.poppler import parse_trim_boxes
+from scienzaexpress.preflights.backends.poppler import PopplerBackend
+
+import os
+import pytest
+import time
+
+
+OUTPUT = """\
+page   num  type   width height color comp bpc  enc interp  object ID x-ppi y-ppi size ratio
+--------------------------------------------------------------------------------------------
+   1     0 image     420   520  rgb     3   8  image  no         7  0   432   432  100K  16%
+   2     1 image     420   520  rgb     3   8  image  no         8  0   150   150  100K  16%
+   3     2 smask     420   520  gray    1   8  image  no         9  0
+   4     3 image     420   520  rgb     3   8  image  no        10  0    72    72  100K  16%
+"""
+
+
+@pytest.fixture
+def fake_pdfimages(tmp_path, monkeypatch):
+    """Put on the PATH a pdfimages that prints OUTPUT (and optionally hangs)."""
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    (tmp_path / "output.txt").write_text(OUTPUT)
+    monkeypatch.setenv("PATH", f"{bin_dir}:{os.environ['PATH']}")
+
+    def install(hang: bool = False, stderr: str = "", status: int = 0) -> None:
+        (tmp_path / "stderr.txt").write_text(stderr)
+        script = bin_dir / "pdfimages"
+        script.write_text(
+            f"#!/bin/sh\ncat {tmp_path / 'output.txt'}\ncat {tmp_path / 'stderr.txt'} >&2\n"
+            + ("exec sleep 60\n" if hang else f"exit {status}\n")
+        )
+        script.chmod(0o755)
+
+    return install
+
+
+class TestParseLine:
+    def test_image(self):
+        info = parse_line(OUTPUT.splitlines()[2])
+        assert info.page == 1
+        assert (info.x_ppi, info.y_ppi) == (432, 432)
+
+    def test_incomplete_line(self):
+        assert parse_line(OUTPUT.splitlines()[4]) is None
+
+
+class TestParseErrors:
+    def test_errors(self):
+        output = """\
+Syntax Warning: Invalid least number of objects reading page offset hints table
+Syntax Error (1234): Bad block header in flate stream
+I/O Error: Couldn't open file 'x.pdf'
+"""
+        assert [error.message for error in parse_errors(output)] == [
+            "Syntax Error (1234): Bad block header in flate stream",
+            "I/O Error: Couldn't open file 'x.pdf'",
+        ]
+
+
+class TestParseTrimBoxes:
+    def test_boxes(self):
+        output = """\
+Page    1 size: 595.28 x 841.89 pts (A4) (rotated 0 degrees)
+Page    1 MediaBox:     0.00     0.00   623.62   870.24
+Page    1 TrimBox:     14.17    14.17   609.45   856.06
+Page    2 TrimBox:      0.00     0.00   419.53   595.28
+"""
+        sizes = parse_trim_boxes(output)
+        assert [(round(width, 2), round(height, 2)) for width, height in sizes] == [(595.28, 841.89), (419.53, 595.28)]
+
+
+class TestIterImages:
+    def test_all_images(self, fake_pdfimages):
+        fake_pdfimages()
+        images = list(PopplerBackend().iter_images(Path("x.pdf")))
+        assert [info.page for info in images] == [1, 2, 4]
+
+    def test_close_kills_pdfimages(self, fake_pdfimages):
+        fake_pdfimages(hang=True)
+        start = time.monotonic()
+        images = PopplerBackend().iter_images(Path("x.pdf"))
+        assert next(images).page == 1
+        images.close()
+        assert time.monotonic() - start < 30
+
+    def test_errors(self, fake_pdfimages):
+        fake_pdfimages(stderr="Syntax Error (1234): Bad block header in flate stream\n")
+        *images, error = PopplerBackend().iter_images(Path("x.pdf"))
+        assert [info.page for info in images] == [1, 2, 4]
+        assert error == PdfReadError(page=None, message="Syntax Error (1234): Bad block header in flate stream")
+
+    def test_failure(self, fake_pdfimages):
+        fake_pdfimages(status=1)
+        *images, error = PopplerBackend().iter_images(Path("x.pdf"))
+        assert len(images) == 3
+        assert error.message == "pdfimages failed (exit status 1)"
@@ -0,0 +1,84 @@
+from plone import api
+from plone.namedfile.file import NamedBlobFile
+from scienzaexpress.preflights.blobs import blob_path
+from scienzaexpress.preflights.blobs import committed_blob_path
+from scienzaexpress.preflights.blobs import export_blob
+
+import errno
+import os
+import pytest
+import transaction
+
+
+DATA = b"%PDF-1.4 fake" * 1000
+
+
+def _create_file(portal, file_id):
+    with api.env.adopt_roles(["Manager"]):
+        obj = api.content.create(container=portal, type="File", id=file_id)
+    obj.file = NamedBlobFile(data=DATA, filename=file_id, contentType="application/pdf")
+    return obj
+
+
+class TestBlobPath:
+    def test_uncommitted_blob_is_copied(self, portal):
+        obj = _create_file(portal, "draft.pdf")
+        assert committed_blob_path(obj) is None
+        with blob_path(obj) as path:
+            assert path.read_bytes() == DATA
+        assert not path.exists()
+
+    def test_committed_blob_is_used_directly(self, functional):
+        obj = _create_file(functional["portal"], "book.pdf")
+        transaction.commit()
+        committed = committed_blob_path(obj)
+        assert committed is not None
+        with blob_path(obj) as path:
+            assert path == committed
+            assert path.read_bytes() == DATA
+        # the blobstorage file is not ours to remove
+        assert committed.exists()
+
+
+class TestExportBlob:
+    def test_uncommitted_blob_is_copied(self, portal, tmp_path):
+        obj = _create_file(portal, "draft.pdf")
+        target = tmp_path / "draft.pdf"
+        export_blob(obj, target)
+        assert target.read_bytes() == DATA
+
+    def test_committed_blob_is_copied_by_default(self, functional, tmp_path):
+        obj = _create_file(functional["portal"], "book.pdf")
+        transaction.commit()
+        target = tmp_path / "book.pdf"
+        export_blob(obj, target)
+        assert target.read_bytes() == DATA
+        # writing to the export cannot change the blob
+        assert not target.samefile(committed_blob_path(obj))
+        target.write_bytes(b"changed")
+        assert committed_blob_path(obj).read_bytes() == DATA
+
+    def test_committed_blob_is_linked(self, functional, tmp_path):
+        obj = _create_file(functional["portal"], "book.pdf")
+        transaction.commit()
+        committed = committed_blob_path(obj)
+        target = tmp_path / "book.pdf"
+        target.write_bytes(b"old")
+        export_blob(obj, target, link=True)
+        if not target.samefile(committed):
+            pytest.skip("no hard links from the blobstorage here")
+        assert target.read_bytes() == DATA
+        assert not os.access(target, os.W_OK) or os.geteuid() == 0
+
+    @pytest.mark.parametrize("link", [True, False])
+    def test_committed_blob_is_copied(self, functional, tmp_path, monkeypatch, link):
+        def cross_device_link(src, dst):
+            raise OSError(errno.EXDEV, "Invalid cross-device link")
+
+        monkeypatch.setattr(os, "link", cross_device_link)
+        obj = _create_file(functional["portal"], "book.pdf")
+        transaction.commit()
+        target = tmp_path / "book.pdf"
+        export_blob(obj, target, link=link)
+        assert target.read_bytes() == DATA
+        assert not target.samefile(committed_blob_path(obj))
@@ -0,0 +1,46 @@
+from plone import api
+from plone.namedfile.file import NamedBlobFile
+from scienzaexpress.preflights import cache
+from zope.lifecycleevent import modified
+
+import pytest
+import transaction
+
+
+@pytest.fixture
+def file_obj(functional):
+    portal = functional["portal"]
+    with api.env.adopt_roles(["Manager"]):
+        obj = api.content.create(container=portal, type="File", id="book.pdf")
+    obj.file = NamedBlobFile(data=b"%PDF-1.4 fake", filename="book.pdf", contentType="application/pdf")
+    transaction.commit()
+    return obj
+
+
+class TestCache:
+    def test_uncommitted_blob_is_not_cached(self, portal):
+        with api.env.adopt_roles(["Manager"]):
+            obj = api.content.create(container=portal, type="File", id="draft.pdf")
+        obj.file = NamedBlobFile(data=b"%PDF-1.4 fake", filename="draft.pdf")
+        assert cache.blob_key(obj) is None
+        cache.set_cached(obj, "ns", (300,), ("row",))
+        assert cache.get_cached(obj, "ns", (300,)) is None
+
+    def test_roundtrip(self, file_obj):
+        cache.set_cached(file_obj, "ns", (300,), (("row",),))
+        assert cache.get_cached(file_obj, "ns", (300,)) == (("row",),)
+
+    def test_params_are_part_of_the_key(self, file_obj):
+        cache.set_cached(file_obj, "ns", (300,), (("row",),))
+        assert cache.get_cached(file_obj, "ns", (150,)) is None
+
+    def test_new_blob_invalidates(self, file_obj):
+        cache.set_cached(file_obj, "ns", (300,), (("row",),))
+        file_obj.file = NamedBlobFile(data=b"%PDF-1.4 other", filename="book.pdf")
+        transaction.commit()
+        assert cache.get_cached(file_obj, "ns", (300,)) is None
+
+    def test_modified_event_invalidates(self, file_obj):
+        cache.set_cached(file_obj, "ns", (300,), (("row",),))
+        modified(file_obj)
+        assert cache.get_cached(file_obj, "ns", (300,)) is None
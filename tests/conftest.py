@@ -3,6 +3,8 @@ from scienzaexpress.preflights.testing import ACCEPTANCE_TESTING
 from scienzaexpress.preflights.testing import FUNCTIONAL_TESTING
 from scienzaexpress.preflights.testing import INTEGRATION_TESTING
 
+import pytest
+
 
 pytest_plugins = ["pytest_plone"]
 
@@ -16,3 +18,46 @@ globals().update(
         )
     )
 )
+
+
+class FakeBackend:
+    """A PDF backend that knows a fake book, and counts how many times it is used."""
+
+    name = "fake"
+
+    def __init__(self, images=(), texts=None, sizes=((595.28, 841.89),)):
+        self.images = list(images)
+        self.texts = texts or {1: "Pagina 1"}
+        self.sizes = list(sizes)
+        self.calls = []
+        self.closed_early = False
+
+    def iter_images(self, path):
+        self.calls.append("iter_images")
+        try:
+            yield from self.images
+        except GeneratorExit:
+            self.closed_early = True
+            raise
+
+    def page_count(self, path):
+        self.calls.append("page_count")
+        return len(self.sizes)
+
+    def extract_pages(self, path, pages):
+        self.calls.append("extract_pages")
+        return {page: self.texts.get(page, "") for page in pages}
+
+    def page_sizes(self, path):
+        self.calls.append("page_sizes")
+        return self.sizes
+
+
+@pytest.fixture
+def fake_backend(monkeypatch):
+    """Make the preflight pipeline use a FakeBackend."""
+    from scienzaexpress.preflights import pipeline
+
+    backend = FakeBackend()
+    monkeypatch.setattr(pipeline, "get_backend", lambda: (backend.name, backend))
+    return backend
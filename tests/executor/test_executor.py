@@ -0,0 +1,68 @@
+from plone import api
+from scienzaexpress.preflights import executor
+
+import threading
+import time
+
+
+class TestMapConcurrently:
+    def test_registry_record(self, portal):
+        assert api.portal.get_registry_record(executor.REGISTRY_RECORD) == 2
+
+    def test_order_is_kept(self, portal):
+        def slow_square(x):
+            time.sleep(0.01 * (5 - x))
+            return x * x
+
+        assert executor.map_concurrently(slow_square, range(5)) == [0, 1, 4, 9, 16]
+
+    def test_concurrency_is_bounded(self, portal):
+        api.portal.set_registry_record(executor.REGISTRY_RECORD, 3)
+        lock = threading.Lock()
+        running = []
+        peak = []
+
+        def work(x):
+            with lock:
+                running.append(x)
+                peak.append(len(running))
+            time.sleep(0.02)
+            with lock:
+                running.remove(x)
+
+        executor.map_concurrently(work, range(10))
+        assert max(peak) == 3
+
+    def test_multiple_arguments(self, portal):
+        assert executor.map_concurrently(lambda a, b: a + b, [1, 2], [10, 20]) == [11, 22]
+
+    def test_resize_shuts_down_old_pool(self, portal):
+        executor.map_concurrently(lambda x: x, range(2))
+        old_pool = executor._pool
+        api.portal.set_registry_record(executor.REGISTRY_RECORD, 4)
+        assert executor.map_concurrently(lambda x: x, range(2)) == [0, 1]
+        assert executor._pool is not old_pool
+        assert old_pool._shutdown
+
+    def test_single_calls_are_bounded(self, portal, monkeypatch):
+        # (the threads below have no site to read the registry from)
+        monkeypatch.setattr(executor, "max_workers", lambda: 2)
+        lock = threading.Lock()
+        running = []
+        peak = []
+
+        def work(x):
+            with lock:
+                running.append(x)
+                peak.append(len(running))
+            time.sleep(0.02)
+            with lock:
+                running.remove(x)
+
+        # e.g. many requests, each preflighting a folder with one file
+        requests = [threading.Thread(target=executor.map_concurrently, args=(work, [i])) for i in range(6)]
+        for request in requests:
+            request.start()
+        for request in requests:
+            request.join()
+        assert max(peak) == 2
@@ -0,0 +1,178 @@
+from plone import api
+from plone.app.testing import setRoles
+from plone.app.testing import TEST_USER_ID
+from plone.namedfile.file import NamedBlobFile
+from scienzaexpress.preflights import files_export
+
+import json
+import os
+import pytest
+import transaction
+
+
+@pytest.fixture
+def folder(functional):
+    portal = functional["portal"]
+    setRoles(portal, TEST_USER_ID, ["Manager"])
+    folder = api.content.create(container=portal, type="Folder", id="book")
+    for name in ("a.pdf", "b.pdf"):
+        add_file(folder, name, b"%PDF-1.4 " + name.encode())
+    transaction.commit()
+    return folder
+
+
+def add_file(folder, name, data):
+    if name not in folder:
+        api.content.create(container=folder, type="File", id=name)
+    folder[name].file = NamedBlobFile(data=data, filename=name, contentType="application/pdf")
+
+
+def files(folder):
+    return folder.listFolderContents(contentFilter={"portal_type": "File"})
+
+
+def snapshot(path):
+    """The inode and modification time of everything in the export."""
+    return {entry.name: (entry.stat().st_ino, entry.stat().st_mtime_ns) for entry in os.scandir(path)}
+
+
+class TestSync:
+    def test_first_export(self, folder, tmp_path):
+        export = tmp_path / "libro" / "book"
+        result = files_export.sync(files(folder), export)
+        assert sorted(result.written) == ["a.pdf", "b.pdf"]
+        assert (export / "a.pdf").read_bytes() == b"%PDF-1.4 a.pdf"
+        # the manifest is not in the folder the app reads
+        assert sorted(path.name for path in export.iterdir()) == ["a.pdf", "b.pdf"]
+        manifest = json.loads(files_export.manifest_path(files_export.current_version(export)).read_text())
+        assert sorted(manifest) == ["a.pdf", "b.pdf"]
+        assert manifest["a.pdf"]["size"] == len(b"%PDF-1.4 a.pdf")
+        assert sorted(path.name for path in export.parent.iterdir()) == [".book.lock", ".book.versions", "book"]
+
+    def test_nothing_changed(self, folder, tmp_path):
+        export = tmp_path / "book"
+        files_export.sync(files(folder), export)
+        before = snapshot(export)
+        result = files_export.sync(files(folder), export)
+        assert not result.changed
+        assert sorted(result.kept) == ["a.pdf", "b.pdf"]
+        assert snapshot(export) == before
+
+    def test_changed_added_and_removed(self, folder, tmp_path):
+        export = tmp_path / "book"
+        files_export.sync(files(folder), export)
+        before = snapshot(export)
+        add_file(folder, "a.pdf", b"%PDF-1.4 new a")
+        add_file(folder, "c.pdf", b"%PDF-1.4 c.pdf")
+        api.content.delete(folder["b.pdf"])
+        transaction.commit()
+
+        result = files_export.sync(files(folder), export)
+        assert (sorted(result.written), result.kept, result.removed) == (["a.pdf", "c.pdf"], [], ["b.pdf"])
+        assert sorted(path.name for path in export.iterdir()) == ["a.pdf", "c.pdf"]
+        assert (export / "a.pdf").read_bytes() == b"%PDF-1.4 new a"
+        assert snapshot(export)["a.pdf"] != before["a.pdf"]
+
+    def test_export_is_swapped_atomically(self, folder, tmp_path, monkeypatch):
+        export = tmp_path / "book"
+        files_export.sync(files(folder), export)
+        first = files_export.current_version(export)
+        replaced = []
+        replace = os.replace
+
+        def recording_replace(src, dst):
+            replaced.append((src, dst))
+            replace(src, dst)
+
+        monkeypatch.setattr(os, "replace", recording_replace)
+        add_file(folder, "a.pdf", b"%PDF-1.4 new a")
+        transaction.commit()
+        files_export.sync(files(folder), export)
+        # a single rename puts the new version in place
+        [(link, target)] = replaced
+        assert target == export
+        assert files_export.current_version(export) != first
+        # the previous version is kept, for who is still reading it
+        assert first.is_dir()
+        files_export.sync(files(folder)[:1], export)
+        assert not first.exists()
+
+    def test_plain_export_folder_is_replaced(self, folder, tmp_path):
+        export = tmp_path / "book"
+        export.mkdir()
+        (export / "a.pdf").write_bytes(b"old")
+        result = files_export.sync(files(folder), export)
+        assert sorted(result.written) == ["a.pdf", "b.pdf"]
+        assert export.is_symlink()
+        assert sorted(path.name for path in export.iterdir()) == ["a.pdf", "b.pdf"]
+
+    def test_unchanged_files_are_linked(self, folder, tmp_path):
+        export = tmp_path / "book"
+        files_export.sync(files(folder), export)
+        before = snapshot(export)
+        add_file(folder, "a.pdf", b"%PDF-1.4 new a")
+        transaction.commit()
+        result = files_export.sync(files(folder), export)
+        assert (result.written, result.kept) == (["a.pdf"], ["b.pdf"])
+        # the same file, in the new export folder
+        assert snapshot(export)["b.pdf"] == before["b.pdf"]
+
+    def test_missing_file_is_written_again(self, folder, tmp_path):
+        export = tmp_path / "book"
+        files_export.sync(files(folder), export)
+        (export / "a.pdf").unlink()
+        result = files_export.sync(files(folder), export)
+        assert (result.written, result.kept) == (["a.pdf"], ["b.pdf"])
+        assert (export / "a.pdf").exists()
+
+    def test_failure_leaves_the_export_alone(self, folder, tmp_path, monkeypatch):
+        export = tmp_path / "book"
+        files_export.sync(files(folder), export)
+        add_file(folder, "a.pdf", b"%PDF-1.4 new a")
+        transaction.commit()
+
+        def broken_export(file_obj, target):
+            raise OSError("disk full")
+
+        monkeypatch.setattr(files_export, "export_blob", broken_export)
+        with pytest.raises(OSError):
+            files_export.sync(files(folder), export)
+        assert (export / "a.pdf").read_bytes() == b"%PDF-1.4 a.pdf"
+        # the staged version is gone, the current one is still there
+        versions = files_export.versions_folder(export)
+        assert sorted(path.name for path in versions.iterdir() if path.is_dir()) == [
+            files_export.current_version(export).name
+        ]
+
+    def test_failed_swap_leaves_the_export_alone(self, folder, tmp_path, monkeypatch):
+        export = tmp_path / "book"
+        files_export.sync(files(folder), export)
+        current = files_export.current_version(export)
+        add_file(folder, "a.pdf", b"%PDF-1.4 new a")
+        transaction.commit()
+
+        def broken_replace(src, dst):
+            raise OSError("read-only filesystem")
+
+        monkeypatch.setattr(os, "replace", broken_replace)
+        with pytest.raises(OSError):
+            files_export.sync(files(folder), export)
+        assert files_export.current_version(export) == current
+        assert (export / "a.pdf").read_bytes() == b"%PDF-1.4 a.pdf"
+        assert sorted(path.name for path in tmp_path.iterdir()) == [".book.lock", ".book.versions", "book"]
+
+
+class TestFilesDumper:
+    def test_export(self, folder, tmp_path, monkeypatch):
+        from zope.component import getMultiAdapter
+
+        monkeypatch.setenv("HOME", str(tmp_path))
+        xml_folder = api.content.create(container=folder, type="Folder", id="XML")
+        api.content.create(container=xml_folder, type="Metadata", id="metadata", title="Un libro")
+        view = getMultiAdapter((folder, folder.REQUEST), name="files-dumper")
+        view()
+        export = tmp_path / "export" / "plone-site" / "un-libro"
+        assert view.result == f"2 file scritti, 0 invariati, 0 rimossi in {export}"
+        assert sorted(path.name for path in export.glob("*.pdf")) == ["a.pdf", "b.pdf"]
+        view()
+        assert view.result == f"Nessuna modifica: 2 file già presenti in {export}"
@@ -0,0 +1,66 @@
+from plone import api
+from zope.interface import Invalid
+
+import datetime
+import pytest
+
+
+@pytest.fixture
+def metadata(portal):
+    with api.env.adopt_roles(["Manager"]):
+        return api.content.create(
+            container=portal,
+            type="Metadata",
+            id="metadata",
+            title="Un libro",
+            isbn="979-12-80068-56-9",
+            collana="Nuova Lettera Matematica",
+            collana_issn="2724-0088",
+            data_pubblicazione=datetime.date(2025, 3, 1),
+        )
+
+
+def find(**query):
+    return [brain.getPath() for brain in api.content.find(portal_type="Metadata", **query)]
+
+
+def validate(context, value):
+    from scienzaexpress.preflights.content.metadata import IMetadata
+    from scienzaexpress.preflights.content.metadata import ValidateISBN
+
+    validator = ValidateISBN(context, context.REQUEST, None, IMetadata["isbn"], None)
+    return validator.validate(value)
+
+
+class TestMetadataIndexes:
+    def test_isbn_without_hyphens(self, metadata):
+        assert find(isbn="9791280068569") == ["/plone/metadata"]
+        assert find(isbn="979-12-80068-56-9") == []
+
+    def test_fields(self, metadata):
+        assert find(collana="Nuova Lettera Matematica") == ["/plone/metadata"]
+        assert find(collana_issn="2724-0088") == ["/plone/metadata"]
+        assert find(data_pubblicazione={"query": datetime.date(2025, 1, 1), "range": "min"}) == ["/plone/metadata"]
+        assert find(data_pubblicazione={"query": datetime.date(2025, 1, 1), "range": "max"}) == []
+
+    def test_date_survives_profile_reimport(self, metadata):
+        setup_tool = api.portal.get_tool("portal_setup")
+        with api.env.adopt_roles(["Manager"]):
+            setup_tool.runAllImportStepsFromProfile("profile-scienzaexpress.preflights:default")
+        assert find(data_pubblicazione={"query": datetime.date(2025, 1, 1), "range": "min"}) == ["/plone/metadata"]
+
+    def test_columns(self, metadata):
+        [brain] = api.content.find(portal_type="Metadata")
+        assert (brain.isbn, brain.collana) == ("9791280068569", "Nuova Lettera Matematica")
+
+
+class TestValidateISBN:
+    def test_unused(self, portal):
+        assert validate(portal, "979-12-80068-56-9")
+
+    def test_duplicate(self, portal, metadata):
+        with pytest.raises(Invalid, match="Un libro"):
+            validate(portal, "9791280068569")
+
+    def test_editing_the_same_object(self, metadata):
+        assert validate(metadata, "979 12 80068 56 9")
@@ -0,0 +1,87 @@
+from DateTime import DateTime
+from plone import api
+from plone.app.testing import login
+from plone.app.testing import setRoles
+from plone.app.testing import TEST_USER_ID
+from plone.app.testing import TEST_USER_NAME
+from plone.namedfile.file import NamedBlobFile
+from scienzaexpress.preflights import jobs
+from scienzaexpress.preflights.backends import PdfImageInfo
+from zope.component import getMultiAdapter
+
+import pytest
+import transaction
+
+
+def image(page, ppi):
+    return PdfImageInfo(page, 0, "image", 420, 520, "rgb", "3", "8", "image", "no", "7", "0", ppi, ppi, "100K", "16%")
+
+
+@pytest.fixture
+def folder(functional):
+    portal = functional["portal"]
+    setRoles(portal, TEST_USER_ID, ["Manager"])
+    login(portal, TEST_USER_NAME)
+    folder = api.content.create(container=portal, type="Folder", id="book")
+    api.content.create(
+        container=folder,
+        type="File",
+        id="a.pdf",
+        file=NamedBlobFile(data=b"%PDF-1.4 fake", filename="a.pdf", contentType="application/pdf"),
+    )
+    transaction.commit()
+    return folder
+
+
+def run_job(folder, kind, **kwargs):
+    jobs.enqueue(folder, kind, **kwargs)
+    transaction.commit()
+    jobs.work(api.portal.get(), folder.REQUEST, once=True)
+
+
+def find(**query):
+    return list(api.content.find(portal_type="Folder", **query))
+
+
+class TestPreflightIndexes:
+    def test_not_checked(self, functional):
+        portal = functional["portal"]
+        setRoles(portal, TEST_USER_ID, ["Manager"])
+        api.content.create(container=portal, type="Folder", id="empty")
+        [brain] = find(id="empty")
+        assert find(preflight_ok=True) == find(preflight_ok=False) == []
+        assert not brain.preflight_checked
+
+    def test_ok(self, folder, fake_backend):
+        run_job(folder, "preflight-report")
+        [brain] = find(preflight_ok=True)
+        assert brain.getPath() == "/".join(folder.getPhysicalPath())
+        assert brain.preflight_low_ppi_images == 0
+        # there is no Metadata object: the metadata were not checked
+        assert not brain.preflight_failed_metadata_checks
+        assert brain.preflight_checked is not None
+
+    def test_newer_report_wins(self, folder, fake_backend):
+        run_job(folder, "preflight-report")
+        fake_backend.images = [image(1, 72), image(2, 150), image(3, 300)]
+        run_job(folder, "pdf-preflight", refresh=True)
+        assert find(preflight_ok=True) == []
+        [brain] = find(preflight_ok=False, preflight_low_ppi_images={"query": 1, "range": "min"})
+        assert brain.preflight_low_ppi_images == 2
+
+    def test_indexes_survive_profile_reimport(self, folder, fake_backend):
+        run_job(folder, "preflight-report")
+        setup_tool = api.portal.get_tool("portal_setup")
+        setup_tool.runAllImportStepsFromProfile("profile-scienzaexpress.preflights:default")
+        checked = find(preflight_checked={"query": DateTime("2000-01-01"), "range": "min"})
+        assert [brain.getPath() for brain in checked] == ["/".join(folder.getPhysicalPath())]
+
+
+class TestPreflightDashboard:
+    def test_lists_folders_with_problems(self, folder, fake_backend):
+        fake_backend.images = [image(1, 72)]
+        run_job(folder, "preflight-report")
+        portal = api.portal.get()
+        html = getMultiAdapter((portal, portal.REQUEST), name="preflight-dashboard")()
+        assert f"{folder.absolute_url()}/@@preflight-report" in html
+        assert "da controllare" in html
@@ -0,0 +1,135 @@
+from plone import api
+from plone.app.testing import login
+from plone.app.testing import logout
+from plone.app.testing import setRoles
+from plone.app.testing import TEST_USER_ID
+from plone.app.testing import TEST_USER_NAME
+from plone.namedfile.file import NamedBlobFile
+from scienzaexpress.preflights import jobs
+from zExceptions import Unauthorized
+from zope.component import getMultiAdapter
+
+import datetime
+import json
+import pytest
+import transaction
+
+
+@pytest.fixture
+def folder(functional):
+    portal = functional["portal"]
+    setRoles(portal, TEST_USER_ID, ["Manager"])
+    login(portal, TEST_USER_NAME)
+    folder = api.content.create(container=portal, type="Folder", id="book")
+    for name in ("a.pdf", "b.pdf"):
+        obj = api.content.create(container=folder, type="File", id=name)
+        obj.file = NamedBlobFile(data=b"%PDF-1.4 fake", filename=name, contentType="application/pdf")
+    transaction.commit()
+    return folder
+
+
+def view(folder, name, **form):
+    request = folder.REQUEST
+    request.form.update(form)
+    return getMultiAdapter((folder, request), name=name)
+
+
+class TestEnqueue:
+    def test_async_view_enqueues_and_redirects(self, folder, fake_backend):
+        view(folder, "pdf-preflight", **{"async": "1"})()
+        location = folder.REQUEST.response.getHeader("Location")
+        assert "@@preflight-job?job=" in location
+        job = jobs.get(location.rpartition("=")[2])
+        assert (job.kind, job.status, job.user) == ("pdf-preflight", jobs.QUEUED, TEST_USER_ID)
+        assert fake_backend.calls == []
+
+    def test_anonymous_cannot_enqueue(self, folder):
+        logout()
+        with pytest.raises(Unauthorized):
+            view(folder, "pdf-preflight", **{"async": "1"})()
+        assert folder.REQUEST.response.getHeader("Location") is None
+
+    def test_same_job_is_reused(self, folder):
+        job = jobs.enqueue(folder, "preflight-report")
+        assert jobs.enqueue(folder, "preflight-report") is job
+        assert jobs.enqueue(folder, "pdf-preflight") is not job
+
+    def test_unknown_kind(self, folder):
+        with pytest.raises(ValueError):
+            jobs.enqueue(folder, "files-dumper")
+
+
+class TestWork:
+    def test_job_is_run(self, folder, fake_backend):
+        job = jobs.enqueue(folder, "preflight-report")
+        transaction.commit()
+        jobs.work(api.portal.get(), folder.REQUEST, once=True)
+        assert (job.status, job.done, job.total, job.error) == (jobs.DONE, 2, 2, None)
+        assert jobs.get_report(folder, "preflight-report")["files"] == 2
+        # the results are stored on the files: the view does not read the PDFs again
+        fake_backend.calls.clear()
+        view(folder, "preflight-report")()
+        assert fake_backend.calls == []
+
+    def test_failed_job(self, folder, fake_backend, monkeypatch):
+        def broken(path):
+            raise RuntimeError("broken PDF")
+
+        monkeypatch.setattr(fake_backend, "page_sizes", broken)
+        job = jobs.enqueue(folder, "preflight-report")
+        transaction.commit()
+        jobs.work(api.portal.get(), folder.REQUEST, once=True)
+        assert (job.status, job.error) == (jobs.FAILED, "broken PDF")
+
+
+class TestStatus:
+    def test_json(self, folder):
+        job = jobs.enqueue(folder, "pdf-preflight")
+        status = json.loads(view(folder, "preflight-job-status", job=job.id)())
+        assert (status["id"], status["status"]) == (job.id, "queued")
+
+    def test_html(self, folder):
+        job = jobs.enqueue(folder, "pdf-preflight")
+        assert "queued" in view(folder, "preflight-job", job=job.id)()
+
+
+class TestStaleJobs:
+    def _kill_worker(self, job):
+        """Leave the job running, as a worker that died."""
+        job.status = jobs.RUNNING
+        job.started = job.heartbeat = jobs._now() - jobs.STALE_AFTER - datetime.timedelta(minutes=1)
+        job.attempts = 1
+        transaction.commit()
+
+    def test_stale_job_is_not_reused(self, folder):
+        job = jobs.enqueue(folder, "preflight-report")
+        self._kill_worker(job)
+        assert job.is_stale()
+        assert jobs.enqueue(folder, "preflight-report") is not job
+
+    def test_running_job_is_reused(self, folder):
+        job = jobs.enqueue(folder, "preflight-report")
+        jobs.claim_next(api.portal.get())
+        assert not job.is_stale()
+        assert jobs.enqueue(folder, "preflight-report") is job
+
+    def test_stale_job_is_run_again(self, folder, fake_backend):
+        job = jobs.enqueue(folder, "preflight-report")
+        self._kill_worker(job)
+        jobs.work(api.portal.get(), folder.REQUEST, once=True)
+        assert (job.status, job.attempts) == (jobs.DONE, 2)
+
+    def test_stale_job_fails_after_max_attempts(self, folder):
+        job = jobs.enqueue(folder, "preflight-report")
+        self._kill_worker(job)
+        job.attempts = jobs.MAX_ATTEMPTS
+        assert jobs.claim_next(api.portal.get()) is None
+        assert job.status == jobs.FAILED
+
+    def test_stale_job_enqueued_again_fails(self, folder):
+        job = jobs.enqueue(folder, "preflight-report")
+        self._kill_worker(job)
+        new_job = jobs.enqueue(folder, "preflight-report")
+        transaction.commit()
+        assert jobs.claim_next(api.portal.get()) is new_job
+        assert job.status == jobs.FAILED
@@ -0,0 +1,64 @@
+from plone import api
+from plone.app.testing import login
+from plone.app.testing import setRoles
+from plone.app.testing import TEST_USER_ID
+from plone.app.testing import TEST_USER_NAME
+from plone.namedfile.file import NamedBlobFile
+from scienzaexpress.preflights import jobs
+from zope.component import getMultiAdapter
+from zope.lifecycleevent import modified
+
+import pytest
+import transaction
+
+
+@pytest.fixture
+def folder(functional):
+    portal = functional["portal"]
+    setRoles(portal, TEST_USER_ID, ["Manager"])
+    login(portal, TEST_USER_NAME)
+    return api.content.create(container=portal, type="Folder", id="book")
+
+
+def add_file(folder, name, content_type="application/pdf"):
+    return api.content.create(
+        container=folder,
+        type="File",
+        id=name,
+        file=NamedBlobFile(data=b"%PDF-1.4 fake", filename=name, contentType=content_type),
+    )
+
+
+def queued(folder):
+    queue = api.portal.get().__annotations__.get(jobs.ANNOTATION_KEY, {})
+    return [job for job in queue.values() if job.path == folder.getPhysicalPath() and job.status == jobs.QUEUED]
+
+
+class TestPrecompute:
+    def test_upload_enqueues_one_job(self, folder):
+        add_file(folder, "a.pdf")
+        add_file(folder, "b.pdf")
+        [job] = queued(folder)
+        assert job.kind == "preflight-report"
+
+    def test_not_a_pdf(self, folder):
+        add_file(folder, "cover.jpg", "image/jpeg")
+        assert queued(folder) == []
+
+    def test_modified(self, folder):
+        file_obj = add_file(folder, "a.pdf")
+        [job] = queued(folder)
+        job.status = jobs.RUNNING
+        modified(file_obj)
+        # the running job might not see the new file
+        [new_job] = queued(folder)
+        assert new_job is not job
+
+    def test_views_use_precomputed_results(self, folder, fake_backend):
+        add_file(folder, "a.pdf")
+        transaction.commit()
+        jobs.work(api.portal.get(), folder.REQUEST, once=True)
+        assert fake_backend.calls
+        fake_backend.calls.clear()
+        getMultiAdapter((folder, folder.REQUEST), name="pdf-preflight")()
+        assert fake_backend.calls == []
@@ -0,0 +1,52 @@
+from plone import api
+from plone.memoize.ram import global_cache
+from scienzaexpress.preflights import lookup
+from zope.annotation.interfaces import IAnnotations
+
+import pytest
+
+
+@pytest.fixture
+def book(portal):
+    global_cache.invalidateAll()
+    with api.env.adopt_roles(["Manager"]):
+        book = api.content.create(container=portal, type="Folder", id="libro")
+        xml = api.content.create(container=book, type="Folder", id="XML")
+        api.content.create(container=xml, type="Metadata", id="metadata", title="Libro")
+        api.content.create(container=book, type="Folder", id="pdf")
+    IAnnotations(portal.REQUEST).pop(lookup.REQUEST_KEY, None)
+    return book
+
+
+class TestFindMetadataObject:
+    def test_sibling_xml_folder(self, book):
+        assert lookup.find_metadata_object(book["pdf"]) == book["XML"]["metadata"]
+
+    def test_missing_metadata(self, portal, book):
+        with api.env.adopt_roles(["Manager"]):
+            other = api.content.create(container=portal, type="Folder", id="altro")
+        assert lookup.find_metadata_object(other) is None
+
+    def test_cached_walk(self, book, monkeypatch):
+        lookup.find_metadata_object(book["pdf"])
+        monkeypatch.setattr(lookup, "walk", lambda context: pytest.fail("should be cached"))
+        IAnnotations(book.REQUEST).pop(lookup.REQUEST_KEY)
+        assert lookup.find_metadata_object(book["pdf"]) == book["XML"]["metadata"]
+
+    def test_rename_invalidates(self, book):
+        lookup.find_metadata_object(book["pdf"])
+        with api.env.adopt_roles(["Manager"]):
+            api.content.rename(obj=book["XML"], new_id="not-xml")
+        assert lookup.find_metadata_object(book["pdf"]) is None
+
+    def test_delete_invalidates(self, book):
+        lookup.find_metadata_object(book["pdf"])
+        with api.env.adopt_roles(["Manager"]):
+            api.content.delete(obj=book["XML"]["metadata"])
+        assert lookup.find_metadata_object(book["pdf"]) is None
+
+    def test_new_folders_keep_the_cache(self, portal, book):
+        token = lookup._token()
+        with api.env.adopt_roles(["Manager"]):
+            api.content.create(container=book, type="Folder", id="copertine")
+        assert lookup._token() == token
@@ -0,0 +1,53 @@
+from scienzaexpress.preflights.matcher import MultiMatcher
+from scienzaexpress.preflights.matcher import normalize
+
+import pytest
+
+
+class TestNormalize:
+    @pytest.mark.parametrize(
+        "text,expected",
+        [
+            ("  Prima   edizione\nin  Collana ", "prima edizione in collana"),
+            ("ﬁnito di stampare", "finito di stampare"),
+            ("L’editore “Scienza Express”", 'l\'editore "scienza express"'),
+            ("tipo­grafia", "tipografia"),
+            ("Finito di stam-\npare", "finito di stampare"),
+            ("ISBN 979-12-\n80068-56-9", "isbn 979-12-80068-56-9"),
+            ("ISBN 979-12\n-80068-56-9", "isbn 979-12-80068-56-9"),
+            ("pp. 12 - 14", "pp. 12 - 14"),
+        ],
+    )
+    def test_normalize(self, text, expected):
+        assert normalize(text).text == expected
+
+    def test_positions_refer_to_original_text(self):
+        text = "Uno  ﬁne"
+        normalized = normalize(text)
+        offset = normalized.text.index("fine")
+        assert normalized.original_offset(offset) == text.index("ﬁ")
+
+
+class TestMultiMatcher:
+    def test_search(self):
+        matcher = MultiMatcher(["he", "she", "his", "hers", "missing"])
+        assert matcher.search("ushers") == {"she": 1, "he": 2, "hers": 2}
+
+    def test_first_occurrence(self):
+        matcher = MultiMatcher(["ab"])
+        assert matcher.search("xxabab") == {"ab": 2}
+
+    def test_duplicates_and_empty_patterns(self):
+        matcher = MultiMatcher(["a", "a", ""])
+        assert matcher.patterns == ("a",)
+        assert matcher.search("bab") == {"a": 1}
+
+    def test_ligatures_and_hyphenation(self):
+        page = normalize("Finito di stam-\npare nel mese di Marzo 2025\nda Tipograﬁa Rossi")
+        target = normalize("da Tipografia Rossi").text
+        assert target in MultiMatcher([target]).search(page.text)
+
+    def test_isbn_broken_on_two_lines(self):
+        page = normalize("Stampato in Italia\nISBN 979-12-\n80068-56-9\n")
+        target = normalize("979-12-80068-56-9").text
+        assert target in MultiMatcher([target]).search(page.text)
@@ -0,0 +1,40 @@
+from pathlib import Path
+from plone import api
+
+import datetime
+import pytest
+
+
+SCHEMAS = Path(__file__).parent / "schemas"
+
+
+@pytest.fixture(autouse=True)
+def schema(monkeypatch):
+    """Validate with the (tiny) schema of the tests."""
+    from scienzaexpress.preflights import onix_schema
+
+    monkeypatch.setattr(onix_schema, "SCHEMA_DIR", SCHEMAS)
+    monkeypatch.setattr(onix_schema, "_schema", None)
+
+
+@pytest.fixture
+def add_metadata(portal):
+    """Create a valid Metadata object (unless some fields say otherwise)."""
+
+    def add_metadata(id_, **fields):
+        values = {
+            "title": id_.capitalize(),
+            "isbn": "979-12-80068-56-9",
+            "autori": "Ada Lovelace",
+            "biografie": "Matematica",
+            "abstract": "Un libro",
+            "luogo_di_pubblicazione": "Pisa",
+            "data_pubblicazione": datetime.date(2025, 3, 1),
+            "pagine": "128",
+            "prezzo_con_iva": 15.0,
+        }
+        values.update(fields)
+        with api.env.adopt_roles(["Manager"]):
+            return api.content.create(container=portal, type="Metadata", id=id_, **values)
+
+    return add_metadata
@@ -0,0 +1,157 @@
+from DateTime import DateTime
+from lxml import etree
+from plone import api
+
+import datetime
+import io
+import pytest
+
+
+NS = {"onix": "http://ns.editeur.org/onix/3.1/reference"}
+
+SINCE = datetime.datetime(2024, 1, 1, tzinfo=datetime.UTC)
+
+
+def notifications(xml: bytes) -> dict[str, str]:
+    root = etree.fromstring(xml)
+    return {
+        product.findtext("onix:ProductIdentifier/onix:IDValue", namespaces=NS): product.findtext(
+            "onix:NotificationType", namespaces=NS
+        )
+        for product in root.iterfind("onix:Product", namespaces=NS)
+    }
+
+
+def age(obj, *, modified=True):
+    """Pretend that obj was created (and modified) a long time ago."""
+    obj.creation_date = DateTime("2020/01/01")
+    if modified:
+        obj.setModificationDate(DateTime("2020/01/01"))
+    obj.reindexObject(idxs=["created", "modified"])
+
+
+def export(folder, since=None, record=None):
+    from scienzaexpress.preflights import onix_feed
+
+    output = io.BytesIO()
+    if record is None:
+        record = since is None
+    result = onix_feed.export_delta(output, folder, since=since, record=record)
+    return result, notifications(output.getvalue())
+
+
+@pytest.fixture
+def catalogue(portal, add_metadata):
+    """An old unchanged title, an old modified title, a new one and a new one not yet published."""
+    age(add_metadata("unchanged", isbn="978-88-96973-04-2"))
+    age(add_metadata("updated", isbn="979-12-80068-56-9"), modified=False)
+    add_metadata("new", isbn="979-12-80068-00-2")
+    add_metadata(
+        "future", isbn="979-12-80068-01-9", data_pubblicazione=datetime.date.today() + datetime.timedelta(days=30)
+    )
+    return portal
+
+
+class TestDelta:
+    def test_since(self, catalogue):
+        result, sent = export(catalogue, SINCE)
+        assert sent == {
+            "979-12-80068-56-9": "04",
+            "979-12-80068-00-2": "03",
+            "979-12-80068-01-9": "02",
+        }
+        assert result.products == 3
+
+    def test_withdrawn(self, catalogue):
+        with api.env.adopt_roles(["Manager"]):
+            api.content.delete(catalogue["unchanged"])
+        result, sent = export(catalogue, SINCE)
+        assert sent["978-88-96973-04-2"] == "05"
+        assert result.withdrawn == 1
+
+    def test_withdrawn_before_since(self, catalogue):
+        from scienzaexpress.preflights import onix_feed
+
+        with api.env.adopt_roles(["Manager"]):
+            api.content.delete(catalogue["unchanged"])
+        later = datetime.datetime.now(datetime.UTC) + datetime.timedelta(minutes=1)
+        assert onix_feed.withdrawn_since(SINCE, "/plone") == ["978-88-96973-04-2"]
+        assert onix_feed.withdrawn_since(later, "/plone") == []
+        assert onix_feed.withdrawn_since(SINCE, "/plone/elsewhere") == []
+
+    def test_watermark(self, catalogue):
+        from scienzaexpress.preflights import onix_feed
+
+        # the first time, everything is sent
+        result, sent = export(catalogue)
+        assert len(sent) == 4
+        assert set(sent.values()) == {"03"}
+        watermark = onix_feed.get_watermark("/plone")
+        assert watermark is not None
+
+        # then, only what changed since
+        _, sent = export(catalogue)
+        assert onix_feed.get_watermark("/plone") > watermark
+        # (the catalog has a precision of one minute: titles changed in the
+        # same minute as the last export are sent again)
+        assert "978-88-96973-04-2" not in sent
+
+    def test_since_leaves_the_watermark_alone(self, catalogue):
+        from scienzaexpress.preflights import onix_feed
+
+        export(catalogue, SINCE)
+        assert onix_feed.get_watermark("/plone") is None
+
+    def test_not_recorded(self, catalogue):
+        from scienzaexpress.preflights import onix_feed
+
+        _, sent = export(catalogue, record=False)
+        assert len(sent) == 4
+        assert onix_feed.get_watermark("/plone") is None
+
+
+class TestOnixFeedView:
+    def test_delta(self, catalogue, monkeypatch):
+        from zope.component import getMultiAdapter
+
+        written = []
+        request = catalogue.REQUEST
+        monkeypatch.setattr(request.response, "write", written.append)
+        request.form.update({"delta": "1", "since": "2024-01-01"})
+        getMultiAdapter((catalogue, request), name="onix-feed")()
+        assert set(notifications(b"".join(written))) == {"979-12-80068-56-9", "979-12-80068-00-2", "979-12-80068-01-9"}
+
+    def test_get_leaves_the_watermark_alone(self, catalogue, monkeypatch):
+        from scienzaexpress.preflights import onix_feed
+        from zope.component import getMultiAdapter
+
+        request = catalogue.REQUEST
+        monkeypatch.setattr(request.response, "write", lambda data: None)
+        request.form.update({"delta": "1"})
+        getMultiAdapter((catalogue, request), name="onix-feed")()
+        assert onix_feed.get_watermark("/plone") is None
+
+    def test_post_moves_the_watermark(self, catalogue):
+        from scienzaexpress.preflights import onix_feed
+        from zope.component import getMultiAdapter
+
+        request = catalogue.REQUEST
+        request.method = "POST"
+        request.form.update({"delta": "1"})
+        with api.env.adopt_roles(["Manager"]):
+            body = getMultiAdapter((catalogue, request), name="onix-feed")()
+        # the feed is sent only after the commit
+        assert len(notifications(b"".join(body))) == 4
+        assert onix_feed.get_watermark("/plone") is not None
+
+    def test_only_managers_move_the_watermark(self, catalogue):
+        from scienzaexpress.preflights import onix_feed
+        from zExceptions import Unauthorized
+        from zope.component import getMultiAdapter
+
+        request = catalogue.REQUEST
+        request.method = "POST"
+        request.form.update({"delta": "1"})
+        with pytest.raises(Unauthorized):
+            getMultiAdapter((catalogue, request), name="onix-feed")()
+        assert onix_feed.get_watermark("/plone") is None
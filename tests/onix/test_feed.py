@@ -0,0 +1,62 @@
+from lxml import etree
+from zope.component import getMultiAdapter
+
+import io
+
+
+NS = {"onix": "http://ns.editeur.org/onix/3.1/reference"}
+
+
+def titles(xml: bytes) -> list[str]:
+    root = etree.fromstring(xml)
+    return root.xpath(
+        "onix:Product/onix:DescriptiveDetail/onix:TitleDetail/onix:TitleElement/onix:TitleText/text()", namespaces=NS
+    )
+
+
+def feed():
+    from scienzaexpress.preflights import onix_feed
+
+    output = io.BytesIO()
+    result = onix_feed.write_feed(output, onix_feed.find_metadata())
+    return result, output.getvalue()
+
+
+class TestWriteFeed:
+    def test_all_titles(self, portal, add_metadata):
+        add_metadata("zeta", isbn="978-88-96973-04-2")
+        add_metadata("alfa")
+        result, xml = feed()
+        assert result.products == 2
+        root = etree.fromstring(xml)
+        assert root.tag == "{%s}ONIXMessage" % NS["onix"]
+        assert len(root.xpath("onix:Header", namespaces=NS)) == 1
+        assert titles(xml) == ["Alfa", "Zeta"]
+        # the products are meant for distributors: they have a price
+        assert len(root.xpath("onix:Product/onix:ProductSupply", namespaces=NS)) == 2
+
+    def test_invalid_titles_are_skipped(self, portal, add_metadata):
+        add_metadata("alfa")
+        add_metadata("beta", autori=None)
+        add_metadata("gamma", data_pubblicazione=None)
+        result, xml = feed()
+        assert result.products == 1
+        assert [path for path, _ in result.skipped] == ["/plone/beta", "/plone/gamma"]
+        assert titles(xml) == ["Alfa"]
+
+    def test_empty_catalogue(self, portal):
+        result, xml = feed()
+        assert result.products == 0
+        assert titles(xml) == []
+
+
+class TestOnixFeedView:
+    def test_streamed_to_the_response(self, portal, add_metadata, monkeypatch):
+        add_metadata("alfa")
+        written = []
+        response = portal.REQUEST.response
+        monkeypatch.setattr(response, "write", written.append)
+        view = getMultiAdapter((portal, portal.REQUEST), name="onix-feed")
+        assert view() == ""
+        assert response.getHeader("Content-Type").startswith("application/xml")
+        assert titles(b"".join(written)) == ["Alfa"]
@@ -0,0 +1,82 @@
+from lxml import etree
+
+import datetime
+import pytest
+
+
+@pytest.fixture
+def onix_generator(portal):
+    from scienzaexpress.preflights.views import onix_generator
+
+    return onix_generator
+
+
+def book_metadata(onix_generator, **fields):
+    values = {
+        "isbn": "9791280068569",
+        "type": "BB",
+        "measures": [210, 148, 12],
+        "collection_title": "",
+        "collection_issn": "",
+        "title": "Un libro",
+        "orig_title": "",
+        "subtitle": "",
+        "authors": ["Ada Lovelace"],
+        "bios": ["Matematica"],
+        "illustrators": [],
+        "translators": [],
+        "curators": [],
+        "ed_number": "",
+        "orig_lang": "",
+        "pages": "128",
+        "thema_keys": [],
+        "abstract": "Un libro",
+        "pub_city": "Pisa",
+        "pub_date": datetime.date(2025, 3, 1),
+        "price_tax": 15.6,
+    }
+    values.update(fields)
+    return onix_generator.BookMetadata(**values)
+
+
+class TestTemplates:
+    def test_slots(self, onix_generator):
+        product = onix_generator.generate_product(
+            book_metadata(onix_generator, collection_title="Nuova Lettera Matematica", collection_issn="2724-0576"),
+            is_for_ISBN=False,
+            notification_type="04",
+        )
+        assert product.findtext("RecordReference") == "it.scienzaexpress.9791280068569"
+        assert product.findtext("NotificationType") == "04"
+        assert product.findtext("ProductIdentifier/IDValue") == "9791280068569"
+        assert product.findtext("DescriptiveDetail/Collection/CollectionIdentifier/IDValue") == "2724-0576"
+        assert product.findtext("DescriptiveDetail/Collection/TitleDetail/TitleElement/TitleText") == (
+            "Nuova Lettera Matematica"
+        )
+        assert product.findtext("DescriptiveDetail/TitleDetail/TitleElement/TitleText") == "Un libro"
+        assert product.findtext("PublishingDetail/CityOfPublication") == "Pisa"
+        assert product.findtext("PublishingDetail/PublishingDate/Date") == "20250301"
+        assert [price.findtext("PriceAmount") for price in product.iterfind("ProductSupply/SupplyDetail/Price")] == [
+            "15.00",
+            "15.60",
+        ]
+
+    def test_templates_are_not_changed(self, onix_generator):
+        templates = {
+            name: etree.tostring(value)
+            for name, value in vars(onix_generator).items()
+            if name.startswith("_") and isinstance(value, etree._Element)
+        }
+        assert templates
+        for fields in ({}, {"orig_title": "A book", "subtitle": "Sottotitolo", "translators": ["Tr"]}):
+            onix_generator.generate_product(book_metadata(onix_generator, **fields), is_for_ISBN=False)
+        onix_generator.generate_withdrawn_product("9791280068569")
+        onix_generator.generate_header()
+        for name, serialized in templates.items():
+            assert etree.tostring(getattr(onix_generator, name)) == serialized, name
+
+    def test_products_are_independent(self, onix_generator):
+        first = onix_generator.generate_product(book_metadata(onix_generator, title="Primo"))
+        second = onix_generator.generate_product(book_metadata(onix_generator, title="Secondo"))
+        assert first.findtext("DescriptiveDetail/TitleDetail/TitleElement/TitleText") == "Primo"
+        assert second.findtext("DescriptiveDetail/TitleDetail/TitleElement/TitleText") == "Secondo"
@@ -0,0 +1,228 @@
+from plone import api
+from zope.component import getMultiAdapter
+
+import datetime
+import io
+import pytest
+
+
+def product(isbn="9791280068569", title="Un libro", notification_type="03", extra=""):
+    return f"""
+    <Product>
+      <RecordReference>it.example.{isbn}</RecordReference>
+      <NotificationType>{notification_type}</NotificationType>
+      <ProductIdentifier><ProductIDType>15</ProductIDType><IDValue>{isbn}</IDValue></ProductIdentifier>
+      <DescriptiveDetail>
+        <ProductForm>BC</ProductForm>
+        <Measure><MeasureType>01</MeasureType><Measurement>21</Measurement><MeasureUnitCode>cm</MeasureUnitCode></Measure>
+        <Measure><MeasureType>02</MeasureType><Measurement>148</Measurement><MeasureUnitCode>mm</MeasureUnitCode></Measure>
+        <TitleDetail>
+          <TitleType>01</TitleType>
+          <TitleElement><TitleElementLevel>01</TitleElementLevel><TitleText>{title}</TitleText></TitleElement>
+        </TitleDetail>
+        <Contributor><ContributorRole>A01</ContributorRole><PersonName>Ada Lovelace</PersonName></Contributor>
+        <Contributor>
+          <ContributorRole>A01</ContributorRole><NamesBeforeKey>Charles</NamesBeforeKey><KeyNames>Babbage</KeyNames>
+          <BiographicalNote>Matematico</BiographicalNote>
+        </Contributor>
+        <Subject><SubjectSchemeIdentifier>93</SubjectSchemeIdentifier><SubjectCode>PB</SubjectCode></Subject>
+        <Subject><SubjectSchemeIdentifier>10</SubjectSchemeIdentifier><SubjectCode>MAT000000</SubjectCode></Subject>
+      </DescriptiveDetail>
+      <PublishingDetail>
+        <PublishingDate><PublishingDateRole>01</PublishingDateRole><Date>20250301</Date></PublishingDate>
+      </PublishingDetail>
+      {extra}
+    </Product>"""
+
+
+def message(*products, namespace=True):
+    xmlns = ' xmlns="http://ns.editeur.org/onix/3.1/reference"' if namespace else ""
+    return f'<ONIXMessage{xmlns} release="3.1"><Header/>{"".join(products)}</ONIXMessage>'.encode()
+
+
+@pytest.fixture
+def onix_import(portal):
+    from scienzaexpress.preflights import onix_import
+
+    return onix_import
+
+
+def import_products(onix_import, portal, xml, **kwargs):
+    with api.env.adopt_roles(["Manager"]):
+        return onix_import.import_products(io.BytesIO(xml), portal, **kwargs)
+
+
+class TestProductFields:
+    @pytest.mark.parametrize("namespace", [True, False])
+    def test_fields(self, onix_import, namespace):
+        [(reference, notification_type, fields)] = onix_import.read_products(
+            io.BytesIO(message(product(), namespace=namespace))
+        )
+        assert reference == "it.example.9791280068569"
+        assert notification_type == "03"
+        assert fields == {
+            "isbn": "9791280068569",
+            "rilegatura": "BC - Copertina flessibile",
+            "altezza": 210,
+            "larghezza": 148,
+            "title": "Un libro",
+            "autori": "Ada Lovelace;Charles Babbage",
+            "biografie": ";;Matematico",
+            "classificazione": "PB",
+            "data_pubblicazione": datetime.date(2025, 3, 1),
+        }
+
+    def test_round_trip(self, onix_import, add_metadata):
+        """What the ONIX feed writes is read back into the same fields."""
+        from scienzaexpress.preflights import onix_feed
+
+        pmo = add_metadata(
+            "alfa",
+            sottotitolo="Un sottotitolo",
+            collana="Nuova Lettera Matematica",
+            collana_issn="2724-0576",
+            titolo_originale="A book",
+            lingua_originale="eng",
+            traduttori="Mario Rossi",
+            altezza=210,
+            larghezza=148,
+            spessore=12,
+            classificazione="PB;PBW",
+            edizione="2",
+            pagine=128,
+        )
+        output = io.BytesIO()
+        onix_feed.write_feed(output, [pmo])
+        [(_, _, fields)] = onix_import.read_products(io.BytesIO(output.getvalue()))
+        for name, value in fields.items():
+            assert getattr(pmo, name) == value, name
+        assert set(fields) >= {"isbn", "title", "autori", "collana", "titolo_originale", "prezzo_con_iva"}
+
+    def test_products_are_cleared(self, onix_import, monkeypatch):
+        """The elements already read do not stay in the tree."""
+        product_fields = onix_import.product_fields
+        before = []
+
+        def record_siblings(element):
+            before.append([len(sibling) for sibling in element.itersiblings(preceding=True)])
+            return product_fields(element)
+
+        monkeypatch.setattr(onix_import, "product_fields", record_siblings)
+        xml = message(*(product(title=f"T{i}") for i in range(4)))
+        assert [fields["title"] for _, _, fields in onix_import.read_products(io.BytesIO(xml))] == [
+            "T0",
+            "T1",
+            "T2",
+            "T3",
+        ]
+        # the Header, and the Products before, are gone (the last one is just emptied)
+        assert before == [[0], [0], [0], [0]]
+
+
+class TestImport:
+    def test_create(self, onix_import, portal):
+        result = import_products(onix_import, portal, message(product(), product("9788896973042", "Altro")))
+        assert len(result.created) == 2
+        assert sorted(brain.Title for brain in api.content.find(portal_type="Metadata", sort_on="sortable_title")) == [
+            "Altro",
+            "Un libro",
+        ]
+
+    def test_update(self, onix_import, portal, add_metadata):
+        pmo = add_metadata("alfa", isbn="979-12-80068-56-9", title="Vecchio titolo")
+        result = import_products(onix_import, portal, message(product()))
+        assert result.created == []
+        assert result.updated == ["/plone/alfa"]
+        assert pmo.title == "Un libro"
+        assert pmo.altezza == 210
+        # the fields not in the message are left alone, and so is the ISBN
+        assert pmo.prezzo_con_iva == 15.0
+        assert pmo.isbn == "979-12-80068-56-9"
+
+    def test_not_modifiable(self, onix_import, portal, add_metadata):
+        pmo = add_metadata("alfa", isbn="979-12-80068-56-9", title="Vecchio titolo")
+        with api.env.adopt_roles(["Member"]):
+            result = onix_import.import_products(io.BytesIO(message(product())), portal)
+        assert (result.created, result.updated) == ([], [])
+        assert [reference for reference, _ in result.skipped] == ["it.example.9791280068569"]
+        assert pmo.title == "Vecchio titolo"
+
+    def test_unchanged(self, onix_import, portal):
+        import_products(onix_import, portal, message(product()))
+        result = import_products(onix_import, portal, message(product()))
+        assert (result.created, result.updated, result.unchanged) == ([], [], 1)
+
+    def test_skipped(self, onix_import, portal):
+        xml = message(product(notification_type="05"), product(isbn=""))
+        result = import_products(onix_import, portal, xml)
+        assert result.created == []
+        assert [reference for reference, _ in result.skipped] == ["it.example.9791280068569", "it.example."]
+
+    def test_entities_are_not_resolved(self, onix_import, tmp_path):
+        secret = tmp_path / "secret.txt"
+        secret.write_text("segreto")
+        xml = message(product(title="&xxe;")).replace(
+            b"<ONIXMessage", f'<!DOCTYPE ONIXMessage [<!ENTITY xxe SYSTEM "file://{secret}">]><ONIXMessage'.encode(), 1
+        )
+        [(_, _, fields)] = onix_import.read_products(io.BytesIO(xml))
+        assert "segreto" not in fields.get("title", "")
+
+    def test_batches(self, onix_import, portal, caplog):
+        caplog.set_level("INFO")
+        xml = message(*(product(f"97912800685{i:02d}", f"Libro {i}") for i in range(5)))
+        result = import_products(onix_import, portal, xml, batch_size=2)
+        assert len(result.created) == 5
+        assert [record.getMessage() for record in caplog.records if "products read" in record.getMessage()] == [
+            "ONIX import: 2 products read",
+            "ONIX import: 4 products read",
+        ]
+
+
+class TestOnixImportView:
+    def test_form(self, portal):
+        with api.env.adopt_roles(["Manager"]):
+            folder = api.content.create(container=portal, type="Folder", id="book")
+        view = getMultiAdapter((folder, portal.REQUEST), name="onix-import")
+        assert 'name="onix"' in view()
+        assert view.result is None
+
+    def test_upload(self, portal):
+        from plone.protect.authenticator import createToken
+
+        with api.env.adopt_roles(["Manager"]):
+            folder = api.content.create(container=portal, type="Folder", id="book")
+            request = portal.REQUEST
+            request.environ["REQUEST_METHOD"] = "POST"
+            request.form.update({"onix": io.BytesIO(message(product())), "_authenticator": createToken()})
+            view = getMultiAdapter((folder, request), name="onix-import")
+            html = view()
+        assert len(view.result.created) == 1
+        assert view.result.created[0].startswith("/plone/book/")
+        assert "Creati: 1" in html
+
+
+class TestScript:
+    def test_runs_as_admin(self, functional, tmp_path, monkeypatch):
+        """The console script creates the Metadata objects without any role of its own."""
+        from AccessControl.SecurityManagement import getSecurityManager
+        from AccessControl.SecurityManagement import setSecurityManager
+        from pathlib import Path
+        from plone.app.testing import logout
+        from plone.app.testing import SITE_OWNER_NAME
+
+        import runpy
+
+        app, portal = functional["app"], functional["portal"]
+        path = tmp_path / "onix.xml"
+        path.write_bytes(message(product()))
+        monkeypatch.setenv("SITE_ID", portal.getId())
+        monkeypatch.setenv("INPUT", str(path))
+        monkeypatch.setenv("ADMIN", SITE_OWNER_NAME)
+        logout()
+        security_manager = getSecurityManager()
+        try:
+            runpy.run_path(str(Path(__file__).parents[2] / "scripts" / "onix_import.py"), init_globals={"app": app})
+        finally:
+            setSecurityManager(security_manager)
+        [brain] = api.content.find(portal_type="Metadata", isbn="9791280068569", unrestricted=True)
+        assert brain.Title == "Un libro"
@@ -0,0 +1,81 @@
+from Acquisition import aq_base
+from lxml import etree
+from plone import api
+
+import pytest
+
+
+NS = "http://ns.editeur.org/onix/3.1/reference"
+
+
+def message(sent="20250301", title="Un libro"):
+    return etree.fromstring(
+        f'<ONIXMessage xmlns="{NS}" release="3.1"><Header><SentDateTime>{sent}</SentDateTime></Header>'
+        f"<Product><TitleText>{title}</TitleText></Product></ONIXMessage>"
+    )
+
+
+@pytest.fixture
+def view(portal):
+    from scienzaexpress.preflights.views.onix_generator import OnixGenerator
+
+    with api.env.adopt_roles(["Manager"]):
+        folder = api.content.create(container=portal, type="Folder", id="book")
+    return OnixGenerator(folder, portal.REQUEST)
+
+
+@pytest.fixture
+def events(monkeypatch):
+    """The objects for which ObjectModifiedEvent is fired."""
+    from scienzaexpress.preflights.views import onix_generator
+
+    modified = []
+    monkeypatch.setattr(onix_generator, "modified", modified.append)
+    return modified
+
+
+def save(view, xml_tree):
+    with api.env.adopt_roles(["Manager"]):
+        return view.save_xml_file(
+            xml_tree=xml_tree,
+            file_id="xml_isbn",
+            title="XML per ISBN",
+            description="Metadata in formato Onix per ISBN",
+            message_warning="sovrascritto",
+            message_success="generato",
+        )
+
+
+class TestSaveXmlFile:
+    def test_create(self, view, events):
+        file_obj = save(view, message())
+        assert aq_base(view.context["xml_isbn"]) is aq_base(file_obj)
+        assert b"<TitleText>Un libro</TitleText>" in file_obj.file.data
+        assert events == [file_obj]
+
+    def test_unchanged(self, view, events):
+        file_obj = save(view, message())
+        blob_file = file_obj.file
+        # only SentDateTime changed
+        assert aq_base(save(view, message(sent="20250302"))) is aq_base(file_obj)
+        assert file_obj.file is blob_file
+        assert b"20250301" in file_obj.file.data
+        assert events == [file_obj]
+
+    def test_changed_in_place(self, view, events):
+        file_obj = save(view, message())
+        uid = api.content.get_uuid(file_obj)
+        blob = file_obj.file._blob
+        updated = save(view, message(title="Un altro libro"))
+        assert api.content.get_uuid(updated) == uid
+        assert updated.file._blob is blob
+        assert b"<TitleText>Un altro libro</TitleText>" in updated.file.data
+        assert events == [file_obj, file_obj]
+
+    def test_content_hash(self):
+        from scienzaexpress.preflights.views.onix_generator import content_hash
+
+        assert content_hash(b"<a><SentDateTime>1</SentDateTime></a>") == content_hash(
+            b"<a><SentDateTime>2</SentDateTime></a>"
+        )
+        assert content_hash(b"<a>1</a>") != content_hash(b"<a>2</a>")
@@ -0,0 +1,125 @@
+from lxml import etree
+from pathlib import Path
+from scienzaexpress.preflights import onix_schema
+
+import io
+import pytest
+import threading
+
+
+NS = "http://ns.editeur.org/onix/3.1/reference"
+
+BUNDLED_SCHEMAS = Path(onix_schema.__file__).parent / "schemas"
+
+
+def message(*notification_types, root="ONIXMessage"):
+    xml = f'<{root} xmlns="{NS}" release="3.1">\n  <Header><Sender/></Header>\n'
+    for notification_type in notification_types:
+        xml += f"  <Product>\n    <RecordReference>x</RecordReference>\n    <NotificationType>{notification_type}</NotificationType>\n  </Product>\n"
+    return (xml + f"</{root}>\n").encode()
+
+
+class TestValidate:
+    def test_valid(self, schema):
+        assert onix_schema.validate(message("03", "04")) == []
+
+    def test_errors_have_line_numbers(self, schema):
+        [error] = onix_schema.validate(message("03", "99"))
+        assert error.line == 9
+        assert "NotificationType" in error.message
+        assert str(error).startswith("riga 9: ")
+
+    def test_isbn_agency_message(self, schema):
+        assert onix_schema.validate(message("03", root="ONIXISBNMessage")) == []
+
+    def test_no_schema(self, monkeypatch, tmp_path):
+        monkeypatch.setattr(onix_schema, "SCHEMA_DIR", tmp_path)
+        assert onix_schema.validate(message("99")) is None
+        assert onix_schema.get_schema() is None
+
+    def test_compiled_once(self, schema, monkeypatch):
+        loads = []
+        load_schema = onix_schema._load_schema
+
+        def counting_load_schema():
+            loads.append(1)
+            return load_schema()
+
+        monkeypatch.setattr(onix_schema, "_load_schema", counting_load_schema)
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(onix_schema.validate(message("03")))) for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert results == [[]] * 8
+        assert len(loads) == 1
+
+
+@pytest.mark.skipif(
+    not (BUNDLED_SCHEMAS / onix_schema.SCHEMA_FILE).exists(),
+    reason="the EDItEUR XSD is not in schemas/ yet (see schemas/README.md)",
+)
+class TestBundledSchema:
+    """The EDItEUR reference XSD, once copied in the package."""
+
+    @pytest.fixture(autouse=True)
+    def bundled(self, monkeypatch):
+        monkeypatch.setattr(onix_schema, "SCHEMA_DIR", BUNDLED_SCHEMAS)
+
+    def test_files(self):
+        for name in (onix_schema.SCHEMA_FILE, "ONIX_BookProduct_CodeLists.xsd", "ONIX_XHTML_Subset.xsd"):
+            assert (BUNDLED_SCHEMAS / name).is_file()
+
+    def test_loads(self):
+        assert isinstance(onix_schema.get_schema(), etree.XMLSchema)
+
+    def test_notification_type(self):
+        errors = onix_schema.validate(message("99"))
+        assert any("NotificationType" in error.message for error in errors)
+
+
+class TestGenerated:
+    def test_feed(self, schema, portal, add_metadata, monkeypatch):
+        from scienzaexpress.preflights import onix_feed
+        from scienzaexpress.preflights.views import onix_generator
+
+        add_metadata("alfa")
+        # break the Products
+        generate_product = onix_generator.generate_product
+
+        def broken_product(book_meta, **kwargs):
+            product = generate_product(book_meta, **kwargs)
+            product.find("NotificationType").text = "99"
+            return product
+
+        monkeypatch.setattr(onix_feed, "generate_product", broken_product)
+        result = onix_feed.write_feed(io.BytesIO(), onix_feed.find_metadata())
+        [(isbn, [error])] = result.schema_errors
+        assert isbn == "979-12-80068-56-9"
+        assert "NotificationType" in error.message
+        # the Product is written anyway
+        assert result.products == 1
+
+    def test_saved_file(self, schema, portal):
+        from plone import api
+        from scienzaexpress.preflights.views.onix_generator import OnixGenerator
+
+        with api.env.adopt_roles(["Manager"]):
+            folder = api.content.create(container=portal, type="Folder", id="book")
+        view = OnixGenerator(folder, portal.REQUEST)
+        root = etree.fromstring(message("99"))
+        with api.env.adopt_roles(["Manager"]):
+            file_obj = view.save_xml_file(
+                xml_tree=root,
+                file_id="xml_isbn",
+                title="XML",
+                description="",
+                message_warning="",
+                message_success="",
+            )
+        [error] = view.schema_errors
+        # the line numbers refer to the saved file
+        assert file_obj.file.data.decode().splitlines()[error.line - 1].strip().startswith("<NotificationType>")
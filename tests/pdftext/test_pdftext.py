@@ -0,0 +1,37 @@
+from scienzaexpress.preflights import pdftext
+
+import pytest
+
+
+class TestPlanRanges:
+    @pytest.mark.parametrize(
+        "pages,expected",
+        [
+            ([], []),
+            ([4], [(4, 4)]),
+            ([1, 2, 3, 4, 5, 200], [(1, 5), (200, 200)]),
+            ([5, 1, 3, 3], [(1, 5)]),
+            ([1, 10], [(1, 1), (10, 10)]),
+        ],
+    )
+    def test_plan_ranges(self, pages, expected):
+        assert pdftext.plan_ranges(pages) == expected
+
+
+@pytest.fixture
+def check_class(integration):
+    # Importing the view needs the Metadata content type to be configured
+    from scienzaexpress.preflights.views.validate_pdf_metadata import Check
+
+    return Check
+
+
+class TestCheckPages:
+    def test_page_and_following(self, check_class):
+        assert check_class(page=3, target="").pages(last_page=100) == (3, 4)
+
+    def test_last_page(self, check_class):
+        assert check_class(page=-1, target="").pages(last_page=100) == (100,)
+
+    def test_unreadable_pdf(self, check_class):
+        assert check_class(page=1, target="").pages(last_page=0) == ()
@@ -0,0 +1,77 @@
+from plone import api
+from plone.namedfile.file import NamedBlobFile
+from scienzaexpress.preflights import blobs
+from scienzaexpress.preflights import pipeline
+from scienzaexpress.preflights.stages.images import ImagesOptions
+
+import pytest
+import transaction
+
+
+@pytest.fixture
+def folder(functional):
+    portal = functional["portal"]
+    with api.env.adopt_roles(["Manager"]):
+        folder = api.content.create(container=portal, type="Folder", id="book")
+        for name in ("a.pdf", "b.pdf"):
+            obj = api.content.create(container=folder, type="File", id=name)
+            obj.file = NamedBlobFile(data=b"%PDF-1.4 fake", filename=name, contentType="application/pdf")
+    transaction.commit()
+    return folder
+
+
+@pytest.fixture
+def opened_blobs(monkeypatch):
+    """Record the files whose blob is opened."""
+    opened = []
+    blob_path = blobs.blob_path
+
+    def recording_blob_path(file_obj, *args, **kwargs):
+        opened.append(file_obj.getId())
+        return blob_path(file_obj, *args, **kwargs)
+
+    monkeypatch.setattr(pipeline, "blob_path", recording_blob_path)
+    return opened
+
+
+ALL_STAGES = {"pages": None, "images": ImagesOptions(), "text": lambda last_page: {1}}
+
+
+class TestRun:
+    def test_all_stages_in_one_pass(self, folder, fake_backend, opened_blobs):
+        reports = pipeline.run(folder.listFolderContents(), ALL_STAGES)
+        assert opened_blobs == ["a.pdf", "b.pdf"]
+        assert [report["pages"].page_count for report in reports] == [1, 1]
+        assert [report["text"] for report in reports] == [(1, {1: "Pagina 1"})] * 2
+
+    def test_results_are_stored(self, folder, fake_backend, opened_blobs):
+        pipeline.run(folder.listFolderContents(), ALL_STAGES)
+        fake_backend.calls.clear()
+        reports = pipeline.run(folder.listFolderContents(), ALL_STAGES)
+        assert fake_backend.calls == []
+        assert opened_blobs == ["a.pdf", "b.pdf"]
+        assert reports[0]["images"].count == 0
+
+    def test_only_missing_stages_run(self, folder, fake_backend):
+        pipeline.run(folder.listFolderContents(), {"pages": None})
+        fake_backend.calls.clear()
+        pipeline.run(folder.listFolderContents(), {"pages": None, "images": ImagesOptions()})
+        assert fake_backend.calls == ["iter_images", "iter_images"]
+
+    def test_refresh(self, folder, fake_backend):
+        pipeline.run(folder.listFolderContents(), {"pages": None})
+        fake_backend.calls.clear()
+        pipeline.run(folder.listFolderContents(), {"pages": None}, refresh=True)
+        assert fake_backend.calls == ["page_sizes", "page_sizes"]
+
+
+class TestPreflightReport:
+    def test_render(self, folder, fake_backend):
+        from zope.component import getMultiAdapter
+
+        request = folder.REQUEST
+        view = getMultiAdapter((folder, request), name="preflight-report")
+        html = view()
+        assert "a.pdf" in html
+        assert "210.0 × 297.0 mm" in html
+        assert [report.good for report in view.results] == [True, True]
@@ -0,0 +1,120 @@
+from plone import api
+from plone.app.testing import setRoles
+from plone.app.testing import SITE_OWNER_NAME
+from plone.app.testing import SITE_OWNER_PASSWORD
+from plone.app.testing import TEST_USER_ID
+
+import datetime
+import pytest
+import requests
+import transaction
+
+
+@pytest.fixture
+def book(functional):
+    portal = functional["portal"]
+    setRoles(portal, TEST_USER_ID, ["Manager"])
+    folder = api.content.create(container=portal, type="Folder", id="book")
+    xml_folder = api.content.create(container=folder, type="Folder", id="XML")
+    api.content.create(
+        container=xml_folder,
+        type="Metadata",
+        id="metadata",
+        title="Libro",
+        isbn="979-12-80068-56-9",
+        autori="Ada Lovelace",
+        biografie="Matematica",
+        abstract="Un libro",
+        luogo_di_pubblicazione="Pisa",
+        data_pubblicazione=datetime.date(2025, 3, 1),
+        pagine="128",
+        prezzo_con_iva=15.0,
+    )
+    transaction.commit()
+    return folder
+
+
+def get(url, **headers):
+    return requests.get(
+        url,
+        headers={"Accept": "application/xml", **headers},
+        auth=(SITE_OWNER_NAME, SITE_OWNER_PASSWORD),
+        timeout=30,
+    )
+
+
+@pytest.mark.parametrize("name", ["@onix", "@onix-app"])
+def test_xml(book, name):
+    response = get(f"{book.absolute_url()}/{name}")
+    assert response.status_code == 200
+    assert response.headers["Content-Type"].startswith("application/xml")
+    assert response.headers["ETag"]
+    assert b"979-12-80068-56-9" in response.content
+
+
+def test_not_modified(book):
+    url = f"{book.absolute_url()}/@onix"
+    etag = get(url).headers["ETag"]
+    response = get(url, **{"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert get(url, **{"If-None-Match": '"other"'}).status_code == 200
+
+
+def test_cached_xml(book):
+    url = f"{book.absolute_url()}/@onix"
+    # the same bytes, SentDateTime included
+    assert get(url).content == get(url).content
+
+
+def test_etag_changes(book):
+    url = f"{book.absolute_url()}/@onix"
+    etag = get(url).headers["ETag"]
+    assert get(f"{book.absolute_url()}/@onix-app").headers["ETag"] != etag
+
+    pmo = book["XML"]["metadata"]
+    pmo.pagine = "256"
+    pmo.setModificationDate(pmo.modified() + 1)
+    pmo.reindexObject()
+    transaction.commit()
+    response = get(url, **{"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert b"256" in response.content
+
+
+def test_no_metadata(functional):
+    portal = functional["portal"]
+    setRoles(portal, TEST_USER_ID, ["Manager"])
+    folder = api.content.create(container=portal, type="Folder", id="empty")
+    transaction.commit()
+    response = get(f"{folder.absolute_url()}/@onix")
+    assert response.status_code == 404
+    assert response.json()["error"]["type"] == "NotFound"
+
+
+def test_invalid_metadata(book):
+    pmo = book["XML"]["metadata"]
+    pmo.data_pubblicazione = None
+    pmo.setModificationDate(pmo.modified() + 1)
+    transaction.commit()
+    response = get(f"{book.absolute_url()}/@onix")
+    assert response.status_code == 400
+    assert "data di pubblicazione" in response.json()["error"]["message"]
+
+
+@pytest.mark.parametrize(
+    "if_none_match,expected",
+    [
+        ('"a"', True),
+        ('W/"a"', True),
+        ('"b", "a"', True),
+        ("*", True),
+        ('"b"', False),
+        ("", False),
+    ],
+)
+def test_etag_matches(if_none_match, expected):
+    from scienzaexpress.preflights.services.onix import etag_matches
+
+    assert etag_matches('"a"', if_none_match) is expected
@@ -12,6 +12,17 @@ class TestSetupInstall:
 
         assert IBrowserLayer in browser_layers
 
+    def test_catalog_indexes(self, portal):
+        """Test that the indexes are added by the post install handler."""
+        from scienzaexpress.preflights.setuphandlers import METADATA_INDEXES
+        from scienzaexpress.preflights.setuphandlers import PREFLIGHT_INDEXES
+
+        catalog = portal.portal_catalog
+        for name, meta_type in {**PREFLIGHT_INDEXES, **METADATA_INDEXES}.items():
+            assert catalog._catalog.getIndex(name).meta_type == meta_type
+        for name in ("preflight_checked", "isbn", "data_pubblicazione"):
+            assert name in catalog.schema()
+
     def test_latest_version(self, profile_last_version):
         """Test latest version of default profile."""
-        assert profile_last_version(f"{PACKAGE_NAME}:default") == "1000"
+        assert profile_last_version(f"{PACKAGE_NAME}:default") == "1006"
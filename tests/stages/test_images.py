@@ -0,0 +1,39 @@
+from pathlib import Path
+from scienzaexpress.preflights.backends import PdfImageInfo
+from scienzaexpress.preflights.backends import PdfReadError
+from scienzaexpress.preflights.stages.images import ImagesOptions
+from scienzaexpress.preflights.stages.images import ImagesStage
+
+
+def image(page: int, ppi: int) -> PdfImageInfo:
+    return PdfImageInfo(page, 0, "image", 420, 520, "rgb", "3", "8", "image", "no", "7", "0", ppi, ppi, "100K", "16%")
+
+
+class TestImagesStage:
+    def test_summary(self, fake_backend):
+        fake_backend.images = [image(1, 432), image(2, 150), image(4, 72)]
+        summary = ImagesStage().compute(fake_backend, Path("x.pdf"), ImagesOptions(), None)
+        assert summary.count == 3
+        assert (summary.min_ppi, summary.median_ppi) == (72, 150)
+        assert [info.page for info in summary.failures] == [2, 4]
+        assert summary.failures_by_page == {2: 1, 4: 1}
+        assert not summary.errors
+        assert not summary.truncated
+        assert not summary.good
+
+    def test_read_errors(self, fake_backend):
+        error = PdfReadError(page=3, message="Cannot read the page")
+        fake_backend.images = [image(1, 432), error, image(4, 300)]
+        summary = ImagesStage().compute(fake_backend, Path("x.pdf"), ImagesOptions(), None)
+        assert summary.count == 2
+        assert not summary.failures
+        assert summary.errors == [error]
+        assert not summary.good
+
+    def test_max_failures(self, fake_backend):
+        fake_backend.images = [image(1, 432), image(2, 150), image(4, 72)]
+        summary = ImagesStage().compute(fake_backend, Path("x.pdf"), ImagesOptions(max_failures=1), None)
+        assert fake_backend.closed_early
+        assert summary.count == 2
+        assert [info.page for info in summary.failures] == [2]
+        assert summary.truncated
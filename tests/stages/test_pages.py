@@ -0,0 +1,28 @@
+from pathlib import Path
+from scienzaexpress.preflights.stages.pages import PagesStage
+
+
+A4 = (595.28, 841.89)
+A5 = (419.53, 595.28)
+
+
+class TestPagesStage:
+    def test_same_size(self, fake_backend):
+        fake_backend.sizes = [A4, (595.3, 841.9), A4]
+        summary = PagesStage().compute(fake_backend, Path("x.pdf"), None, None)
+        assert summary.page_count == 3
+        assert summary.sizes == (((210.0, 297.0), 3),)
+        assert summary.good
+
+    def test_odd_pages(self, fake_backend):
+        fake_backend.sizes = [A4, A5, A4, A4]
+        summary = PagesStage().compute(fake_backend, Path("x.pdf"), None, None)
+        assert summary.sizes[0] == ((210.0, 297.0), 3)
+        assert summary.odd_pages == (2,)
+        assert not summary.good
+
+    def test_unreadable(self, fake_backend):
+        fake_backend.sizes = []
+        summary = PagesStage().compute(fake_backend, Path("x.pdf"), None, None)
+        assert summary.page_count == 0
+        assert not summary.good
@@ -0,0 +1,52 @@
+from plone import api
+from plone.namedfile.file import NamedBlobFile
+from scienzaexpress.preflights import pdftext
+from scienzaexpress.preflights import textstore
+
+import pytest
+import transaction
+
+
+@pytest.fixture
+def file_obj(functional):
+    portal = functional["portal"]
+    with api.env.adopt_roles(["Manager"]):
+        obj = api.content.create(container=portal, type="File", id="book.pdf")
+    obj.file = NamedBlobFile(data=b"%PDF-1.4 fake", filename="book.pdf", contentType="application/pdf")
+    transaction.commit()
+    return obj
+
+
+@pytest.fixture
+def poppler_runs(monkeypatch):
+    """Replace poppler with a fake 10-pages PDF and record the extracted pages."""
+    runs = []
+
+    def extract_pages(path, pages):
+        pages = sorted(set(pages))
+        runs.append(pages)
+        return {page: f"Pagina {page}" for page in pages}
+
+    monkeypatch.setattr(pdftext, "page_count", lambda path: 10)
+    monkeypatch.setattr(pdftext, "extract_pages", extract_pages)
+    return runs
+
+
+class TestPageTexts:
+    def test_text_is_extracted_once(self, file_obj, poppler_runs):
+        last_page, texts = textstore.page_texts(file_obj, lambda last: {1, last})
+        assert last_page == 10
+        assert texts == {1: "Pagina 1", 10: "Pagina 10"}
+        textstore.page_texts(file_obj, lambda last: {1, last})
+        assert poppler_runs == [[1, 10]]
+
+    def test_missing_pages_are_added(self, file_obj, poppler_runs):
+        textstore.page_texts(file_obj, lambda last: {1})
+        _, texts = textstore.page_texts(file_obj, lambda last: {1, 2})
+        assert texts == {1: "Pagina 1", 2: "Pagina 2"}
+        assert poppler_runs == [[1], [2]]
+
+    def test_refresh(self, file_obj, poppler_runs):
+        textstore.page_texts(file_obj, lambda last: {1})
+        textstore.page_texts(file_obj, lambda last: {1}, refresh=True)
+        assert poppler_runs == [[1], [1]]
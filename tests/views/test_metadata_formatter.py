@@ -0,0 +1,45 @@
+from plone import api
+
+import datetime
+import pytest
+
+
+@pytest.fixture
+def metadata(portal):
+    with api.env.adopt_roles(["Manager"]):
+        return api.content.create(
+            container=portal,
+            type="Metadata",
+            id="metadata",
+            title="Un libro",
+            data_pubblicazione=datetime.date(2025, 3, 1),
+        )
+
+
+class TestMetadataFormatter:
+    def test_date_parts(self, metadata):
+        from scienzaexpress.preflights.views.validate_pdf_metadata import (
+            MetadataFormatter,
+        )
+
+        formatter = MetadataFormatter(metadata)
+        assert formatter.data_pubblicazione__Y == "2025"
+        assert formatter.data_pubblicazione__B == "Marzo"
+        assert formatter.data_stampa__B is None
+        assert "{m.title} {m.data_pubblicazione__Y}".format(m=formatter) == "Un libro 2025"
+
+    def test_metadata_object_is_not_modified(self, metadata):
+        from scienzaexpress.preflights.views.validate_pdf_metadata import (
+            MetadataFormatter,
+        )
+
+        MetadataFormatter(metadata).data_pubblicazione__B  # noqa: B018
+        assert not [name for name in vars(metadata) if name.endswith(("__B", "__Y"))]
+
+    def test_unknown_attributes(self, metadata):
+        from scienzaexpress.preflights.views.validate_pdf_metadata import (
+            MetadataFormatter,
+        )
+
+        with pytest.raises(AttributeError):
+            MetadataFormatter(metadata).titolo__B  # noqa: B018